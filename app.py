@@ -1,43 +1,77 @@
+import importlib
 from dash import dash, html
 import dash
 import dash_bootstrap_components as dbc
+import fintix.dataCache as dataCache
+import scripts.telemetry as telemetry
+import scripts.profiling as profiling
 
-# Create Dash App
-app = dash.Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.CYBORG], 
-                    meta_tags=[{'name': 'viewport',
-                            'content': 'width=device-width, initial-scale=1.0'}])
+# Heavy dependencies that the pages import on first use rather than at startup -> fast worker spawn.
+# Preloading imports them once in the server process, before its workers fork (see wsgi.py).
+deferred_modules = ['yfinance']
 
-#-------------------App Layout-------------------
-app.layout = html.Div(
-    [
-        # Navbar
-        dbc.NavbarSimple(
-            dbc.DropdownMenu(
-                    [
-                        dbc.DropdownMenuItem(page["name"], href=page["path"])
-                        for page in dash.page_registry.values()
-                        if page["module"] != "pages.not_found_404"
-                    ],
-                    nav=True,
-                    label="More Pages",
-                    className='me-5'
-                ),
-            id='nav-bar',
-            brand="Fintix",
-            brand_href="#",
-            color="dark",
-            dark=True,
-            brand_style= {'fontSize':30},
-            fluid=True,
-            className='ms-2 me-2 mb-3'                 
-        ),
+def create_app(shared_cache_path=dataCache.default_shared_cache_path, preload=False):
+    '''
+    Creates the Dash app (once per process: pages register their callbacks globally).
+    shared_cache_path is the cache shared by the server's worker processes and background jobs (uploaded datasets,
+    results, graph traces); None keeps the caches in process, which requires a single process without background jobs.
+    Set preload to load the overview data, the ticker universe and the deferred modules before the server forks its workers, so that they share them.
+    '''
+    if shared_cache_path is not None:
+        dataCache.use_shared_cache(shared_cache_path)
+
+    # Create Dash App
+    app = dash.Dash(__name__, use_pages=True, external_stylesheets=[dbc.themes.CYBORG], 
+                        meta_tags=[{'name': 'viewport',
+                                'content': 'width=device-width, initial-scale=1.0'}])
+    app.layout = create_layout()
+    app.title = 'Fintix'
+    telemetry.init_app(app) # /metrics and /metrics.json
+    profiling.init_app(app) # Callback requests flagged with the profile token
 
-        # content of each page
-        dash.page_container
-    ]
-)
+    if preload:
+        for module in deferred_modules:
+            importlib.import_module(module)
+        import scripts.tickerUniverse as tickUn
+        tickUn.load_tickers() # Cached -> shared by the forked workers
+        import pages.overview as overview # Imported by Dash with the pages
+        try:
+            overview.retrieve_performance_tables()
+        except:
+            print("Couldn't preload the overview data, it will be loaded by the first request.")
+    return app
+
+#-------------------App Layout-------------------
+def create_layout():
+    return html.Div(
+        [
+            # Navbar
+            dbc.NavbarSimple(
+                dbc.DropdownMenu(
+                        [
+                            dbc.DropdownMenuItem(page["name"], href=page["path"])
+                            for page in dash.page_registry.values()
+                            if page["module"] != "pages.not_found_404"
+                        ],
+                        nav=True,
+                        label="More Pages",
+                        className='me-5'
+                    ),
+                id='nav-bar',
+                brand="Fintix",
+                brand_href="#",
+                color="dark",
+                dark=True,
+                brand_style= {'fontSize':30},
+                fluid=True,
+                className='ms-2 me-2 mb-3'                 
+            ),
 
-app.title = 'Fintix'
+            # content of each page
+            dash.page_container
+        ]
+    )
 
 if __name__ == '__main__':
-    app.run_server(debug=False)
+    app = create_app()
+    app.run(debug=False)
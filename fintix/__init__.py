@@ -0,0 +1,6 @@
+# Compute layer of the dashboard: takes and returns DataFrames / arrays only, and imports nothing from Dash or Plotly
+# (only numpy, pandas, dateutil and the standard library) -> cheap to import in batch jobs and worker processes.
+# The renderers (scripts/*Module.py, scripts/metricsTable.py, pages/) are thin adapters that format its results.
+#   import fintix.metricsEngine as metricsEngine
+#   metricsEngine.compute_metrics_table(prices, periods_per_year=252, rfr=0.02)
+# Modules are imported individually, this file imports none of them.
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import fintix.metricsEngine as metricsEngine
+
+benchmark_statistics = ['Correlation', 'Alpha', 'Beta', 'R-squared', 'Treynor Ratio', 'Information Ratio']
+
+def compute_benchmark_statistics(prices, benchmark_asset, periods_per_year, rfr):
+    '''
+    Correlation, annualized alpha (excl. rfr), beta, R-squared, Treynor ratio and information ratio of every asset
+    against the benchmark, on the dates where both have a return (as qs.stats.greeks, r_squared and information_ratio).
+    Alpha and beta are 0 when the benchmark doesn't move, the Treynor ratio is NaN when beta is 0.
+    Returns a DataFrame indexed by asset with one column per statistic.
+    '''
+    returns = metricsEngine.prepare_returns(prices)
+    bench_col = prices.columns.get_loc(benchmark_asset)
+    valid = ~np.isnan(returns)
+    paired = valid & valid[:, [bench_col]]
+    x = np.where(paired, returns, 0.0)
+    y = np.where(paired, returns[:, [bench_col]], 0.0)
+
+    with np.errstate(all='ignore'):
+        # Moments over the paired dates, centered on their means
+        n = paired.sum(axis=0)
+        mean_x = x.sum(axis=0) / n
+        mean_y = y.sum(axis=0) / n
+        dx = np.where(paired, x - mean_x, 0.0)
+        dy = np.where(paired, y - mean_y, 0.0)
+        sxx = (dx * dx).sum(axis=0)
+        syy = (dy * dy).sum(axis=0)
+        sxy = (dx * dy).sum(axis=0)
+        undefined = (n < 2) | (sxx == 0) | (syy == 0)
+
+        correlation = np.where(undefined, np.nan, sxy / np.sqrt(sxx * syy))
+        r_squared = np.clip(correlation, -1, 1) ** 2
+        beta = np.where((n < 2) | (syy == 0), np.nan, sxy / syy)
+        alpha = (mean_x - beta * mean_y) * periods_per_year
+        beta, alpha = np.nan_to_num(beta, nan=0.0), np.nan_to_num(alpha, nan=0.0)
+
+        # Treynor ratio on the compounded return of all the asset's dates
+        total_return = np.prod(np.where(valid, returns, 0.0) + 1, axis=0) - 1
+        treynor = (total_return - rfr) / np.where(beta == 0, np.nan, beta)
+
+        # Information ratio on the active returns (missing where either return is)
+        active = np.where(paired, returns - returns[:, [bench_col]], np.nan)
+        tracking_error = np.nanstd(active, axis=0, ddof=1)
+        information_ratio = np.where(tracking_error == 0, 0.0, np.nanmean(active, axis=0) / tracking_error)
+
+    return pd.DataFrame({'Correlation': correlation,
+                        'Alpha': alpha,
+                        'Beta': beta,
+                        'R-squared': r_squared,
+                        'Treynor Ratio': treynor,
+                        'Information Ratio': information_ratio}, index=pd.Index(prices.columns, name='Asset'))
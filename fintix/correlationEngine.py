@@ -0,0 +1,62 @@
+import numpy as np
+
+# Assets per block of the correlation matrix -> bounds the temporaries to block x assets
+block_size = 256
+
+def pairwise_correlation(returns, min_periods=2):
+    '''
+    Pearson correlation matrix of the columns of a (dates x assets) array, using for each pair the dates where
+    both have a value (as DataFrame.corr). Computed with matrix products, one block of assets at a time.
+    '''
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = ~np.isnan(returns)
+    if valid.all():
+        with np.errstate(all='ignore'):
+            corr = np.corrcoef(returns, rowvar=False).reshape(returns.shape[1], returns.shape[1])
+        corr[:, returns.std(axis=0) == 0] = np.nan
+        corr[returns.std(axis=0) == 0, :] = np.nan
+        return corr
+
+    # Center each column on its mean to keep the sums small
+    mask = valid.astype(np.float64)
+    with np.errstate(all='ignore'):
+        x = np.where(valid, returns - np.nanmean(np.where(valid, returns, np.nan), axis=0), 0.0)
+    x[~valid] = 0.0
+    xx = x * x
+
+    k = returns.shape[1]
+    corr = np.empty((k, k))
+    for lo in range(0, k, block_size):
+        hi = min(lo + block_size, k)
+        n = mask[:, lo:hi].T @ mask # Common observations
+        sx = x[:, lo:hi].T @ mask # Sum of the block's returns over the common dates
+        sy = mask[:, lo:hi].T @ x # Sum of the other assets' returns over the common dates
+        sxx = xx[:, lo:hi].T @ mask
+        syy = mask[:, lo:hi].T @ xx
+        sxy = x[:, lo:hi].T @ x
+        with np.errstate(all='ignore'):
+            cov = sxy - sx * sy / n
+            var = np.maximum(sxx - sx * sx / n, 0.0) * np.maximum(syy - sy * sy / n, 0.0)
+            block = cov / np.sqrt(var)
+        block[(n < min_periods) | (var == 0)] = np.nan
+        corr[lo:hi] = np.clip(block, -1, 1)
+    return corr
+
+def cluster_order(corr):
+    '''
+    Order of the assets given by hierarchical clustering (average linkage on 1 - correlation), so that
+    correlated assets sit next to each other. Requires scipy; returns the original order without it.
+    '''
+    k = len(corr)
+    if k < 3:
+        return np.arange(k)
+    try:
+        from scipy.cluster.hierarchy import linkage, leaves_list
+        from scipy.spatial.distance import squareform
+    except ImportError: # Optional dependency
+        return np.arange(k)
+
+    distance = 1 - np.nan_to_num(corr, nan=0.0)
+    distance = (distance + distance.T) / 2
+    np.fill_diagonal(distance, 0)
+    return leaves_list(linkage(squareform(np.clip(distance, 0, 2), checks=False), method='average'))
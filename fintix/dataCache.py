@@ -0,0 +1,371 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Server-side cache settings (per process)
+max_entries = 32
+ttl_seconds = 60 * 60 * 2 # 2 hours since last access
+max_bytes = 512 * 1024 ** 2 # 512MB
+
+# Cross-process cache settings (see use_shared_cache), per namespace
+# Its files are unpickled -> defaults to the user's own cache folder rather than a predictable path of the shared temp folder
+default_shared_cache_path = os.environ.get('FINTIX_CACHE_DIR',
+                            os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'fintix'))
+shared_cache_path = None
+shared_max_bytes = 1024 ** 3 # 1GB
+claim_seconds = 10 * 60 # Claims (values being computed by a process) older than this are considered abandoned
+claim_poll_interval = 0.05 # Seconds
+
+def content_hash(content):
+    '''
+    Returns a short hex digest for a str/bytes payload, used as the cache key of an uploaded dataset.
+    '''
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def frame_fingerprint(df):
+    '''
+    Returns a hex digest of a DataFrame's index, columns and values, used to key results computed from it.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(df.columns), df.shape, str(df.dtypes.tolist()))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes())
+    for col in range(df.shape[1]):
+        values = df.iloc[:, col].to_numpy()
+        digest.update(values.tobytes() if values.dtype.kind in 'biufcmM' else pd.util.hash_array(values.astype(object)).tobytes())
+    return digest.hexdigest()
+
+def frame_size(df):
+    '''
+    Approximate memory footprint of a DataFrame in bytes.
+    '''
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+def secure_directory(directory):
+    '''
+    Creates a directory only accessible to the current user, or checks that an existing one is.
+    Raises PermissionError if it belongs to another user or is accessible to others (its files could be replaced).
+    '''
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'): # Windows -> access is controlled by ACLs
+        return directory
+    status = os.stat(directory)
+    if status.st_uid != os.getuid():
+        raise PermissionError(f'Cache directory {directory} belongs to another user (uid {status.st_uid})')
+    if status.st_mode & 0o077:
+        raise PermissionError(f'Cache directory {directory} is accessible to other users '
+                              f'(mode {oct(status.st_mode & 0o777)}), run: chmod 700 {directory}')
+    return directory
+
+_instances = weakref.WeakSet() # Caches of this process
+
+def _reset_after_fork():
+    '''
+    Locks held by another thread when the process forked (server workers, background jobs) would never be released
+    in the child. Hit / miss counters restart so that each process only counts its own lookups.
+    '''
+    global _shared_lock
+    _shared_lock = threading.Lock()
+    for cache in list(_instances):
+        cache._lock = threading.Lock()
+        cache.hits = cache.misses = 0
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+class DatasetCache:
+    '''
+    Thread-safe LRU cache of parsed DataFrames with a time-to-live and a memory budget.
+    Entries are evicted least recently used first whenever the entry count or byte budget is exceeded.
+    '''
+    def __init__(self, max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # key -> (value, size, last access)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _instances.add(self)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, last_access = entry
+            now = time.monotonic()
+            if now - last_access > self.ttl_seconds:
+                self._pop(key)
+                self.misses += 1
+                return None
+
+            self._entries[key] = (value, size, now)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=None):
+        size = frame_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            if size > self.max_bytes: # Too large to ever fit, don't evict everything else for it
+                return False
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            self._evict()
+            return True
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'bytes': self._bytes,
+                    'hits': self.hits,
+                    'misses': self.misses}
+
+    def _pop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (_, _, t) in self._entries.items() if now - t > self.ttl_seconds]:
+            self._pop(key)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._pop(next(iter(self._entries)))
+
+class DiskCache:
+    '''
+    LRU cache of pickled values in a local directory, shared by all the processes of the host (e.g. server workers).
+    Files are written atomically; expired and least recently used files are deleted once the directory exceeds max_bytes.
+    Its files are unpickled -> the directory must belong to the app's user and be private to it (checked on creation).
+    '''
+    def __init__(self, directory, max_bytes=shared_max_bytes, ttl_seconds=ttl_seconds):
+        self.directory = secure_directory(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._written = 0 # Bytes written since the last eviction scan
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _instances.add(self)
+
+    def _path(self, key):
+        return os.path.join(self.directory, content_hash(str(key)) + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                raise FileNotFoundError
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path) # Last access -> LRU order across processes
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f'Dropping unreadable cache file {path}: {e}')
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value, size=None):
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp_path)
+            if size > self.max_bytes:
+                self._remove(temp_path)
+                return False
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Couldn't write cache file {path}: {e}")
+            self._remove(temp_path)
+            return False
+
+        with self._lock:
+            self._written += size
+            scan = self._written > self.max_bytes // 8 # Amortizes the directory scans
+            if scan:
+                self._written = 0
+        if scan:
+            self._evict()
+        return True
+
+    def __contains__(self, key):
+        # Same expiry as get, without unpickling the value or counting a hit
+        try:
+            return time.time() - os.path.getmtime(self._path(key)) <= self.ttl_seconds
+        except OSError:
+            return False
+
+    def _claim_path(self, key):
+        return os.path.join(self.directory, content_hash(str(key)) + '.claim')
+
+    def _abandoned(self, claim_path, lease_seconds):
+        try:
+            age = time.time() - os.path.getmtime(claim_path)
+            with open(claim_path) as f:
+                pid = int(f.read() or 0)
+        except FileNotFoundError:
+            return True
+        except ValueError: # Being written
+            return False
+        if age > lease_seconds:
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError: # Owner died without releasing its claim
+            return True
+        except (PermissionError, OSError):
+            pass
+        return False
+
+    def claim(self, key, lease_seconds=claim_seconds):
+        '''
+        Marks key as being computed by this process (marker file created atomically). Returns False if another live
+        process holds the claim; claims of exited processes or older than lease_seconds are taken over.
+        '''
+        claim_path = self._claim_path(key)
+        for _ in range(2):
+            try:
+                fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+                with os.fdopen(fd, 'w') as f:
+                    f.write(str(os.getpid()))
+                return True
+            except FileExistsError:
+                if not self._abandoned(claim_path, lease_seconds):
+                    return False
+                self._remove(claim_path)
+            except OSError as e:
+                print(f"Couldn't write claim file {claim_path}: {e}")
+                return True # Compute without coordination
+        return False
+
+    def release(self, key):
+        self._remove(self._claim_path(key))
+
+    def wait(self, key, lease_seconds=claim_seconds, interval=claim_poll_interval):
+        '''
+        Waits for the value of a key claimed by another process. Returns None if the claim is released or abandoned
+        without a value (e.g. the value was too large to cache).
+        '''
+        path, claim_path = self._path(key), self._claim_path(key)
+        while True:
+            if os.path.exists(path):
+                value = self.get(key)
+                if value is not None:
+                    return value
+            if self._abandoned(claim_path, lease_seconds):
+                return self.get(key) if os.path.exists(path) else None
+            time.sleep(interval)
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            self._remove(entry.path)
+
+    def info(self):
+        files = self._files()
+        return {'entries': len(files),
+                'bytes': sum(size for _, _, size in files),
+                'hits': self.hits,
+                'misses': self.misses}
+
+    def _files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                    files.append((entry.path, stat.st_mtime, stat.st_size))
+                except FileNotFoundError: # Evicted by another process
+                    pass
+        return files
+
+    def _evict(self):
+        now = time.time()
+        files = sorted(self._files(), key=lambda file: file[1])
+        total = sum(size for _, _, size in files)
+        for path, last_access, size in files:
+            if total <= self.max_bytes and now - last_access <= self.ttl_seconds:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+def use_shared_cache(directory, max_bytes=shared_max_bytes):
+    '''
+    Enables the cross-process caches under directory (one sub-directory per namespace).
+    '''
+    global shared_cache_path, shared_max_bytes
+    secure_directory(directory)
+    with _shared_lock:
+        shared_cache_path = directory
+        shared_max_bytes = max_bytes
+        _shared_caches.clear()
+
+def shared_cache(namespace):
+    '''
+    Returns the DiskCache of a namespace, or None when no shared cache is configured (single process).
+    '''
+    if shared_cache_path is None:
+        return None
+    with _shared_lock:
+        if namespace not in _shared_caches:
+            _shared_caches[namespace] = DiskCache(os.path.join(shared_cache_path, namespace), shared_max_bytes)
+        return _shared_caches[namespace]
+
+# Uploaded datasets, keyed by content hash
+dataset_cache = DatasetCache()
+
+def get_dataset(key):
+    '''
+    Returns an uploaded dataset from this process' cache, or from the shared cache if another worker parsed it.
+    '''
+    df = dataset_cache.get(key)
+    shared = shared_cache('datasets')
+    if df is None and shared is not None:
+        df = shared.get(key)
+        if df is not None:
+            dataset_cache.put(key, df)
+    return df
+
+def put_dataset(key, df):
+    shared = shared_cache('datasets')
+    if shared is not None:
+        shared.put(key, df)
+    return dataset_cache.put(key, df)
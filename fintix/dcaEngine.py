@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+def retrieve_contribution_dates(index, days=None, months=None, dates=None):
+    '''
+    Builds a contribution schedule over a date index.
+    Pick one of: every x days, every x calendar months, or an explicit list of dates.
+    Scheduled dates are snapped forward to the next available date in the index and dropped if past its end.
+    '''
+    start_date = index[0]
+    end_date = index[-1]
+
+    if dates is not None:
+        schedule = pd.DatetimeIndex(pd.to_datetime(list(dates))).sort_values()
+    elif months is not None:
+        n = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+        schedule = pd.DatetimeIndex([start_date + relativedelta(months=k * months) for k in range(n // months + 1)])
+    else:
+        schedule = pd.date_range(start_date, end_date, freq=pd.Timedelta(days=days))
+
+    schedule = schedule[(schedule >= start_date) & (schedule <= end_date)]
+    positions = np.unique(index.searchsorted(schedule, side='left'))
+    return index[positions[positions < len(index)]]
+
+def compute_dca(prices, budget, starting_amount, contribution_dates):
+    '''
+    Closed-form DCA over a price panel, split equally across assets.
+    Each contribution grows with the asset's cumulative growth factor G: its value at t is inflow * G[t] / G[contribution].
+    Summing over contributions gives G[t] * cumsum(inflow / G[contribution]), one linear pass regardless of the schedule.
+    Returns the index (total value over time) and the per-asset cashflow log (contribution dates x assets).
+    '''
+    assets = prices.columns
+    noa = len(assets) # number of assets
+    returns = prices.pct_change().to_numpy(dtype=np.float64)
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+    growth = np.cumprod(1 + returns, axis=0)
+
+    contribution_dates = pd.DatetimeIndex(contribution_dates)
+    positions = prices.index.get_indexer(contribution_dates)
+
+    # Same split as before -> initial amount first (if any), then the rest of the budget evenly
+    n_payments = len(positions) - 1 if starting_amount != 0 else len(positions)
+    payment = ((budget - starting_amount) / n_payments) / noa if n_payments > 0 else 0.0
+    inflows = np.repeat(payment, len(positions))
+    if starting_amount != 0 and len(positions):
+        inflows[0] = starting_amount / noa
+
+    # Units bought at each contribution, accumulated over time
+    units = np.zeros_like(growth)
+    np.add.at(units, positions, inflows[:, None] / growth[positions])
+    units = np.cumsum(units, axis=0)
+
+    index = pd.Series((units * growth).sum(axis=1), index=prices.index)
+    cashflow = pd.DataFrame(np.repeat(inflows[:, None], noa, axis=1), index=contribution_dates, columns=assets)
+    return index, cashflow
+
+def create_ew_portfolio_index(prices, budget, return_contribution=False):
+    try:
+        prices.set_index('Date', inplace=True) # In case Date column was not set as index
+        prices.index = pd.to_datetime(prices.index)
+    except:
+        pass
+    
+    prices = prices.resample('D').ffill()
+    returns = prices.pct_change()
+    noa = returns.shape[1] # number of assets
+    weights = np.repeat(1/noa, noa)
+    index = returns + 1
+    index.iloc[0] = budget / noa
+    aba = index.cumprod() # amount by asset
+    index = aba.sum(axis=1) 
+    
+    if return_contribution:
+        # Return contribution
+        rba = aba.iloc[-1] / aba.iloc[0] # returns by asset
+        contribution = rba * weights
+        
+        return index, contribution
+    else:
+        return index
+
+def create_dca_index(prices, budget, starting_amount, days=None, months=None, dates=None):
+    '''
+    Creates the DCA index and cashflow log.
+    Contributions are made every x days, every x calendar months, or on an explicit list of dates.
+    '''
+    try:
+        prices.set_index('Date', inplace=True) # In case Date column was not set as index
+        prices.index = pd.to_datetime(prices.index)
+    except:
+        pass
+    
+    prices = prices.resample('D').ffill()
+    contribution_dates = retrieve_contribution_dates(prices.index, days, months, dates)
+    index, cashflow = compute_dca(prices, budget, starting_amount, contribution_dates)
+        
+    # Clean cashflow log
+    cashflow.index.name = "Date"
+    cashflow.index = cashflow.index.strftime("%m/%d/%Y")
+    cashflow['Total'] = cashflow.sum(axis=1)
+    cashflow = cashflow.round(2)
+    cashflow.loc['Total'] = cashflow.sum()
+    
+    return index, cashflow
@@ -0,0 +1,85 @@
+import numpy as np
+
+# Points kept per trace -> roughly one min and one max per pixel column of a full width chart
+max_points = 2000
+
+def _numeric(x):
+    '''
+    Converts x values (datetimes or numbers) to float64 for distance computations.
+    '''
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+def minmax_indices(y, n_out=max_points):
+    '''
+    Indices of the minimum and maximum of y in n_out / 2 equal-count buckets, plus the first and last points.
+    Keeps every peak and trough (e.g. the max drawdown) visible. Missing values are skipped,
+    except for the first one of each gap so that line breaks are preserved.
+    '''
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    valid = ~np.isnan(y)
+    positions = np.flatnonzero(valid)
+    gaps = np.flatnonzero(~valid & np.append(True, valid[:-1]))
+
+    n_buckets = max(1, (n_out - 2) // 2)
+    bucket = (positions * n_buckets) // n
+    order = np.lexsort((y[positions], bucket)) # Sorted by bucket, then value
+    sorted_bucket = bucket[order]
+    starts = np.flatnonzero(np.append(True, sorted_bucket[1:] != sorted_bucket[:-1]))
+    ends = np.append(starts[1:], len(order)) - 1
+
+    keep = np.concatenate([[0, n - 1], positions[order[starts]], positions[order[ends]], gaps])
+    return np.unique(keep)
+
+def lttb_indices(x, y, n_out=max_points):
+    '''
+    Largest-Triangle-Three-Buckets: keeps the point of each bucket forming the largest triangle with the
+    previously kept point and the average of the next bucket. Smoother than min/max, but sequential per bucket.
+    Missing values are dropped.
+    '''
+    x = _numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    positions = np.flatnonzero(~np.isnan(y))
+    n = len(positions)
+    if n <= n_out or n_out < 3:
+        return positions
+
+    x, y = x[positions], y[positions]
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64) # n_out - 2 buckets between the first and last points
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs((x[previous] - avg_x) * (y[lo:hi] - y[previous]) - (x[previous] - x[lo:hi]) * (avg_y - y[previous]))
+        previous = lo + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return positions[keep]
+
+def downsample_indices(x, y, n_out=max_points, method='minmax'):
+    '''
+    Indices of the points to draw for a line trace, using 'minmax' (default) or 'lttb'.
+    '''
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    return minmax_indices(y, n_out)
+
+def window_indices(x, start=None, end=None):
+    '''
+    Positions [lo, hi) of the points of a sorted x inside [start, end], widened by one point on each side
+    so that lines still reach the edges of a zoomed view.
+    '''
+    x = np.asarray(x)
+    lo = 0 if start is None else max(0, int(np.searchsorted(x, start, side='left')) - 1)
+    hi = len(x) if end is None else min(len(x), int(np.searchsorted(x, end, side='right')) + 1)
+    return lo, max(lo, hi)
@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from collections import OrderedDict
+import fintix.priceData as priceData
+
+# Normal distribution constants used by the parametric VaR / CVaR (95% confidence)
+var_confidence = 0.95
+var_z = NormalDist().inv_cdf(1 - var_confidence)
+cvar_factor = NormalDist().pdf(var_z) / (1 - var_confidence)
+table_lookbacks = ['1w', 'mtd', '3m', '6m', 'ytd', '1y', '3y', '5y'] # Point to point returns of the metrics table
+
+def prepare_returns(prices):
+    '''
+    Converts a price panel into a returns matrix, mirroring qs.utils._prepare_returns.
+    Columns that don't look like prices (negative values or max <= 1) are assumed to be returns already.
+    Returns a float64 array of shape (periods, assets).
+    '''
+    values = prices.to_numpy(dtype=np.float64)
+    returns = np.empty_like(values, order='F')
+    if values.shape[0] == 0:
+        return returns
+
+    with np.errstate(all='ignore'):
+        np.divide(values[1:], values[:-1], out=returns[1:])
+        returns[1:] -= 1
+        returns[0] = np.nan
+
+        # Columns that are already returns are kept as is
+        looks_like_prices = (np.fmin.reduce(values, axis=0) >= 0) & (np.fmax.reduce(values, axis=0) > 1)
+        if not looks_like_prices.all():
+            returns[:, ~looks_like_prices] = values[:, ~looks_like_prices]
+
+    returns[np.isinf(returns)] = np.nan
+    return returns
+
+def returns_frame(prices):
+    '''
+    prepare_returns as a DataFrame with the dates and assets of the price panel (qs.utils._prepare_returns).
+    '''
+    return pd.DataFrame(prepare_returns(prices), index=prices.index, columns=prices.columns)
+
+def compute_growth_index(prices, initial_amount=1):
+    '''
+    Value over time of initial_amount invested in each asset, missing returns treated as flat (qs.utils.to_prices).
+    '''
+    returns = np.nan_to_num(prepare_returns(prices), nan=0.0)
+    return pd.DataFrame(initial_amount * np.cumprod(returns + 1, axis=0), index=prices.index, columns=prices.columns)
+
+def compute_drawdown(prices):
+    '''
+    Drawdown of each asset from its running peak, starting from a peak of 1 (qs.stats.to_drawdown_series).
+    '''
+    index = compute_growth_index(prices).to_numpy()
+    with np.errstate(all='ignore'):
+        drawdown = index / np.maximum(np.maximum.accumulate(index, axis=0), 1.0) - 1
+    return pd.DataFrame(drawdown, index=prices.index, columns=prices.columns)
+
+def compute_metrics(prices, periods_per_year, rfr, lookback_dates=None):
+    '''
+    Computes the metrics of every asset in one vectorized pass over the returns matrix.
+    lookback_dates is an optional mapping of column name -> start date used for point to point returns.
+    Returns a DataFrame indexed by asset with one column per metric.
+    '''
+    assets = prices.columns.to_list()
+    dates = prices.index
+    returns = prepare_returns(prices)
+    n_periods = returns.shape[0]
+
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, returns, 0.0)
+
+    with np.errstate(all='ignore'):
+        # Price index rebased to 1 (missing returns treated as flat) -> qs.utils._prepare_prices
+        index = np.cumprod(filled + 1, axis=0)
+        last_level = index[-1] if n_periods else np.full(len(assets), np.nan)
+
+        # Point to point returns for each lookback
+        lookback_returns = OrderedDict()
+        for name, start_date in (lookback_dates or {}).items():
+            pos = dates.searchsorted(pd.Timestamp(start_date), side='left')
+            lookback_returns[name] = last_level / index[pos] - 1 if pos < n_periods else np.repeat(np.nan, len(assets))
+
+        # Compounded and annualized returns
+        total_return = np.where(count > 0, last_level - 1, 0.0)
+        years = count / periods_per_year
+        cagr = np.where(total_return + 1 < 0, np.nan, np.abs(total_return + 1) ** (1 / years) - 1)
+
+        # Wins and losses (missing returns are 0 in `filled` so they never count as either)
+        positive = np.maximum(filled, 0.0)
+        n_wins = np.count_nonzero(positive, axis=0)
+        n_losses = np.count_nonzero(filled, axis=0) - n_wins
+        total = filled.sum(axis=0)
+        gains = positive.sum(axis=0)
+        avg_win = gains / n_wins
+        avg_loss = (total - gains) / n_losses
+        avg_return = total / (n_wins + n_losses)
+        best = np.fmax.reduce(returns, axis=0) if n_periods else np.repeat(np.nan, len(assets))
+        worst = np.fmin.reduce(returns, axis=0) if n_periods else np.repeat(np.nan, len(assets))
+        win_rate = np.where(n_wins + n_losses > 0, n_wins / (n_wins + n_losses), 0.0)
+        payoff = avg_win / np.where(avg_loss == 0, np.nan, np.abs(avg_loss))
+        payoff_safe = np.where(payoff == 0, np.nan, payoff)
+        kelly = (payoff_safe * win_rate - (1 - win_rate)) / payoff_safe
+
+        # Moments (missing returns are 0 in `filled`, so centered at -mean; their share is taken back out)
+        mean = total / count
+        n_missing = n_periods - count
+        centered = filled - mean
+        power = centered * centered
+        m2 = power.sum(axis=0) - n_missing * mean ** 2
+        power *= centered
+        m3 = power.sum(axis=0) + n_missing * mean ** 3
+        power *= centered
+        m4 = power.sum(axis=0) - n_missing * mean ** 4
+        std = np.sqrt(m2 / (count - 1))
+
+        # Bias-corrected skew and excess kurtosis (same estimators as pandas)
+        skew = np.sqrt(count - 1) * count / (count - 2) * m3 / m2 ** 1.5
+        skew = np.where(m2 == 0, 0.0, skew)
+        skew = np.where(count < 3, np.nan, skew)
+        kurtosis = (count * (count + 1) * (count - 1) * m4) / ((count - 2) * (count - 3) * m2 ** 2) \
+                    - 3 * (count - 1) ** 2 / ((count - 2) * (count - 3))
+        kurtosis = np.where(m2 == 0, 0.0, kurtosis)
+        kurtosis = np.where(count < 4, np.nan, kurtosis)
+
+        # Tail ratio from one sort (NaN sorts last, so the first `count` rows are the observations)
+        ordered = np.sort(returns, axis=0)
+        upper = _sorted_quantile(ordered, count, 0.95)
+        lower = _sorted_quantile(ordered, count, 0.05)
+        tail_ratio = np.where(lower == 0, np.nan, np.abs(upper / lower))
+
+        # Risk
+        volatility = std
+        volatility_pa = std * np.sqrt(periods_per_year)
+        drawdown = np.maximum.accumulate(index, axis=0)
+        np.maximum(drawdown, 1.0, out=drawdown)
+        np.divide(index, drawdown, out=drawdown)
+        drawdown -= 1
+        max_drawdown = drawdown.min(axis=0, initial=0.0)
+        value_at_risk = np.where(std > 0, mean + var_z * std, np.nan)
+        cvar = np.where(std > 0, mean - std * cvar_factor, mean)
+
+        # Risk-adjusted ratios on excess returns (rfr de-annualized)
+        period_rfr = (1 + rfr) ** (1 / periods_per_year) - 1 if rfr else 0.0
+        excess = filled - period_rfr
+        np.minimum(excess, 0.0, out=excess)
+        downside = np.einsum('ij,ij->j', excess, excess) - n_missing * min(-period_rfr, 0.0) ** 2
+        excess_mean = mean - period_rfr
+        sharpe = excess_mean / std
+        downside = np.sqrt(downside / count)
+        sortino = excess_mean / np.where(downside == 0, np.nan, downside)
+        calmar = cagr / np.abs(max_drawdown)
+
+    # Dates
+    first_valid = valid.argmax(axis=0)
+    last_valid = n_periods - 1 - valid[::-1].argmax(axis=0)
+    has_data = count > 0
+    start_dates = pd.DatetimeIndex(np.where(has_data, dates.values[first_valid], np.datetime64('NaT')))
+    end_dates = pd.DatetimeIndex(np.where(has_data, dates.values[last_valid], np.datetime64('NaT')))
+    max_drawdown_dates = dates[drawdown.argmin(axis=0)] if n_periods else pd.DatetimeIndex([pd.NaT] * len(assets))
+
+    metrics = OrderedDict(
+        [
+            # Params loaded and info
+            ('Start Date', start_dates),
+            ('End Date', end_dates),
+            ('Data Points', np.repeat(n_periods, len(assets))),
+            ('Periods Per Year', np.repeat(periods_per_year, len(assets))),
+            ('Risk-free Rate', np.repeat(rfr, len(assets))),
+        ]
+        +
+        # Returns
+        list(lookback_returns.items())
+        +
+        [
+            ('Total Return', total_return),
+            ('CAGR', cagr),
+            ('Avg Return', avg_return),
+            ('Avg (+) Return', avg_win),
+            ('Avg (-) Return', avg_loss),
+            ('Best Return', best),
+            ('Worst Return', worst),
+
+            # Stats
+            ('Win Rate', win_rate),
+            ('Loss Rate', 1 - win_rate),
+            ('Payoff Ratio', payoff),
+            ('Tail Ratio 95%', tail_ratio),
+            ('Skew', skew),
+            ('Kurtosis', kurtosis),
+            ('Kelly Criterion', kelly),
+
+            # Risk
+            ('Volatility', volatility),
+            ('Volatility P.A.', volatility_pa),
+            ('Max Drawdown', max_drawdown),
+            ('Max Drawdown Date', max_drawdown_dates),
+            ('VaR 95%', value_at_risk),
+            ('CVaR 95%', cvar),
+
+            # Risk-adjusted Ratios
+            ('Sharpe Ratio', sharpe),
+            ('Sharpe Ratio P.A.', sharpe * np.sqrt(periods_per_year)),
+            ('Sortino Ratio', sortino),
+            ('Sortino Ratio P.A.', sortino * np.sqrt(periods_per_year)),
+            ('Calmar Ratio', calmar),
+        ])
+
+    return pd.DataFrame(metrics, index=pd.Index(assets, name='Asset'))
+
+def compute_metrics_table(prices, periods_per_year, rfr):
+    '''
+    Metrics of the metrics table (one row per asset), with the point to point returns of table_lookbacks.
+    '''
+    lookback_dates = OrderedDict()
+    for lookback in table_lookbacks:
+        lookback_dates[f'{lookback.upper()} Return'], _ = priceData.retrieve_date_from_lookback(prices, lookback)
+    return compute_metrics(prices, periods_per_year, rfr, lookback_dates)
+
+def _sorted_quantile(ordered, count, q):
+    '''
+    Linear-interpolated quantile (pandas default) of each column of an array sorted along axis 0.
+    '''
+    cols = np.arange(ordered.shape[1])
+    position = q * (count - 1)
+    lower = np.clip(np.floor(position).astype(int), 0, None)
+    upper = np.clip(np.ceil(position).astype(int), 0, None)
+    if ordered.shape[0] == 0:
+        return np.repeat(np.nan, ordered.shape[1])
+    lower_value = ordered[np.clip(lower, 0, ordered.shape[0] - 1), cols]
+    upper_value = ordered[np.clip(upper, 0, ordered.shape[0] - 1), cols]
+    result = lower_value + (upper_value - lower_value) * (position - lower)
+    return np.where(count > 0, result, np.nan)
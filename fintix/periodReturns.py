@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import fintix.dataCache as dataCache
+import fintix.returnsIndex as returnsIndex
+
+# Period returns grids, keyed by the dataset's fingerprint -> switching the main asset is a lookup
+period_returns_cache = dataCache.DatasetCache(max_entries=16, max_bytes=64 * 1024 ** 2)
+
+def compute_period_returns(prices):
+    '''
+    Compounds the returns of every asset by calendar month and year in one pass (sums of log1p returns per period).
+    Returns a dict with:
+        'years'   -> sorted years
+        'months'  -> months (1-12) present in the data
+        'monthly' -> array (years x 12 x assets), NaN where the (year, month) has no data
+        'yearly'  -> DataFrame (years x assets)
+    Missing returns count as 0, as in qs.stats.comp.
+    '''
+    index = returnsIndex.ReturnsIndex(prices)
+    monthly = index.period_returns('M')
+    yearly = index.period_returns('Y')
+
+    years = yearly.index.year.to_numpy()
+    grid = np.full((len(years), 12, len(prices.columns)), np.nan)
+    grid[np.searchsorted(years, monthly.index.year), monthly.index.month - 1] = monthly.to_numpy()
+
+    return {'years': years,
+            'months': np.unique(monthly.index.month),
+            'monthly': grid,
+            'yearly': pd.DataFrame(yearly.to_numpy(), index=years, columns=prices.columns)}
+
+def retrieve_period_returns(prices):
+    '''
+    Cached compute_period_returns for a dataset.
+    '''
+    key = dataCache.frame_fingerprint(prices)
+    period_returns = period_returns_cache.get(key)
+    if period_returns is None:
+        period_returns = compute_period_returns(prices)
+        size = period_returns['monthly'].nbytes + period_returns['yearly'].to_numpy().nbytes
+        period_returns_cache.put(key, period_returns, size=size)
+    return period_returns
+
+def monthly_returns_table(prices, asset, months_mapping):
+    '''
+    Month x year returns table of one asset (most recent year first), with the compounded yearly return as 'Total'.
+    '''
+    period_returns = retrieve_period_returns(prices)
+    position = prices.columns.get_loc(asset)
+    months = period_returns['months']
+
+    table = pd.DataFrame(period_returns['monthly'][:, months - 1, position], columns=[months_mapping[m] for m in months])
+    table.insert(0, 'Year', period_returns['years'])
+    table['Total'] = period_returns['yearly'][asset].to_numpy()
+    return table.iloc[::-1].reset_index(drop=True)
@@ -0,0 +1,136 @@
+import datetime
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+# Date lookback periods
+lookback_periods = ['1w', 'mtd', '3m', '6m', 'ytd', '1y', '3y', '5y','max', 'covid crash', '2022 rate hikes']
+
+def retrieve_date_from_lookback(data, lookback):
+
+    start_date = pd.to_datetime(data.index[0])
+    end_date = pd.to_datetime(data.index[-1])
+
+    if lookback == '1w':
+        start_date = end_date - relativedelta(weeks=1)
+    elif lookback == 'mtd':
+        start_date = datetime.datetime(end_date.year, end_date.month, 1)
+    elif lookback == '3m':
+        start_date = end_date - relativedelta(months=3)
+    elif lookback == '6m':
+        start_date = end_date - relativedelta(months=6)
+    elif lookback == 'ytd':
+        start_date = datetime.datetime(end_date.year, 1,1)
+    elif lookback == '1y':
+        start_date = end_date - relativedelta(years=1)
+    elif lookback == '3y':
+        start_date = end_date - relativedelta(years=3)
+    elif lookback == '5y':
+        start_date = end_date - relativedelta(years=5)
+    elif lookback == 'covid crash':
+        start_date = datetime.datetime(2020, 2, 20)
+        end_date = datetime.datetime(2020, 3, 20)
+    elif lookback == '2022 rate hikes':
+        start_date = datetime.datetime(2022,2, 28)
+        end_date = datetime.datetime(2022,12,31)
+    return start_date, end_date
+
+# Months Mapping -> Used in returns table
+months_mapping = {1:'Jan',
+                2:'Feb',
+                3:'Mar',
+                4:'Apr',
+                5: 'May',
+                6: 'Jun',
+                7: 'Jul',
+                8: 'Aug',
+                9: 'Sep',
+                10: 'Oct',
+                11:'Nov',
+                12:'Dec'}
+
+def set_date_index(data):
+    '''
+    Sets the 'Date' column as a datetime index.
+    '''
+    try:
+        data.set_index('Date', inplace=True)
+    except:
+        data.index.name = 'Date' # Assumes that df has date as index
+
+    try:
+        data.index = pd.to_datetime(data.index)
+    except:
+        print('Could not change index to datetime')
+        return
+    return data
+
+def infer_frequency(index):
+    '''
+    Infers the frequency of a date index ('B', 'D', 'W', 'M', 'Q', 'Y'), tolerating holidays and missing dates.
+    '''
+    if len(index) < 3:
+        return None
+    try:
+        freq = pd.infer_freq(index)
+        if freq is not None:
+            return freq
+    except (TypeError, ValueError):
+        pass
+
+    gap = pd.Series(index).diff().dt.days.median()
+    if gap <= 1:
+        return 'D' if (index.dayofweek >= 5).any() else 'B'
+    for freq, days in [('B', 3), ('W', 8), ('M', 31), ('Q', 92)]:
+        if gap <= days:
+            return freq
+    return 'Y'
+
+def create_metadata(data):
+    '''
+    Compact description of an uploaded dataset, stored next to it so that lightweight callbacks
+    (date pickers, dropdowns) never have to load the data itself.
+    '''
+    index = data.index
+    valid = data.notna().to_numpy()
+    has_data = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    last = len(index) - 1 - valid[::-1].argmax(axis=0)
+    dates = [d.isoformat() for d in index[[0, -1]]] if len(index) else [None, None]
+
+    return {'start_date': dates[0],
+            'end_date': dates[1],
+            'columns': [str(col) for col in data.columns],
+            'rows': len(index),
+            'first_valid': {str(col): index[i].isoformat() if ok else None for col, i, ok in zip(data.columns, first, has_data)},
+            'last_valid': {str(col): index[i].isoformat() if ok else None for col, i, ok in zip(data.columns, last, has_data)},
+            'frequency': infer_frequency(index)}
+
+def metadata_date_range(metadata, assets):
+    '''
+    Date range over which all given assets have data (as data[assets].dropna() would give for gap-free prices).
+    '''
+    firsts = [metadata['first_valid'].get(a) for a in assets]
+    lasts = [metadata['last_valid'].get(a) for a in assets]
+    if not assets or None in firsts or None in lasts:
+        return None, None
+    return pd.Timestamp(max(firsts)), pd.Timestamp(min(lasts))
+
+def filter_data(data, start_date, end_date, assets):
+    '''
+    Filters a dataFrame for a given start/end date as well as assets.
+    '''
+    try:
+        filtered_data = data.loc[start_date:end_date][assets]
+        print("Successfully filtered for start date, end date, and assets.")
+    except:
+        try:
+            filtered_data = data.loc[start_date:end_date]
+            print("Filtered only for start date and end date.")
+        except:
+            try:
+                filtered_data = data[assets]
+                print("Filtered only for assets.")
+            except:
+                print("Couldn't filter for neither dates nor assets.")
+                return data
+    return filtered_data
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import fintix.metricsEngine as metricsEngine
+
+class ReturnsIndex:
+    '''
+    Cumulative log returns, sums and sums of squares of a price panel over a sorted date index.
+    Built once per dataset; the return, volatility and Sharpe ratio of any date window for all assets is then
+    a searchsorted + gather instead of a slice and recompute.
+    Window semantics follow prices.loc[start:end]: the first row on/after start is the base, the last row on/before end is the end.
+    '''
+    def __init__(self, prices):
+        self.columns = prices.columns
+        self.dates = pd.DatetimeIndex(prices.index)
+        returns = metricsEngine.prepare_returns(prices)
+        valid = ~np.isnan(returns)
+        filled = np.where(valid, returns, 0.0)
+
+        # Prefix sums with a leading row of zeros -> sum over rows (i, j] is cum[j + 1] - cum[i + 1]
+        with np.errstate(all='ignore'):
+            self.shift = np.where(valid.any(axis=0), filled.sum(axis=0) / valid.sum(axis=0), 0.0)
+            centered = np.where(valid, returns - self.shift, 0.0)
+            self.cum_log = self._prefix(np.log1p(filled))
+            self.cum_sum = self._prefix(centered)
+            self.cum_sq = self._prefix(centered * centered)
+            self.cum_count = self._prefix(valid.astype(np.float64))
+
+    @staticmethod
+    def _prefix(values):
+        prefix = np.zeros((values.shape[0] + 1, values.shape[1]))
+        np.cumsum(values, axis=0, out=prefix[1:])
+        return prefix
+
+    def positions(self, starts, ends):
+        '''
+        Row positions (first, last) of each window, -1 where the window is empty.
+        '''
+        first = self.dates.searchsorted(pd.DatetimeIndex(pd.to_datetime(starts)), side='left')
+        last = self.dates.searchsorted(pd.DatetimeIndex(pd.to_datetime(ends)), side='right') - 1
+        empty = last < first
+        return np.where(empty, -1, first), np.where(empty, -1, last)
+
+    def window_returns(self, starts, ends):
+        '''
+        Compounded return of every asset over each (start, end) window -> array (windows x assets).
+        '''
+        first, last = self.positions(starts, ends)
+        returns = np.expm1(self.cum_log[last + 1] - self.cum_log[first + 1])
+        returns[first < 0] = np.nan
+        return returns
+
+    def window_stats(self, starts, ends, rfr=0.0, periods_per_year=252):
+        '''
+        Compounded return, annualized volatility and annualized Sharpe ratio of every asset over each window.
+        Statistics use the returns inside the window, i.e. excluding the base row (as qs does on a sliced price panel).
+        Returns a dict of arrays (windows x assets) plus the window row positions.
+        '''
+        first, last = self.positions(starts, ends)
+        lo, hi = first + 1, last + 1
+        with np.errstate(all='ignore'):
+            count = self.cum_count[hi] - self.cum_count[lo]
+            total = self.cum_sum[hi] - self.cum_sum[lo]
+            squares = self.cum_sq[hi] - self.cum_sq[lo]
+            mean = total / count + self.shift
+            std = np.sqrt(np.maximum(squares - total * total / count, 0.0) / (count - 1))
+            period_rfr = (1 + rfr) ** (1 / periods_per_year) - 1 if rfr else 0.0
+
+            stats = {'Return': np.expm1(self.cum_log[hi] - self.cum_log[lo]),
+                     'Volatility': std * np.sqrt(periods_per_year),
+                     'Sharpe': (mean - period_rfr) / std * np.sqrt(periods_per_year)}
+
+        for values in stats.values():
+            values[first < 0] = np.nan
+        stats['first'] = first
+        stats['last'] = last
+        return stats
+
+    def period_returns(self, freq='M'):
+        '''
+        Compounded return of every asset for each calendar period (e.g. 'M' months, 'Y' years) -> DataFrame.
+        Same as grouping the returns by period and compounding them (qs.utils.aggregate_returns).
+        '''
+        periods = self.dates.to_period(freq)
+        ends = np.flatnonzero(np.append(periods[1:] != periods[:-1], True))
+        starts = np.append(0, ends[:-1] + 1)
+        returns = np.expm1(self.cum_log[ends + 1] - self.cum_log[starts])
+        return pd.DataFrame(returns, index=periods[ends], columns=self.columns)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import fintix.metricsEngine as metricsEngine
+
+rolling_metrics = ['Alpha', 'Beta', 'Sharpe', 'Sortino', 'Volatility', 'Correlation']
+
+def _window_sum(values, window):
+    '''
+    Trailing window sums along axis 0 from a cumulative sum, NaN for the first window - 1 rows.
+    '''
+    cumsum = np.cumsum(values, axis=0)
+    sums = np.full_like(cumsum, np.nan)
+    if len(values) >= window:
+        sums[window - 1] = cumsum[window - 1]
+        sums[window:] = cumsum[window:] - cumsum[:-window]
+    return sums
+
+def compute_rolling_metrics(prices, benchmark_asset, rolling_periods, rfr, periods_per_year):
+    '''
+    Computes rolling alpha, beta, Sharpe, Sortino, volatility and correlation of every asset against the benchmark.
+    All windows come from cumulative sums (and sums of squares / cross products), so each metric is O(n) per asset.
+    Returns a dict of metric -> DataFrame (dates x assets), matching the quantstats rolling functions.
+    '''
+    window = int(rolling_periods)
+    returns = metricsEngine.prepare_returns(prices)
+    valid = ~np.isnan(returns)
+    n_valid = _window_sum(valid.astype(np.float64), window)
+    full = n_valid == window # Windows without missing returns (min_periods = window)
+
+    # Center on each column's mean before accumulating: window (co)variances are unchanged but the
+    # cumulative sums stay small, which keeps the sum-of-squares formulas accurate.
+    with np.errstate(all='ignore'):
+        filled = np.where(valid, returns, 0.0)
+        shift = np.where(valid.any(axis=0), np.nanmean(np.where(valid, returns, np.nan), axis=0), 0.0)
+        x = filled - shift
+        x[~valid] = 0.0
+
+        s1 = _window_sum(x, window)
+        s2 = _window_sum(x * x, window)
+        mean = s1 / window + shift
+        var = np.maximum(s2 - s1 * s1 / window, 0.0) / (window - 1)
+        std = np.sqrt(var)
+
+        # Volatility, Sharpe and Sortino on windows without missing returns
+        volatility = np.where(full, std * np.sqrt(periods_per_year), np.nan)
+        period_rfr = (1 + rfr) ** (1 / periods_per_year) - 1 if rfr else 0.0
+        sharpe = np.where(full, (mean - period_rfr) / std * np.sqrt(periods_per_year), np.nan)
+        downside = _window_sum(np.minimum(filled - period_rfr, 0.0) ** 2 * valid, window) / window
+        sortino = np.where(full, (mean - period_rfr) / np.sqrt(downside) * np.sqrt(periods_per_year), np.nan)
+
+        # Greeks use returns with missing values as 0 (as qs.stats.rolling_greeks does)
+        bench_col = prices.columns.get_loc(benchmark_asset)
+        g = filled - filled.mean(axis=0)
+        g1 = _window_sum(g, window)
+        bench = g[:, [bench_col]]
+        b1 = g1[:, [bench_col]]
+        b2 = _window_sum(bench * bench, window)
+        cross = _window_sum(g * bench, window)
+        cov = (cross - g1 * b1 / window) / (window - 1)
+        var_b = np.maximum(b2 - b1 * b1 / window, 0.0) / (window - 1)
+        # Windows where an asset or the benchmark has no move (e.g. before its inception) have no greeks, as the
+        # correlation qs.stats.rolling_greeks derives them from is undefined there
+        flat = _window_sum((filled != 0).astype(np.float64), window) == 0
+        flat_b = flat[:, [bench_col]]
+        beta = cov / np.where((var_b == 0) | flat_b, np.nan, var_b)
+        beta[flat] = np.nan
+        mean_g = g1 / window + filled.mean(axis=0)
+        alpha = mean_g - beta * mean_g[:, [bench_col]]
+
+        # Correlation on pairwise complete windows
+        both_full = full & full[:, [bench_col]]
+        pair_cov = (_window_sum(x * x[:, [bench_col]], window) - s1 * s1[:, [bench_col]] / window) / (window - 1)
+        correlation = np.where(both_full, pair_cov / np.sqrt(var * var[:, [bench_col]]), np.nan)
+
+    frame = lambda values: pd.DataFrame(values, index=prices.index, columns=prices.columns)
+    return {'Alpha': frame(alpha * window),
+            'Beta': frame(beta),
+            'Sharpe': frame(sharpe),
+            'Sortino': frame(sortino),
+            'Volatility': frame(volatility),
+            'Correlation': frame(correlation)}
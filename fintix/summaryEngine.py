@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import fintix.priceData as priceData
+import fintix.returnsIndex as returnsIndex
+
+summary_metrics = ['Return', 'Volatility', 'Sharpe']
+
+def retrieve_lookback_windows(prices, lookbacks):
+    '''
+    Resolves lookbacks to (start, end) windows.
+    A lookback is either a name understood by priceData.retrieve_date_from_lookback (e.g. '1y', 'ytd')
+    or a user-defined (name, start date, end date) tuple.
+    '''
+    names, starts, ends = [], [], []
+    for lookback in lookbacks:
+        if isinstance(lookback, str):
+            start_date, end_date = priceData.retrieve_date_from_lookback(prices, lookback)
+        else:
+            lookback, start_date, end_date = lookback
+        names.append(lookback)
+        starts.append(pd.Timestamp(start_date))
+        ends.append(pd.Timestamp(end_date))
+    return names, starts, ends
+
+def compute_summary(prices, lookbacks=priceData.lookback_periods, rfr=0.02, periods_per_year=252, returns_index=None):
+    '''
+    Computes the (lookback x asset x metric) cube of total return, volatility (%) and Sharpe ratio in one call.
+    Returns a DataFrame indexed by lookback with the window dates and a (metric, asset) column per value;
+    lookbacks without data in the window have no dates and NaN values.
+    '''
+    if returns_index is None:
+        returns_index = returnsIndex.ReturnsIndex(prices)
+
+    names, starts, ends = retrieve_lookback_windows(prices, lookbacks)
+    stats = returns_index.window_stats(starts, ends, rfr, periods_per_year)
+    first, last = stats['first'], stats['last']
+
+    # Same rounding as the summary cards display
+    cube = {'Return': stats['Return'],
+            'Volatility': np.round(stats['Volatility'] * 100, 2),
+            'Sharpe': np.round(stats['Sharpe'], 2)}
+    columns = pd.MultiIndex.from_product([summary_metrics, returns_index.columns])
+    summary = pd.DataFrame(np.concatenate([cube[m] for m in summary_metrics], axis=1),
+                           index=pd.Index(names, name='Lookback'), columns=columns)
+
+    empty = first < 0
+    summary.insert(0, ('End Date', ''), returns_index.dates[np.maximum(last, 0)].where(~empty))
+    summary.insert(0, ('Start Date', ''), returns_index.dates[np.maximum(first, 0)].where(~empty))
+    return summary
+
+def summary_leaders(summary):
+    '''
+    Best asset per lookback for each metric (highest return, lowest volatility, highest Sharpe).
+    Lookbacks where any metric has no value are dropped.
+    '''
+    leaders = {}
+    for metric, best in [('Return', 'idxmax'), ('Volatility', 'idxmin'), ('Sharpe', 'idxmax')]:
+        values = summary[metric]
+        leaders[metric] = getattr(values[values.notna().any(axis=1)], best)(axis=1)
+    return pd.DataFrame(leaders).dropna()
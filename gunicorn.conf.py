@@ -0,0 +1,11 @@
+import multiprocessing
+import os
+
+# gunicorn wsgi:server
+bind = os.environ.get('FINTIX_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('FINTIX_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('FINTIX_THREADS', 4)) # Tab precomputes and overview refreshes run on background threads
+preload_app = True # Load the app and its data before forking the workers
+timeout = 120 # Large uploads / first computations of big datasets
+max_requests = 1000 # Recycle workers to bound memory growth
+max_requests_jitter = 100
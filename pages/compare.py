@@ -1,19 +1,28 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc, Input, Output, State, callback
 import dash
-import plotly.graph_objs as go
+from dash.exceptions import PreventUpdate
 import pandas as pd
 from datetime import timedelta
 import datetime
 import scripts.style as style
 import scripts.utils as utils
+import fintix.priceData as priceData
 import scripts.metricsTable as metricsTable
 import scripts.returnsModule as returnsModule
 import scripts.benchmarkModule as benchmarkModule
 import scripts.rollingModule as rollingModule
-import yfinance as yf
-import quantstats as qs
+import fintix.summaryEngine as summaryEngine
+import fintix.metricsEngine as metricsEngine
+import scripts.resampledGraph as resampledGraph
+import scripts.figures as figures
+import scripts.resultCache as resultCache
+import scripts.precompute as precompute
+import scripts.backgroundJobs as backgroundJobs
+import fintix.dataCache as dataCache
+import scripts.tickerUniverse as tickUn
 import sys
+import uuid
 
 path = sys.path[0]
 
@@ -54,15 +63,21 @@ upload_file = dbc.Row([
                     
     ], className=style.dbc_row_style)
 
-layout = dbc.Container([
-    header,
-    upload_file,
-    dbc.Spinner(children=[html.Div(id='body')], 
-                                size="lg", 
-                                color="primary", 
-                                type="border", 
-                                fullscreen=False),
-], fluid=True)
+def layout(**kwargs):
+    '''
+    Built on each page load -> every browser tab gets its own session id, which groups its precomputed tabs.
+    '''
+    return dbc.Container([
+        header,
+        upload_file,
+        dcc.Store(id='session-id', data=uuid.uuid4().hex),
+        html.P(id='body-progress', className='text-center text-warning', style={'display': 'none'}),
+        dbc.Spinner(children=[html.Div(id='body')], 
+                                    size="lg", 
+                                    color="primary", 
+                                    type="border", 
+                                    fullscreen=False),
+    ], fluid=True)
 
 def create_params(initial_amount=utils.initial_amount, rfr=utils.rfr, periods_per_year=utils.periods_per_year, rolling_periods=utils.rolling_periods):
 
@@ -197,7 +212,7 @@ def create_params(initial_amount=utils.initial_amount, rfr=utils.rfr, periods_pe
                                                 html.P(children='Lookback Period', className=style.params_p_style ),
 
                                                 dcc.Dropdown(id='lookback-dpdn',
-                                                            options=[{'label':i, 'value':i} for i in utils.lookback_periods],
+                                                            options=[{'label':i, 'value':i} for i in priceData.lookback_periods],
                                                             value='max'),
 
                                                 html.P(id='date-validation-p', className='text-danger mt-2')
@@ -225,17 +240,19 @@ def create_params(initial_amount=utils.initial_amount, rfr=utils.rfr, periods_pe
 
     return display
 
+tab_labels = {'tlda': 'TL;DA', 'compare': 'Compare', 'returns': 'Returns', 'benchmark': 'Benchmark', 'rolling': 'Rolling'}
+
 def display_tabs():
     display = dbc.Row([
         
                     dcc.Tabs(id='menu-tabs',
                             value='compare',
                             children=[
-                                dcc.Tab(label='TL;DA', value='tlda', style=style.tab_style, selected_style=style.tab_selected_style),
-                                dcc.Tab(label='Compare', value='compare', style=style.tab_style, selected_style=style.tab_selected_style),
-                                dcc.Tab(label='Returns', value='returns', style=style.tab_style, selected_style=style.tab_selected_style),
-                                dcc.Tab(id='benchmark-tab', label='Benchmark', value='benchmark', style=style.tab_style, selected_style=style.tab_selected_style),
-                                dcc.Tab(id='rolling-tab', label='Rolling', value='rolling', style=style.tab_style, selected_style=style.tab_selected_style),
+                                dcc.Tab(label=tab_labels['tlda'], value='tlda', style=style.tab_style, selected_style=style.tab_selected_style),
+                                dcc.Tab(label=tab_labels['compare'], value='compare', style=style.tab_style, selected_style=style.tab_selected_style),
+                                dcc.Tab(label=tab_labels['returns'], value='returns', style=style.tab_style, selected_style=style.tab_selected_style),
+                                dcc.Tab(id='benchmark-tab', label=tab_labels['benchmark'], value='benchmark', style=style.tab_style, selected_style=style.tab_selected_style),
+                                dcc.Tab(id='rolling-tab', label=tab_labels['rolling'], value='rolling', style=style.tab_style, selected_style=style.tab_selected_style),
 
                         ]), dbc.Tooltip(
                             "Adjust main and benchmark params to your liking. ",
@@ -251,24 +268,17 @@ def display_tabs():
                     ])
     return display
 
-def retrieve_summary_text(prices, lookback, rfr=utils.rfr, periods_per_year=utils.periods_per_year):
+def retrieve_summary_text(lookback, summary):
     '''
     Retrieves summary text containing a brief summary of top / worst performances for a given lookback period.
     '''
     try:
-        start_date, end_date = utils.retrieve_date_from_lookback(prices, lookback)
-        prices = prices.loc[start_date:end_date]
-        returns = qs.utils._prepare_returns(prices)
-
-        start_date = str(prices.index[0])[:10]
-        end_date = str(prices.index[-1])[:10]
-        comp = qs.stats.comp(returns)
+        start_date = str(summary.loc[lookback, ('Start Date', '')])[:10]
+        end_date = str(summary.loc[lookback, ('End Date', '')])[:10]
+        comp, volatility, sharpe_ratio = [summary[metric].loc[lookback] for metric in ['Return', 'Volatility', 'Sharpe']]
         max_return = round(comp.max() * 100 , 2)
         min_return = round(comp.min() * 100 , 2)
 
-        sharpe_ratio = round(qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=True),2)
-        volatility = round(qs.stats.volatility(returns, periods=periods_per_year, annualize=True)*100, 2)
-
         display = html.Div(
                             children=
                                     dcc.Markdown(
@@ -301,50 +311,28 @@ def retrieve_summary_text(prices, lookback, rfr=utils.rfr, periods_per_year=util
                                 )
     return display
 
-def retrieve_summary_score(prices, lookback, rfr=utils.rfr, periods_per_year=utils.periods_per_year):
+@resultCache.memoize
+def retrieve_all_summary_texts(prices, rfr=utils.rfr, periods_per_year=utils.periods_per_year, lookbacks=priceData.lookback_periods):
     '''
-    Scores assets based on metrics for different lookbacks.
+    Retrieves all summary texts and the summary score for a list of lookbacks.
+    Lookbacks are lookback names or user-defined (name, start date, end date) tuples.
     '''
-    try:
-        start_date, end_date = utils.retrieve_date_from_lookback(prices, lookback)
-        prices = prices.loc[start_date:end_date]
-        returns = qs.utils._prepare_returns(prices)
-
-        start_date = str(prices.index[0])[:10]
-        end_date = str(prices.index[-1])[:10]
-        comp = qs.stats.comp(returns)
-        sharpe_ratio = round(qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=True),2)
-        volatility = round(qs.stats.volatility(returns, periods=periods_per_year, annualize=True)*100, 2)
-
-        summary_dict = {
-                        'Performance': [comp.idxmax()], 
-                        'Volatility': [volatility.idxmin()],
-                        'Sharpe': [sharpe_ratio.idxmax()]
-            }
-        summary_dict = pd.DataFrame(summary_dict, columns=list(summary_dict.keys()))
-        return summary_dict
-    except:
-        pass
+    # One pass over the prices for every lookback, shared by the texts and the score chart
+    summary = summaryEngine.compute_summary(prices, lookbacks, rfr, periods_per_year)
+    all_texts = [retrieve_summary_text(lookback, summary) for lookback in summary.index]
 
-def retrieve_all_summary_texts(prices, rfr=utils.rfr, periods_per_year=utils.periods_per_year):
-    '''
-    Retrieves all summary texts for a list of lookbacks.
-    '''
-    all_texts = [retrieve_summary_text(prices, lookback, rfr, periods_per_year) for lookback in utils.lookback_periods]
-    summary_scores = [retrieve_summary_score(prices, lookback, rfr, periods_per_year) for lookback in utils.lookback_periods]
-
-    # Clean summary scores
-    summary_scores = pd.concat(summary_scores)
+    # Summary scores -> best asset per lookback and metric
+    summary_scores = summaryEngine.summary_leaders(summary).rename(columns={'Return': 'Performance'})
 
-    traces = [go.Bar(x=summary_scores[i].value_counts().index, 
+    traces = [figures.bar(x=summary_scores[i].value_counts().index, 
                         y=summary_scores[i].value_counts(), 
                         name=i, 
                         text = summary_scores[i].value_counts()) 
                             for i in ['Performance','Volatility','Sharpe']]
 
-    layout = go.Layout(style.scatter_charts_layout(title=f"Summary Score", ))
-    figure = go.Figure(traces, layout)
-    figure.update_yaxes(showticklabels=False)
+    layout = figures.layout(title=f"Summary Score", dates=False)
+    layout['yaxis']['showticklabels'] = False
+    figure = figures.figure(traces, layout)
 
     display = dbc.Row([
         
@@ -358,33 +346,31 @@ def retrieve_all_summary_texts(prices, rfr=utils.rfr, periods_per_year=utils.per
 
                 ]),
 
-                dcc.Graph(figure=figure)
+                figures.graph(figure)
 
                 ],className=style.dbc_row_style)
     return display
 
+@resultCache.memoize
 def display_compare(prices, initial_amount=utils.initial_amount, rfr=utils.rfr, periods_per_year=utils.periods_per_year):
     '''
     Creates the display of compare module that includes index performance, drawdown, and metrics table.
     '''
     # Setup data
     assets = prices.columns.to_list()
-    returns = qs.utils._prepare_returns(prices)
     # Create index evolution
-    index = qs.utils.to_prices(returns, initial_amount)
-    drawdown = qs.stats.to_drawdown_series(returns)
+    index = metricsEngine.compute_growth_index(prices, initial_amount)
+    drawdown = metricsEngine.compute_drawdown(prices)
 
     # Index evolution
-    index_traces = [go.Scatter(x=index.index, y=index[a], mode='lines', name=a) for a in assets]
-    index_layout = style.scatter_charts_layout(title=f'Performance of {style.accounting_format(initial_amount)}')
-    index_fig = go.Figure(index_traces, index_layout)
-    index_fig = style.add_range_slider(index_fig)
+    index_traces = [figures.scatter(x=index.index, y=index[a], mode='lines', name=a) for a in assets]
+    index_layout = figures.layout(title=f'Performance of {style.accounting_format(initial_amount)}', range_slider=True)
+    index_fig = figures.figure(index_traces, index_layout)
 
     # Drawdown
-    drawdown_traces = [go.Scatter(x=drawdown.index, y=drawdown[a], mode='lines', name=a) for a in assets]
-    drawdown_layout = style.scatter_charts_layout(title='Drawdown', ytickformat=',.1%')
-    drawdown_fig = go.Figure(drawdown_traces, drawdown_layout)
-    drawdown_fig = style.add_range_slider(drawdown_fig)
+    drawdown_traces = [figures.scatter(x=drawdown.index, y=drawdown[a], mode='lines', name=a) for a in assets]
+    drawdown_layout = figures.layout(title='Drawdown', ytickformat=',.1%', range_slider=True)
+    drawdown_fig = figures.figure(drawdown_traces, drawdown_layout)
 
     display = dbc.Row([
 
@@ -394,17 +380,18 @@ def display_compare(prices, initial_amount=utils.initial_amount, rfr=utils.rfr,
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                     dbc.Col([
-                        dcc.Graph(figure=index_fig)
+                        resampledGraph.create_graph(index_fig)
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                     dbc.Col([
-                        dcc.Graph(figure=drawdown_fig)
+                        resampledGraph.create_graph(drawdown_fig)
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
     ], className=style.dbc_row_style)
 
     return display
 
+@resultCache.memoize
 def display_returns(prices, main_asset, round_to=2):
     '''
     Creates the display of returns module that includes monthly, eoy, and time series of returns.
@@ -417,21 +404,22 @@ def display_returns(prices, main_asset, round_to=2):
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                     dbc.Col([
-                        dcc.Graph(figure=returnsModule.create_eoyReturns_bar(prices))
+                        figures.graph(returnsModule.create_eoyReturns_bar(prices))
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                     dbc.Col([
-                        dcc.Graph(figure=returnsModule.create_daily_returns_plot(prices, main_asset))
+                        resampledGraph.create_graph(returnsModule.create_daily_returns_plot(prices, main_asset))
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                     dbc.Col([
-                        dcc.Graph(figure=returnsModule.create_returns_box_plot(prices))
+                        figures.graph(returnsModule.create_returns_box_plot(prices))
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style)
 
             ], className=style.dbc_row_style)
 
     return display
 
+@resultCache.memoize
 def display_benchmark(prices, main_asset, benchmark_asset, periods_per_year=utils.periods_per_year, rfr=utils.rfr):
     '''
     Creates the display of benchmark module that includes statistics table, scatter plot, correlation heatmap, and returns dist plot.
@@ -446,50 +434,33 @@ def display_benchmark(prices, main_asset, benchmark_asset, periods_per_year=util
                     ],xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                 dbc.Col([
-                    dcc.Graph(figure=benchmarkModule.create_scatter_plot(prices, main_asset, benchmark_asset))
+                    figures.graph(benchmarkModule.create_scatter_plot(prices, main_asset, benchmark_asset))
                 ], xs=12, sm=12, md=12, lg=12, xl=12, className=style.dbc_col_style),
 
                 dbc.Col([
-                    dcc.Graph(figure=benchmarkModule.create_distribution_plot(prices, main_asset, benchmark_asset))
+                    figures.graph(benchmarkModule.create_distribution_plot(prices, main_asset, benchmark_asset))
                 ], xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
 
                 dbc.Col([
-                    dcc.Graph(figure=benchmarkModule.create_correlation_heatmap(prices))
+                    figures.graph(benchmarkModule.create_correlation_heatmap(prices))
                 ], xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style)
 
             ], className=style.dbc_row_style)
 
     return display
 
+@resultCache.memoize
 def display_rolling(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year):
     '''
     Creates the display of the rolling charts module.
     '''
-    display = dbc.Row([
-
-                    dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Alpha"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
-
-                    dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Beta"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
-
-                    dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Sharpe"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
-
-                    dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Sortino"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
+    rolling_figures = rollingModule.create_all_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year)
 
-                    dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Volatility"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style),
+    display = dbc.Row([
 
                     dbc.Col([
-                        dcc.Graph(figure=rollingModule.create_rolling_metrics(prices, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, "Correlation"))
-                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style)
+                        resampledGraph.create_graph(figure)
+                    ],xs=12, sm=12, md=12, lg=6, xl=6, className=style.dbc_col_style) for figure in rolling_figures
                     
         ], className=style.dbc_row_style)
 
@@ -516,6 +487,16 @@ def toggle_modal(n1, n2, is_open):
         return not is_open
     return is_open
 
+# Search the ticker universe (loaded on the first search)
+@callback(Output('yf-asset-dpdn', 'options'),
+                Input('yf-asset-dpdn', 'search_value'),
+                State('yf-asset-dpdn', 'value'),
+                prevent_initial_call=True)
+def search_tickers(search_value, selected):
+    if not search_value:
+        raise PreventUpdate
+    return tickUn.search_ticker_labels(search_value, selected)
+
 # Download Yahoo data
 @callback(Output("yf-download-csv", "data"),
                 [Input("yf-download-btn", "n_clicks")],
@@ -524,6 +505,7 @@ def toggle_modal(n1, n2, is_open):
                 prevent_initial_call=True)
 def download_yahoo_data(n_clicks, assets, period):
     if n_clicks >=1:
+        import yfinance as yf # Imported on first use (see app.deferred_modules)
         df = yf.download(assets, period=period)['Adj Close']
         if isinstance(df, pd.Series):
             df = pd.DataFrame(df)
@@ -565,16 +547,17 @@ def display_params(n_clicks):
             Output('start-date','disabled'),
             Output('end-date','disabled'),
             Output('date-validation-p', 'children'),
-            [Input('stored-data','data'),
+            [Input('stored-metadata','data'),
             Input('lookback-dpdn', 'value'),
             Input('assets-dpdn','value')
             ])
-def update_date_picker(data, lookback, assets):
-    data = utils.json_to_df(data)
-    data = data[assets].dropna()
-    min_date = data.index[0]
-    max_date = data.index[-1]
-    start_date, end_date = utils.retrieve_date_from_lookback(data, lookback)
+def update_date_picker(metadata, lookback, assets):
+    if not metadata: # Upload without parseable dates
+        raise PreventUpdate
+    min_date, max_date = priceData.metadata_date_range(metadata, list(assets or []))
+    if min_date is None:
+        raise PreventUpdate
+    start_date, end_date = priceData.retrieve_date_from_lookback(pd.DataFrame(index=pd.DatetimeIndex([min_date, max_date])), lookback)
 
     disable_start_date = True
     disable_end_date = True
@@ -593,11 +576,13 @@ def update_date_picker(data, lookback, assets):
 # Update assets filter dropdown
 @callback(Output('assets-dpdn','options'),
             Output('assets-dpdn','value'),
-            [Input('stored-data','data')])
-def update_filter_dropdown(data):
-    data = utils.json_to_df(data)
-    options = [{'label':i, 'value':i} for i in data.columns]
-    return options, data.columns
+            [Input('stored-metadata','data')])
+def update_filter_dropdown(metadata):
+    if not metadata:
+        raise PreventUpdate
+    columns = metadata['columns']
+    options = [{'label':i, 'value':i} for i in columns]
+    return options, columns
 
 # Update main asset and benchmark dropdowns based on filtered asset
 @callback(Output('main-asset','options'),
@@ -619,7 +604,8 @@ def update_main_bench_dropdowns(filtered_assets):
     return options, options, main_asset, benchmark_asset
 
 # Update body
-@callback(Output('body','children'),
+# Runs as a background job -> progress is shown above the spinner, a newer request cancels the running one
+@backgroundJobs.callback(Output('body','children'),
             [Input('apply-changes-btn', 'n_clicks'),
             Input('stored-data','data'),
             Input('menu-tabs','value')],
@@ -632,23 +618,63 @@ def update_main_bench_dropdowns(filtered_assets):
             State('rolling-periods','value'),
             State('main-asset','value'),
             State('benchmark-asset','value'),
-            ])
-def display_body(n_clicks, data, menu, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset):
+            ],
+            progress=Output('body-progress', 'children'),
+            running=[(Output('body-progress', 'style'), {'display': 'block'}, {'display': 'none'})])
+def display_body(set_progress, n_clicks, data, menu, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset):
+    set_progress('Loading data...')
     data = utils.json_to_df(data)
-    
-    if n_clicks >= 1:
-        filtered_data = utils.filter_data(data, start_date, end_date, assets)
-        filtered_data = filtered_data.dropna()
-
-    if menu == 'tlda':
-        return retrieve_all_summary_texts(data[assets].dropna(), rfr, periods_per_year)
-    elif menu == 'compare':
-        return display_compare(filtered_data, initial_amount, rfr, periods_per_year)
-    elif menu == 'returns':
-        return display_returns(filtered_data, main_asset)
-    elif menu == 'benchmark':
-        return display_benchmark(filtered_data, main_asset, benchmark_asset, periods_per_year, rfr)
-    elif menu == 'rolling':
-        return display_rolling(filtered_data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year)
-
+    if data is None: # Upload without parseable dates
+        raise PreventUpdate
+    tasks = retrieve_tab_tasks(data, n_clicks, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset)
+    if menu not in tasks:
+        raise PreventUpdate
+
+    set_progress(f'Computing {tab_labels[menu]}...')
+    func, args = tasks[menu]
+    return func(*args)
+
+# New data or parameters -> compute the other tabs in the background of this server process (cancels the ones still
+# queued for the previous data or parameters of the same browser tab). Results are shared with the background jobs
+# through the result cache.
+@callback([Input('apply-changes-btn', 'n_clicks'),
+            Input('stored-data','data')],
+            [State('menu-tabs','value'),
+            State('assets-dpdn', 'value'),
+            State('start-date','date'),
+            State('end-date','date'),
+            State('initial-amount','value'),
+            State('rfr','value'),
+            State('periods-per-year','value'),
+            State('rolling-periods','value'),
+            State('main-asset','value'),
+            State('benchmark-asset','value'),
+            State('session-id','data'),
+            ],
+            prevent_initial_call=True)
+def precompute_tabs(n_clicks, data, menu, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset, session_id):
+    if not n_clicks or data is None:
+        raise PreventUpdate
+    data = utils.json_to_df(data)
+    if data is None:
+        raise PreventUpdate
+    tasks = retrieve_tab_tasks(data, n_clicks, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset)
+    precompute.schedule(session_id or dataCache.frame_fingerprint(data), [task for tab, task in tasks.items() if tab != menu])
 
+def retrieve_tab_tasks(data, n_clicks, assets, start_date, end_date, initial_amount, rfr, periods_per_year, rolling_periods, main_asset, benchmark_asset):
+    '''
+    Returns menu tab -> (display function, arguments) for the current filters and parameters.
+    Until the changes are applied, only the TL;DA tab is available.
+    '''
+    if n_clicks < 1:
+        return {'tlda': (retrieve_all_summary_texts, (data[assets].dropna(), rfr, periods_per_year))}
+
+    filtered_data = priceData.filter_data(data, start_date, end_date, assets)
+    filtered_data = filtered_data.dropna()
+
+    # Respects the date filter once applied
+    return {'tlda': (retrieve_all_summary_texts, (filtered_data, rfr, periods_per_year)),
+            'compare': (display_compare, (filtered_data, initial_amount, rfr, periods_per_year)),
+            'returns': (display_returns, (filtered_data, main_asset)),
+            'benchmark': (display_benchmark, (filtered_data, main_asset, benchmark_asset, periods_per_year, rfr)),
+            'rolling': (display_rolling, (filtered_data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year))}
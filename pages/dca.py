@@ -1,13 +1,17 @@
 import pandas as pd
-import numpy as np
 import dash_bootstrap_components as dbc
-import plotly.graph_objs as go
 import scripts.style as style
 import dash
 from dash import html, dcc, Input, Output, State, callback
+from dash.exceptions import PreventUpdate
 import scripts.utils as utils
+import fintix.priceData as priceData
+import fintix.dcaEngine as dcaEngine
+import scripts.resampledGraph as resampledGraph
+import scripts.figures as figures
+import scripts.resultCache as resultCache
+import scripts.backgroundJobs as backgroundJobs
 import datetime
-from dateutil.relativedelta import relativedelta
 from dash import dash_table
 
 dash.register_page(__name__, name="DCA")
@@ -119,7 +123,7 @@ def create_dca_params(budget, initial_amount):
                                             html.P(children='Lookback Period', className=style.params_p_style ),
 
                                             dcc.Dropdown(id='lookback-dpdn',
-                                                        options=[{'label':i, 'value':i} for i in utils.lookback_periods],
+                                                        options=[{'label':i, 'value':i} for i in priceData.lookback_periods],
                                                         value='max'),
 
                                             html.P(id='date-validation-p', className='text-danger mt-2')
@@ -146,108 +150,18 @@ def create_dca_params(budget, initial_amount):
 
     return display
 
-def create_ew_portfolio_index(prices, budget, return_contribution=False):
-    try:
-        prices.set_index('Date', inplace=True) # In case Date column was not set as index
-        prices.index = pd.to_datetime(prices.index)
-    except:
-        pass
-    
-    prices = prices.resample('D').ffill()
-    returns = prices.pct_change()
-    noa = returns.shape[1] # number of assets
-    weights = np.repeat(1/noa, noa)
-    index = returns + 1
-    index.iloc[0] = budget / noa
-    aba = index.cumprod() # amount by asset
-    index = aba.sum(axis=1) 
-    
-    if return_contribution:
-        # Return contribution
-        rba = aba.iloc[-1] / aba.iloc[0] # returns by asset
-        contribution = rba * weights
-        
-        return index, contribution
-    else:
-        return index
-
-def create_dca_index(prices, budget, starting_amount, days):
-    
-    cashflow = []
-    
-    try:
-        prices.set_index('Date', inplace=True) # In case Date column was not set as index
-        prices.index = pd.to_datetime(prices.index)
-    except:
-        pass
-    
-    prices = prices.resample('D').ffill()
-    returns = prices.pct_change()
-    
-    start_date = returns.index[0]
-    end_date = returns.index[-1]
-    rebalancing_periods = []
-    
-    # Retrieve rebalancing periods
-    i = start_date
-    while i < end_date:
-        if i == start_date:
-            rebalancing_periods.append(i)
-        i = i + relativedelta(days=days)
-        rebalancing_periods.append(i)
-        
-    if rebalancing_periods[-1] > end_date:
-        rebalancing_periods.pop()
-        
-    noa = returns.shape[1]
-    n_rebalancing_periods = len(rebalancing_periods) - 1 if starting_amount != 0 else len(rebalancing_periods)
-    rebalancing_payment = ((budget - starting_amount) / n_rebalancing_periods ) / noa
-        
-    # Create DCA indices
-    indices = []
-    for n in rebalancing_periods:
-        if n == start_date:
-            inflow = (starting_amount / noa) if starting_amount != 0 else rebalancing_payment
-        else:
-            inflow = rebalancing_payment
-                
-        index = returns.loc[n:].copy() + 1
-        index.iloc[0] = inflow
-        index = index.cumprod()
-        indices.append(index)
-        
-        cashflow.append(index.iloc[0]) # Cashflow log
-        
-    # Concat all indices into one index
-    concat_index = pd.concat(indices, axis=1)
-    unique_assets = concat_index.columns.unique()
-    aba = []
-    for a in unique_assets:
-        aba.append(pd.DataFrame(concat_index[a].sum(axis=1), columns=[a]))
-        
-    index = pd.concat(aba, axis=1).sum(axis=1)
-        
-    # Clean cashflow log
-    cashflow = pd.concat(cashflow, axis=1).transpose()
-    cashflow.index.name = "Date"
-    cashflow.index = cashflow.index.strftime("%m/%d/%Y")
-    cashflow['Total'] = cashflow.sum(axis=1)
-    cashflow = cashflow.round(2)
-    cashflow.loc['Total'] = cashflow.sum()
-    
-    return index, cashflow
-
+@resultCache.memoize
 def create_dca_body(prices, budget, starting_amount, days):
-    ew_index = create_ew_portfolio_index(prices, budget)
-    dca_index, cashflow = create_dca_index(prices, budget, starting_amount, days)
+    ew_index = dcaEngine.create_ew_portfolio_index(prices, budget)
+    dca_index, cashflow = dcaEngine.create_dca_index(prices, budget, starting_amount, days)
     concat = pd.concat([ew_index, dca_index], axis=1)
     name_base_case = "EW Index" if len(prices.columns) > 1 else prices.columns[0]
     concat.columns = [name_base_case + ' base','DCA']
     
     # Index Plot
-    traces = [go.Scatter(x=concat.index, y=concat[i], mode='lines', name=i) for i in concat.columns]
-    layout = style.scatter_charts_layout(title=f'Investing {style.accounting_format(budget)} - Lump Sum vs DCA')
-    figure = go.Figure(traces, layout)
+    traces = [figures.scatter(x=concat.index, y=concat[i], mode='lines', name=i) for i in concat.columns]
+    layout = figures.layout(title=f'Investing {style.accounting_format(budget)} - Lump Sum vs DCA')
+    figure = figures.figure(traces, layout)
 
     # Cashflow table 
     data = cashflow.reset_index().to_dict('records')
@@ -296,7 +210,7 @@ def create_dca_body(prices, budget, starting_amount, days):
     display = dbc.Row([
 
                     dbc.Col([
-                        dcc.Graph(figure=figure),
+                        resampledGraph.create_graph(figure),
                     ],xs=12, sm=12, md=12, lg=10, xl=10),
                     
                     dbc.Col([
@@ -338,8 +252,13 @@ layout = dbc.Container([
 
     ], className=style.dbc_row_style),
 
-    html.Div([
-    ], id='dca-body')
+    html.P(id='dca-progress', className='text-center text-warning', style={'display': 'none'}),
+    dbc.Spinner(children=[html.Div([
+                    ], id='dca-body')],
+                size="lg", 
+                color="primary", 
+                type="border", 
+                fullscreen=False),
     
 ],fluid=True)
 
@@ -358,7 +277,8 @@ def validate_input(initial_amount, budget):
     if initial_amount > budget:
         return 'Initial amount cannot be higher than the budget.', 0
 
-@callback(Output('dca-body','children'),
+# Runs as a background job -> progress is shown above the spinner, a newer request cancels the running one
+@backgroundJobs.callback(Output('dca-body','children'),
             [Input('dca-apply-changes-btn', 'n_clicks'),
             Input('stored-data','data'),],
             [State('assets-dpdn', 'value'),
@@ -367,11 +287,17 @@ def validate_input(initial_amount, budget):
             State('dca-budget','value'),
             State('dca-initial-investment','value'),
             State('dca-interval','value'),
-            ])
-def display_body(n, data, assets, start_date, end_date, budget, initial_amount, dca_interval,):
+            ],
+            progress=Output('dca-progress', 'children'),
+            running=[(Output('dca-progress', 'style'), {'display': 'block'}, {'display': 'none'})])
+def display_body(set_progress, n, data, assets, start_date, end_date, budget, initial_amount, dca_interval,):
+    set_progress('Loading data...')
     data = utils.json_to_df(data)
+    if data is None: # Upload without parseable dates
+        raise PreventUpdate
     data = data.dropna()
-    data = utils.filter_data(data, start_date, end_date, assets)
+    data = priceData.filter_data(data, start_date, end_date, assets)
+    set_progress(f'Investing every {dca_interval} days over {len(data)} dates...')
     return create_dca_body(data, budget, initial_amount, dca_interval)
 
 @callback(
@@ -1,22 +1,33 @@
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, callback
+from dash.exceptions import PreventUpdate
 import dash
 from dash import dash_table
 from dash.dash_table import FormatTemplate
 import dash_bootstrap_components as dbc
-import yfinance as yf
 import pandas as pd 
-import quantstats as qs 
 import datetime
+import threading
+import time
 import sys
 import scripts.style as style
+import scripts.priceStore as priceStore
+import fintix.metricsEngine as metricsEngine
+import fintix.periodReturns as periodReturns
 
 dash.register_page(__name__)
 
 # Initialize Variables
 path = sys.path[0].replace('pages','data')
+store_path = path + '/data/prices'
 start_date = '2012-01-03'
 percentage = FormatTemplate.percentage(2)
 
+# Background refresh settings
+refresh_interval = 60 * 60 * 8 # 8 hours, in seconds -> data is downloaded at most once per interval across all workers
+refresh_on_startup = True # Refresh as soon as the first page is served if due, otherwise wait for one interval
+poll_interval = 60 # Seconds between checks of the scheduler for a due refresh / newer data written by another worker
+client_poll_interval = 60 * 5 # Seconds between checks of open pages for a newer data version
+
 tickers = {'BTC-USD':'Bitcoin',
             'QQQ': 'US Nasdaq 100',
             'GLD': 'Gold',
@@ -60,55 +71,52 @@ tickers_mapping = {'overview': ['BTC-USD','QQQ','GLD','SPY','TLT','SHY','EEM','I
                 }
 
 # Download / Load Data from yfinance / local 
-def loadData(input_path=path+'/data/prices.csv', clean=True):
+def loadData(tickers=None, start=None, end=None, store_path=store_path, clean=True):
     '''
-    Loads asset prices data from local file.
+    Loads asset prices data from the local price store, optionally for a subset of tickers and dates.
+    The store is built from the prices csv file the first time it is needed.
     '''
-    prices = pd.read_csv(input_path, index_col=0)
+    if not priceStore.exists(store_path):
+        priceStore.import_csv(path+'/data/prices.csv', store_path)
+
+    prices = priceStore.load_prices(store_path, tickers, start, end)
     if clean:
-        prices.index = pd.to_datetime(prices.index)
         prices = prices.ffill()
     return prices
 
-def downloadData(tickers=list(tickers.keys()), output_path=path+'/data/prices.csv'):
+def downloadData(tickers=list(tickers.keys()), store_path=store_path):
     '''
-    Loads asset prices data from local file and adds new data to it. 
-    Creates local file if not available. 
+    Adds new data to the local price store, only writing the rows that changed.
+    Creates the store if not available. 
     '''
+    import yfinance as yf # Imported on first use (see app.deferred_modules)
+    tickers = list(tickers)
     try:
-        prices = loadData()
-        max_date = pd.to_datetime(prices.index[-1])
+        if not priceStore.exists(store_path):
+            priceStore.import_csv(path+'/data/prices.csv', store_path)
+        max_date = priceStore.last_date(store_path)
         delta_days = (datetime.datetime.today() - max_date).days
 
         if delta_days >= 1: # Retrieve new price data.
-            start = max_date - datetime.timedelta(3) # Always retrieve data for past 3 days and re-adjust local file.
+            start = max_date - datetime.timedelta(3) # Always retrieve data for past 3 days and re-adjust local store.
             add_on_prices = yf.download(tickers, start=start)['Adj Close']
-            prices = pd.concat([prices, add_on_prices]) # Append new data to current csv file
-            prices = prices[~prices.index.duplicated()]
-            prices = prices.ffill()
+            priceStore.append_prices(add_on_prices, store_path) # Append new data to the store
             print("Latest data downloaded and appended.")
 
-        else:
-            return prices
-
     except: 
-        print("Couldn't load data from local file.")
+        print("Couldn't load data from local store.")
         prices = yf.download(tickers, period='max')['Adj Close'] 
         print("All data downloaded from yfinance.")
+        priceStore.save_prices(prices.ffill(), store_path)
 
-    prices.to_csv(output_path)
-    return prices
-
-prices = downloadData()
-prices = prices.loc[start_date:]
+    return loadData(store_path=store_path)
 
 # Create performance table function 
 def create_performance_table(prices, mapping='overview'):
     prices = prices[tickers_mapping[mapping]]
-    returns = qs.utils._prepare_returns(prices)
 
     # Group by year and create returns table
-    yearly_returns = qs.utils.aggregate_returns(returns, 'eoy', compounded=True)
+    yearly_returns = periodReturns.compute_period_returns(prices)['yearly']
     yearly_returns_T = yearly_returns.transpose()
 
     # Create DataFrame for tickers from the initial tickers dictionary
@@ -125,7 +133,7 @@ def create_performance_table(prices, mapping='overview'):
     merged = merged[col_order] # Adjust columns order
 
     # Add total returns to table
-    total_rets = pd.DataFrame(qs.stats.comp(returns), columns=["Total"])
+    total_rets = pd.DataFrame({'Total': metricsEngine.compute_growth_index(prices).iloc[-1] - 1})
     merged = pd.merge(merged, total_rets, left_on=merged.Ticker, right_on=total_rets.index, how='left').drop('key_0', axis=1)
     merged['Ticker'] = [f"[{t}](https://finance.yahoo.com/quote/{t})" for t in merged['Ticker'].unique()] # Redirect to Yahoo's ticker page.
     
@@ -167,31 +175,102 @@ def create_performance_table(prices, mapping='overview'):
                                                         )
     return dt
 
-layout = dbc.Container([
+# Performance tables snapshot
+# Served from the local store without touching the network and rebuilt once per data version of the store.
+# A single scheduler (one thread per process, coordinated through the store lock) downloads new data at most once
+# per refresh interval; open pages only fetch the precomputed tables when the data version changed.
+_snapshot = {'version': None, 'tables': None}
+_snapshot_lock = threading.Lock()
+_refresher = None
+
+def build_performance_tables():
+    '''
+    Builds the overview, sectors and factors tables from the local store.
+    '''
+    prices = loadData(start=start_date)
+    return tuple(create_performance_table(prices, mapping) for mapping in tickers_mapping)
+
+def retrieve_performance_tables():
+    '''
+    Returns the data version and the tables built for it, rebuilding them only when the stored data changed.
+    '''
+    with _snapshot_lock:
+        version = priceStore.data_version(store_path)
+        if _snapshot['tables'] is None or _snapshot['version'] != version:
+            tables = build_performance_tables()
+            _snapshot['version'] = version # Read before building -> a concurrent write only causes one more rebuild
+            _snapshot['tables'] = tables
+        return _snapshot['version'], _snapshot['tables']
+
+def refresh_data():
+    '''
+    Downloads new data into the store if no worker did so within the refresh interval.
+    Only one process refreshes at a time; the others skip and pick up the new data version.
+    '''
+    if time.time() - priceStore.last_refreshed(store_path) < refresh_interval:
+        return
+    with priceStore.store_lock(store_path, blocking=False) as acquired:
+        if not acquired or time.time() - priceStore.last_refreshed(store_path) < refresh_interval:
+            return
+        try:
+            downloadData()
+        except:
+            print("Couldn't refresh data, serving the last stored snapshot.")
+        priceStore.mark_refreshed(store_path) # Failed attempts wait for the next interval too
+
+def _refresh_loop():
+    if not refresh_on_startup:
+        time.sleep(refresh_interval)
+    while True:
+        try:
+            refresh_data()
+            retrieve_performance_tables()
+        except:
+            print("Couldn't refresh the performance tables.")
+        time.sleep(poll_interval)
+
+def start_refresher():
+    '''
+    Starts the background refresh thread of this process (once). Started on the first request rather than at
+    import, so that app startup never waits on the data provider and forked workers each get their own thread.
+    '''
+    global _refresher
+    with _snapshot_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_refresh_loop, name='overview-refresh', daemon=True)
+            _refresher.start()
+
+def layout(**kwargs):
+    start_refresher()
+    version, (asset_class_table, sector_table, factor_table) = retrieve_performance_tables()
+
+    return dbc.Container([
 
                     dcc.Interval(id='refresh-interval', 
-                                    interval=288000000, #8 hours, 288M ms
+                                    interval=client_poll_interval * 1000,
                                     n_intervals=0
                                     ),
 
+                    dcc.Store(id='overview-data-version', data=version),
+
                     dbc.Row([
             
                         html.H5('Asset Class Performance', className=style.h5_style),
 
                         dbc.Col([
-                            html.Div(id='asset-class-performance-table', children=create_performance_table(prices))
+                            html.Div(id='asset-class-performance-table', children=asset_class_table)
                         ]),
 
                         html.H5('Sectors Performance', className=style.h5_style),
 
                         dbc.Col([
-                            html.Div(id='sector-performance-table', children=create_performance_table(prices, 'sectors'))
+                            html.Div(id='sector-performance-table', children=sector_table)
                         ]),
 
                         html.H5('Factors Performance', className=style.h5_style),
 
                         dbc.Col([
-                            html.Div(id='factor-performance-table', children=create_performance_table(prices, 'factors'))
+                            html.Div(id='factor-performance-table', children=factor_table)
                         ])
 
                     ], className='m-2 mb-4'),
@@ -201,14 +280,13 @@ layout = dbc.Container([
 @callback(Output('asset-class-performance-table', 'children'),
         Output('sector-performance-table', 'children'),
         Output('factor-performance-table', 'children'),
+        Output('overview-data-version', 'data'),
         [Input('refresh-interval','n_intervals')],
+        [State('overview-data-version', 'data')],
         prevent_initial_call=True)
-def update_data(n_intervals):
-    if n_intervals > 0:
-        try:
-            downloadData(tickers)
-        except:
-            pass
-        prices = loadData()
-        prices = prices.loc[start_date:]
-        return create_performance_table(prices, 'overview'), create_performance_table(prices, 'sectors'), create_performance_table(prices, 'factors')
+def update_data(n_intervals, client_version):
+    # Data is refreshed by the scheduler, pages only fetch the precomputed tables of a newer version
+    version, tables = retrieve_performance_tables()
+    if version == client_version:
+        raise PreventUpdate
+    return tables + (version,)
@@ -0,0 +1,64 @@
+import functools
+import os
+import dash
+import fintix.dataCache as dataCache
+import scripts.telemetry as telemetry
+import scripts.profiling as profiling
+
+# Heavy callbacks run as background jobs: each job runs in its own process and passes its progress and result
+# through a local disk queue that the browser polls, so no request waits on the computation (no proxy timeouts).
+# When a callback is triggered again from the same page, Dash terminates the job still running for the previous request.
+# The queue lives in the 'jobs' folder of the shared cache (see dataCache.use_shared_cache), so that the server workers
+# and the jobs coordinate through the same directory as their results; without a shared cache, jobs run within the request.
+expire = 60 * 60 # Seconds job results are kept on disk if never fetched
+poll_interval = 500 # Milliseconds between the browser's checks for a job's progress / result
+
+_managers = {} # Shared cache path -> DiskcacheManager
+
+def get_manager():
+    '''
+    DiskcacheManager of the configured shared cache, or None (no shared cache, or diskcache is not installed).
+    '''
+    if dataCache.shared_cache_path is None:
+        return None
+    cache_path = os.path.join(dataCache.shared_cache_path, 'jobs')
+    if cache_path not in _managers:
+        try:
+            import diskcache
+        except ImportError:
+            print('diskcache is not installed, heavy callbacks run within the request.')
+            _managers[cache_path] = None
+            return None
+        _managers[cache_path] = dash.DiskcacheManager(diskcache.Cache(dataCache.secure_directory(cache_path)), expire=expire)
+    return _managers[cache_path]
+
+def callback(*dependencies, progress=None, running=None, cancel=None, **kwargs):
+    '''
+    Registers a callback run as a background job, or as a regular callback without a shared cache or diskcache.
+    The function receives set_progress (a function of the progress outputs' values) as first argument either way.
+    '''
+    name = str(dependencies[0]) # Output -> 'id.property', as labelled by the telemetry request hooks
+    manager = get_manager() # Pages register their callbacks when create_app builds the app, after use_shared_cache
+    if manager is not None:
+        def background(func):
+            @functools.wraps(func)
+            def job(*args):
+                details = profiling.requested_job() # Forked from the request that started the job
+                with telemetry.timed_callback(name): # The job process exits right after -> writes its metrics
+                    if details is None:
+                        return func(*args)
+                    with profiling.profile(f'{name} (job)', details):
+                        return func(*args)
+            return dash.callback(*dependencies, background=True, manager=manager, interval=poll_interval,
+                                    progress=progress, running=running, cancel=cancel, **kwargs)(job)
+        return background
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            return func(_ignore_progress, *args)
+        return dash.callback(*dependencies, **kwargs)(wrapper)
+    return decorator
+
+def _ignore_progress(*values):
+    pass
@@ -0,0 +1,204 @@
+import argparse
+import glob
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import fintix.priceData as priceData
+import fintix.metricsEngine as metricsEngine
+import fintix.periodReturns as periodReturns
+import fintix.rollingEngine as rollingEngine
+import fintix.correlationEngine as correlationEngine
+
+# Run from the repo root:
+#   python -m scripts.batch data/clients/ --output results/ --workers 8
+#   python -m scripts.batch "data/clients/**/*.csv" --output results/ --format parquet
+# Computes the dashboard's metrics table, monthly / yearly returns, rolling metrics and correlation matrix for
+# every price file (upload template: a Date column followed by one column of prices per asset), one file per
+# worker process at a time. Each file's outputs are written to their own folder of the output directory and
+# progress is appended to progress.jsonl there: re-running the same command skips the files already done
+# (unless they changed) and retries the failed ones.
+
+progress_name = 'progress.jsonl'
+extensions = ('.csv', '.xls', '.xlsx')
+max_tasks_per_child = 50 # Worker processes are replaced after this many files -> memory can't creep up
+
+def find_files(inputs):
+    '''
+    Price files of the given directories (recursively), glob patterns and file paths, sorted.
+    '''
+    files = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '**', '*')
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and path.lower().endswith(extensions):
+                files.add(os.path.abspath(path))
+    return sorted(files)
+
+def output_names(files):
+    '''
+    Output folder name of each file: its path relative to the files' common folder, without extension.
+    '''
+    if not files:
+        return {}
+    root = os.path.commonpath([os.path.dirname(path) for path in files])
+    return {path: os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '__') for path in files}
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+def read_progress(output_dir):
+    '''
+    Last recorded status of each file (path -> record) from progress.jsonl.
+    '''
+    progress = {}
+    try:
+        with open(os.path.join(output_dir, progress_name)) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    progress[record['file']] = record
+                except (ValueError, KeyError): # Line cut short by an interrupted run
+                    continue
+    except FileNotFoundError:
+        pass
+    return progress
+
+def load_prices(path):
+    '''
+    Reads a price file in the upload template format, as the dashboard parses uploads.
+    '''
+    df = pd.read_csv(path) if path.lower().endswith('.csv') else pd.read_excel(path)
+    if 'Date' not in df.columns:
+        raise ValueError('no Date column (see the upload template)')
+    prices = priceData.set_date_index(df)
+    if prices is None:
+        raise ValueError('the Date column could not be parsed')
+    prices = prices.sort_index().apply(pd.to_numeric, errors='coerce')
+    return prices.dropna() # Common dates of all assets, as the Compare tabs
+
+def compute_outputs(prices, periods_per_year, rfr, rolling_periods, benchmark_asset=None):
+    '''
+    Returns name -> DataFrame of the outputs of one price panel.
+    '''
+    outputs = {'metrics': metricsEngine.compute_metrics_table(prices, periods_per_year, rfr)}
+
+    period_returns = periodReturns.compute_period_returns(prices)
+    years, months = np.meshgrid(period_returns['years'], np.arange(1, 13), indexing='ij')
+    monthly = pd.DataFrame(period_returns['monthly'].reshape(-1, len(prices.columns)), columns=prices.columns)
+    monthly.index = pd.MultiIndex.from_arrays([years.ravel(), months.ravel()], names=['Year', 'Month'])
+    outputs['monthly_returns'] = monthly.dropna(how='all')
+    outputs['yearly_returns'] = period_returns['yearly'].rename_axis('Year')
+
+    # Benchmark -> second asset, as the dashboard's default
+    if benchmark_asset is None:
+        benchmark_asset = prices.columns[1] if len(prices.columns) > 1 else prices.columns[0]
+    if benchmark_asset in prices.columns and len(prices) > rolling_periods:
+        rolling = rollingEngine.compute_rolling_metrics(prices, benchmark_asset, rolling_periods, rfr, periods_per_year)
+        outputs['rolling'] = pd.concat({metric: frame.stack() for metric, frame in rolling.items()}, axis=1) \
+                                .rename_axis(['Date', 'Asset']).dropna(how='all')
+
+    returns = metricsEngine.prepare_returns(prices)
+    outputs['correlation'] = pd.DataFrame(correlationEngine.pairwise_correlation(returns),
+                                            index=prices.columns, columns=prices.columns).rename_axis('Asset')
+    return outputs
+
+def write_outputs(outputs, folder, output_format):
+    '''
+    Writes the outputs to a temporary folder renamed to folder once complete, so that a folder is never half written.
+    '''
+    temp_folder = f'{folder}.tmp-{os.getpid()}'
+    shutil.rmtree(temp_folder, ignore_errors=True)
+    os.makedirs(temp_folder)
+    for name, df in outputs.items():
+        df.columns = df.columns.astype(str)
+        if output_format == 'parquet':
+            df.to_parquet(os.path.join(temp_folder, f'{name}.parquet'))
+        else:
+            df.to_csv(os.path.join(temp_folder, f'{name}.csv'))
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(temp_folder, folder)
+
+def process_file(task):
+    '''
+    Worker: computes and writes the outputs of one file. Returns its progress record (never raises).
+    '''
+    path, folder, options = task
+    record = dict(file=path, output=folder, **file_signature(path))
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            prices = load_prices(path)
+            if prices.empty:
+                raise ValueError('no dates with prices for every asset')
+            outputs = compute_outputs(prices, options['periods_per_year'], options['rfr'], options['rolling_periods'], options['benchmark'])
+        write_outputs(outputs, folder, options['format'])
+        record.update(status='ok', rows=len(prices), assets=len(prices.columns))
+    except Exception as e:
+        record.update(status='failed', error=f'{type(e).__name__}: {e}')
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+def run(inputs, output_dir, workers=None, output_format='csv', periods_per_year=252, rfr=0.02, rolling_periods=126,
+        benchmark=None, restart=False):
+    '''
+    Processes every file not already done, in a pool of worker processes. Returns the number of failed files.
+    '''
+    output_dir = os.path.abspath(output_dir)
+    files = [path for path in find_files(inputs) if not path.startswith(output_dir + os.sep)] # Not our own outputs
+    names = output_names(files)
+    os.makedirs(output_dir, exist_ok=True)
+    progress = {} if restart else read_progress(output_dir)
+
+    pending = []
+    for path in files:
+        previous = progress.get(path)
+        if previous and previous['status'] == 'ok' and {k: previous.get(k) for k in ['size', 'mtime']} == file_signature(path):
+            continue
+        pending.append(path)
+    print(f'{len(files)} files, {len(files) - len(pending)} already done, {len(pending)} to process')
+
+    options = dict(format=output_format, periods_per_year=periods_per_year, rfr=rfr, rolling_periods=rolling_periods, benchmark=benchmark)
+    tasks = ((path, os.path.join(output_dir, names[path]), options) for path in pending)
+    failed = 0
+    with open(os.path.join(output_dir, progress_name), 'w' if restart else 'a') as log, \
+            multiprocessing.Pool(workers, maxtasksperchild=max_tasks_per_child) as pool:
+        # One file per task and results returned as they complete -> only `workers` panels are in memory at a time
+        for done, record in enumerate(pool.imap_unordered(process_file, tasks, chunksize=1), 1):
+            log.write(json.dumps(record) + '\n')
+            log.flush()
+            failed += record['status'] != 'ok'
+            status = 'ok' if record['status'] == 'ok' else f'FAILED {record["error"]}'
+            print(f'[{done}/{len(pending)}] {os.path.basename(record["file"])} {record["seconds"]:.2f}s {status}')
+    print(f'Done: {len(pending) - failed} processed, {failed} failed, outputs in {output_dir}')
+    return failed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Computes the dashboard's analytics for a batch of price files.")
+    parser.add_argument('inputs', nargs='+', help='Directories, glob patterns (quoted) or files')
+    parser.add_argument('--output', required=True, help='Output directory (also holds progress.jsonl)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--periods-per-year', type=int, default=252)
+    parser.add_argument('--rfr', type=float, default=0.02)
+    parser.add_argument('--rolling-periods', type=int, default=126)
+    parser.add_argument('--benchmark', default=None, help='Benchmark asset of the rolling metrics (default: second column)')
+    parser.add_argument('--restart', action='store_true', help='Ignore the recorded progress and process every file')
+    args = parser.parse_args()
+
+    if args.format == 'parquet' and not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        print('Parquet output requires pyarrow or fastparquet (pip install pyarrow).')
+        sys.exit(2)
+
+    failed = run(args.inputs, args.output, args.workers, args.format, args.periods_per_year, args.rfr,
+                    args.rolling_periods, args.benchmark, args.restart)
+    sys.exit(1 if failed else 0)
@@ -1,17 +1,24 @@
-import quantstats as qs
 import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
 import scripts.style as style
-import plotly.figure_factory as ff
+import scripts.figures as figures
+import fintix.correlationEngine as correlationEngine
+import fintix.benchmarkEngine as benchmarkEngine
+import fintix.metricsEngine as metricsEngine
 from collections import OrderedDict
 from dash import dash_table
 from dash.dash_table import FormatTemplate
 
+# Trace colors of the distribution plot (plotly's default colors, as ff.create_distplot)
+distplot_colors = ['rgb(31, 119, 180)', 'rgb(255, 127, 14)', 'rgb(44, 160, 44)', 'rgb(214, 39, 40)', 'rgb(148, 103, 189)',
+                    'rgb(140, 86, 75)', 'rgb(227, 119, 194)', 'rgb(127, 127, 127)', 'rgb(188, 189, 34)', 'rgb(23, 190, 207)']
+
+# Above this many assets the heatmap cells are not labelled (hover still shows the values)
+annotate_max_assets = 25
+
 def create_scatter_plot(data, main_asset, benchmark_asset):
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-    traces = [go.Scatter(x=returns[main_asset], 
+    returns = metricsEngine.returns_frame(data)
+    traces = [figures.scatter(x=returns[main_asset], 
                     y=returns[benchmark_asset],
                     mode='markers+text',
                     marker=dict(size=12,
@@ -20,19 +27,17 @@ def create_scatter_plot(data, main_asset, benchmark_asset):
                                 )
                             )
                         ]
-    layout = style.scatter_charts_layout(f"Scatter Plot", 
+    layout = figures.layout(f"Scatter Plot", 
                                     xtickformat= ',.1%', 
                                     ytickformat=',.1%', 
                                     xaxisTitle=main_asset, 
-                                    yaxisTitle=benchmark_asset)
+                                    yaxisTitle=benchmark_asset,
+                                    dates=False)
 
-    fig = go.Figure(traces, layout)
-
-    return fig
+    return figures.figure(traces, layout)
 
 def create_distribution_plot(data, main_asset, benchmark_asset):
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
+    returns = metricsEngine.returns_frame(data)
 
     if main_asset == benchmark_asset: # In case we loaded one asset
         hist_data = [(round(returns.iloc[:,0],4)).to_list()]
@@ -42,114 +47,119 @@ def create_distribution_plot(data, main_asset, benchmark_asset):
         group_labels = [main_asset, benchmark_asset]
 
     bin_size = 0.01
-    fig = ff.create_distplot(hist_data, group_labels, bin_size=bin_size, histnorm='')
-    fig.update_layout(title=dict(text=f'<b>Returns Distribution</b>',
-                                font=dict(color=style.main_theme_color)),
-                    title_x=0.5,
+    hist_data = [np.asarray(values, dtype=np.float64) for values in hist_data]
+    hist_data = [values[~np.isnan(values)] for values in hist_data]
+
+    # Same figure as ff.create_distplot -> histograms, KDE curves and rug plots
+    hists, curves, rugs = [], [], []
+    for i, (values, label) in enumerate(zip(hist_data, group_labels)):
+        color = distplot_colors[i % len(distplot_colors)]
+        start, end = (values.min(), values.max()) if len(values) else (0, 0)
+        curve_x = start + np.arange(500) * (end - start) / 500
+        hists.append(dict(type='histogram', x=values, xaxis='x', yaxis='y', histnorm='', name=label, legendgroup=label,
+                            marker=dict(color=color), autobinx=False, xbins=dict(start=start, end=end, size=bin_size), opacity=0.7))
+        curves.append(figures.scatter(curve_x, _gaussian_kde(values, curve_x), name=label, legendgroup=label, showlegend=False,
+                            xaxis='x', yaxis='y', marker=dict(color=color)))
+        rugs.append(figures.scatter(values, np.repeat(label, len(values)), mode='markers', name=label, legendgroup=label, showlegend=False,
+                            xaxis='x', yaxis='y2', marker=dict(color=color, symbol='line-ns-open')))
+
+    layout = dict(title=dict(text=f'<b>Returns Distribution</b>',
+                                font=dict(color=style.main_theme_color),
+                                x=0.5),
                     font=dict(size=15),
-                    hoverlabel=dict(font_size=15),
-                    template=style.chart_templates,
+                    hoverlabel=dict(font=dict(size=15)),
+                    barmode='overlay',
+                    hovermode='closest',
+                    xaxis=dict(domain=[0.0, 1.0], anchor='y2', zeroline=False),
+                    yaxis=dict(domain=[0.35, 1], anchor='free', position=0.0),
+                    yaxis2=dict(domain=[0, 0.25], anchor='x', dtick=1, showticklabels=False),
+                    template=figures.template(),
+                    paper_bgcolor=style.secondary_theme_color, 
+                    plot_bgcolor=style.secondary_theme_color,
+                    legend=dict(y=-0.2, traceorder='reversed'))
+
+    return figures.figure(hists + curves + rugs, layout)
+
+def _gaussian_kde(values, points):
+    '''
+    Gaussian kernel density of values evaluated at points, with Scott's bandwidth (as scipy.stats.gaussian_kde).
+    '''
+    if len(values) < 2 or values.std() == 0:
+        return np.zeros(len(points))
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    density = np.zeros(len(points))
+    for lo in range(0, len(values), 2048): # Bounded temporaries
+        z = (points[:, None] - values[None, lo:lo + 2048]) / bandwidth
+        density += np.exp(-0.5 * z * z).sum(axis=1)
+    return density / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+def create_correlation_heatmap(data, cluster=False, annotate_max_assets=annotate_max_assets):
+    '''
+    Lower triangle correlation heatmap of returns (pairwise complete observations).
+    Cell values are printed up to annotate_max_assets assets; hovering always shows the exact correlation.
+    Set cluster to order assets by hierarchical clustering.
+    '''
+    assets = data.columns.astype(str).to_numpy()
+
+    corr = correlationEngine.pairwise_correlation(metricsEngine.prepare_returns(data))
+    if cluster:
+        order = correlationEngine.cluster_order(corr)
+        corr = corr[np.ix_(order, order)]
+        assets = assets[order]
+    corr[np.triu_indices_from(corr)] = np.nan # Remove top triangle
+
+    heatmap = dict(zmin=-1,
+                    zmax=1,
+                    colorscale='Plasma', # Same as the previous annotated heatmap
+                    showscale=True,
+                    hoverongaps=False,
+                    hovertemplate='%{y} / %{x}: %{z:.4f}<extra></extra>')
+
+    # Per-cell labels are drawn by plotly.js from a text array, no annotation objects
+    if len(assets) <= annotate_max_assets:
+        heatmap.update(text=np.where(np.isnan(corr), '', np.char.mod('%.2f', np.nan_to_num(corr))).tolist(),
+                        texttemplate='%{text}',
+                        ygap=1,
+                        xgap=1)
+
+    # z as float32 -> exact to well beyond the hover precision at half the payload
+    traces = [figures.heatmap(corr.astype(np.float32), assets, assets, **heatmap)]
+    layout = dict(title=dict(text='<b>Correlation Heatmap</b>',
+                                font=dict(color=style.main_theme_color),
+                                x=0.5),
+                    font=dict(size=15),
+                    hoverlabel=dict(font=dict(size=15)),
+                    xaxis=dict(showgrid=False, zeroline=False, side='bottom'),
+                    yaxis=dict(showgrid=False, zeroline=False, autorange='reversed'),
+                    template=figures.template(),
                     paper_bgcolor=style.secondary_theme_color, 
                     plot_bgcolor=style.secondary_theme_color,
                     legend=dict(y=-0.2))
 
-    return fig
-
-def create_correlation_heatmap(data):
-    # Reference - https://stackoverflow.com/questions/66572672/correlation-heatmap-in-plotly
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-
-    corr = returns.corr()
-    mask = np.triu(np.ones_like(corr, dtype=bool)) # Remove top triangle
-    df_mask = round(corr.mask(mask),2) 
-
-    fig = ff.create_annotated_heatmap(z=df_mask.to_numpy(), 
-                        x=df_mask.columns.tolist(),
-                        y=df_mask.columns.tolist(),
-                        #font_colors=['black'],  
-                        #colorscale='GnBu',
-                        zmin=-1,
-                        zmax=1,
-                        showscale=True,
-                        ygap=1, 
-                        xgap=1,
-                        )
-
-    fig.update_xaxes(side="bottom")
-    fig.update_layout(title=dict(text='<b>Correlation Heatmap</b>',
-                                font=dict(color=style.main_theme_color)),
-                        title_x=0.5,
-                        font=dict(size=15),
-                        hoverlabel=dict(font_size=15),
-                        xaxis_showgrid=False,
-                        yaxis_showgrid=False,
-                        xaxis_zeroline=False,
-                        yaxis_zeroline=False,
-                        yaxis_autorange='reversed',
-                        template=style.chart_templates,
-                        paper_bgcolor=style.secondary_theme_color, 
-                        plot_bgcolor=style.secondary_theme_color,
-                        legend=dict(y=-0.2))
-
-    # Get rid of NaN values
-    for i in range(len(fig.layout.annotations)):
-        if fig.layout.annotations[i].text == 'nan':
-            fig.layout.annotations[i].text = ""
-
-    return fig
+    return figures.figure(traces, layout)
 
 def create_statistics_table(data, main_asset, benchmark_asset, periods_per_year, rfr, round_to=2):
 
     percentage = FormatTemplate.percentage(round_to)
 
-    # Create statistics table
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-    percentage = FormatTemplate.percentage(round_to) 
-
     first_date = data.index.min().strftime("%m/%d/%Y")
     last_date = data.index.max().strftime("%m/%d/%Y")
 
-    greeks = qs.stats.greeks(returns[main_asset], returns[benchmark_asset], periods=periods_per_year, prepare_returns=False)
-    round_to = 3
-
-    try:
-        correlation = round(returns[main_asset].corr(returns[benchmark_asset]),round_to)
-    except:
-        correlation = np.nan
-    try:
-        alpha = round(greeks.loc['alpha'], round_to)
-    except:
-        alpha =np.nan
-    try:
-        beta = round(greeks.loc['beta'], round_to)
-    except:
-        beta = np.nan
-    try:
-        r_squared = round(qs.stats.r_squared(returns[main_asset], returns[benchmark_asset], prepare_returns=False), round_to)
-    except:
-        r_squared = np.nan
-    try:
-        treynor = round((qs.stats.comp(returns[main_asset]) - rfr) / beta, round_to)
-    except:
-        treynor = np.nan
-
-    try:
-        information_ratio = round(qs.stats.information_ratio(returns[main_asset], returns[benchmark_asset], prepare_returns=False), round_to)
-    except:
-        information_ratio = np.nan
+    # Single table -> only the main asset and the benchmark
+    assets = list(dict.fromkeys([main_asset, benchmark_asset]))
+    statistics = benchmarkEngine.compute_benchmark_statistics(data[assets], benchmark_asset, periods_per_year, rfr)
+    statistics = statistics.loc[main_asset].round(3)
 
     data = OrderedDict(
         [   
             ('First Date', [first_date]),
             ('Last Date', [last_date]),
-            ('Correlation', [correlation]),
-            ('Alpha (excl. rfr)', [alpha]),
-            ('Beta', [beta]),
-            ('R-squared', [r_squared]),
-            ('Treynor Ratio', [treynor]),
-            ('Information Ratio',[information_ratio]),
+            ('Correlation', [statistics['Correlation']]),
+            ('Alpha (excl. rfr)', [statistics['Alpha']]),
+            ('Beta', [statistics['Beta']]),
+            ('R-squared', [statistics['R-squared']]),
+            ('Treynor Ratio', [statistics['Treynor Ratio']]),
+            ('Information Ratio',[statistics['Information Ratio']]),
         ])
 
     df = pd.DataFrame(data)
@@ -0,0 +1,186 @@
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import dash
+
+path = sys.path[0]
+
+# Run from the repo root:
+#   python -m scripts.benchmarks --sizes small,medium --output benchmarks.json
+#   python -m scripts.benchmarks --compare benchmarks.json   -> exits with 1 if an entry point got slower than the threshold
+# Times the compute entry points of every page on deterministic synthetic price panels.
+
+sizes = {
+    'small': dict(assets=5, years=5, freq='B'),
+    'medium': dict(assets=35, years=15, freq='B'),
+    'large': dict(assets=200, years=30, freq='B'),
+    'monthly': dict(assets=35, years=30, freq='ME'),
+}
+
+periods_per_year = {'B': 252, 'D': 365, 'W': 52, 'ME': 12}
+regression_threshold = 1.3 # Current / baseline time above which an entry point is flagged
+min_regression = 0.005 # Seconds -> ignore slowdowns smaller than timer / scheduling noise
+
+def generate_prices(assets=10, years=10, freq='B', nan_ramp=0.3, columns=None, seed=0, end='2023-12-29'):
+    '''
+    Deterministic synthetic price panel (dates x assets) of geometric random walks with correlated returns.
+    nan_ramp is the share of assets that start later (NaN before their inception), mimicking ETF inception dates;
+    inceptions are spread over the first half of the history.
+    '''
+    rng = np.random.default_rng(seed)
+    ppy = periods_per_year.get(freq, 252)
+    index = pd.date_range(end=end, periods=int(years * ppy), freq=freq, name='Date')
+    columns = list(columns) if columns is not None else [f'A{i:03d}' for i in range(assets)]
+    n, k = len(index), len(columns)
+
+    # One common factor + idiosyncratic noise
+    drift = rng.uniform(-0.02, 0.12, k) / ppy
+    vol = rng.uniform(0.05, 0.6, k) / np.sqrt(ppy)
+    beta = rng.uniform(0, 1, k)
+    market = rng.standard_normal((n, 1))
+    noise = rng.standard_normal((n, k))
+    returns = drift + vol * (beta * market + np.sqrt(1 - beta ** 2) * noise)
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+
+    late = rng.choice(k, size=int(round(k * nan_ramp)), replace=False)
+    for col in late:
+        prices[:rng.integers(1, n // 2), col] = np.nan
+
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+def entry_points():
+    '''
+    Returns name -> function(prices, ppy) for each compute entry point, called the way the pages call them,
+    and name -> function(prices, ppy) building the input of the entry points that don't take the panel itself (untimed).
+    '''
+    # Pages register themselves with the app on import
+    dash.Dash(__name__, use_pages=True, pages_folder='')
+    import scripts.metricsTable as metricsTable
+    import scripts.returnsModule as returnsModule
+    import scripts.rollingModule as rollingModule
+    import scripts.benchmarkModule as benchmarkModule
+    import pages.compare as compare
+    import fintix.dcaEngine as dcaEngine
+    import pages.overview as overview
+    import scripts.resultCache as resultCache
+    import app
+    resultCache.enabled = False # Time the computations, not the cache lookups
+    for module in app.deferred_modules: # Time the computations, not their first use imports
+        importlib.import_module(module)
+
+    def overview_universe(prices, ppy):
+        # Same history as the panel, on the overview tickers
+        return generate_prices(columns=list(overview.tickers), years=len(prices) / ppy, freq=prices.index.freqstr or 'B')
+
+    functions = {
+        'create_metrics_table': lambda prices, ppy: metricsTable.create_metrics_table(prices.dropna(), ppy, 0.02),
+        'create_monthly_returns_table': lambda prices, ppy: returnsModule.create_monthly_returns_table(prices.dropna(), prices.columns[0]),
+        'create_rolling_metrics': lambda prices, ppy: rollingModule.create_rolling_metrics(prices.dropna(), prices.columns[0], prices.columns[1], ppy // 2, 0.02, ppy),
+        'create_all_rolling_metrics': lambda prices, ppy: rollingModule.create_all_rolling_metrics(prices.dropna(), prices.columns[0], prices.columns[1], ppy // 2, 0.02, ppy),
+        'create_correlation_heatmap': lambda prices, ppy: benchmarkModule.create_correlation_heatmap(prices.dropna()),
+        'create_dca_index': lambda prices, ppy: dcaEngine.create_dca_index(prices.dropna(), 200000, 20000, 30),
+        'create_performance_table': lambda universe, ppy: overview.create_performance_table(universe, 'overview'),
+        'retrieve_all_summary_texts': lambda prices, ppy: compare.retrieve_all_summary_texts(prices.dropna(), 0.02, ppy),
+    }
+    inputs = {'create_performance_table': overview_universe}
+    return functions, inputs
+
+def time_call(func, repeat):
+    func() # Untimed warm-up: lazy imports, first-call allocations and numpy / pandas caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run(size_names, repeat=3, only=None, nan_ramp=0.3):
+    '''
+    Times each entry point on each panel size. Failures are recorded instead of stopping the run.
+    '''
+    functions, inputs = entry_points()
+    results = {}
+    for size in size_names:
+        config = sizes[size]
+        ppy = periods_per_year.get(config['freq'], 252)
+        prices = generate_prices(nan_ramp=nan_ramp, **config)
+
+        for name, func in functions.items():
+            if only and name not in only:
+                continue
+            key = f'{name}[{size}]'
+            data = prices
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    if name in inputs:
+                        data = inputs[name](prices, ppy)
+                    timings = time_call(lambda: func(data, ppy), repeat)
+                results[key] = {'min': min(timings), 'median': statistics.median(timings), 'repeat': repeat,
+                                'shape': list(data.shape)}
+                print(f'{key:<50} min {min(timings) * 1000:>10.1f}ms   median {statistics.median(timings) * 1000:>10.1f}ms')
+            except Exception as e:
+                results[key] = {'error': f'{type(e).__name__}: {e}', 'shape': list(data.shape)}
+                print(f'{key:<50} FAILED {type(e).__name__}: {e}')
+    return results
+
+def environment():
+    return {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__}
+
+def compare(results, baseline, threshold=regression_threshold):
+    '''
+    Compares min timings with a baseline run. Returns the keys that got slower than the threshold.
+    '''
+    regressions = []
+    print(f'\n{"entry point":<50} {"baseline":>10} {"current":>10} {"ratio":>7}')
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None or 'min' not in previous or 'min' not in current:
+            status = 'FAILED' if 'error' in current else 'new'
+            print(f'{key:<50} {"":>10} {"":>10} {"":>7} {status}')
+            continue
+        ratio = current['min'] / previous['min']
+        flag = 'REGRESSION' if ratio > threshold and current['min'] - previous['min'] > min_regression else ''
+        print(f'{key:<50} {previous["min"] * 1000:>8.1f}ms {current["min"] * 1000:>8.1f}ms {ratio:>7.2f} {flag}')
+        if flag:
+            regressions.append(key)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times the compute entry points on synthetic price panels.')
+    parser.add_argument('--sizes', default='small,medium', help=f'Comma separated panel sizes among {", ".join(sizes)}')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default=None, help='Comma separated entry points to run')
+    parser.add_argument('--nan-ramp', type=float, default=0.3, help='Share of assets with a late inception')
+    parser.add_argument('--output', default=None, help='JSON file to write the results to')
+    parser.add_argument('--compare', default=None, help='Baseline JSON file to flag regressions against')
+    parser.add_argument('--threshold', type=float, default=regression_threshold)
+    args = parser.parse_args()
+
+    only = args.only.split(',') if args.only else None
+    results = run(args.sizes.split(','), args.repeat, only, args.nan_ramp)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) above {args.threshold}x')
+            sys.exit(1)
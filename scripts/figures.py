@@ -0,0 +1,115 @@
+import base64
+import numpy as np
+import pandas as pd
+from dash import dcc
+import scripts.style as style
+
+# Plain dict figure specs
+# Traces and layouts are built as dicts from layouts pre-baked once from the style module, skipping plotly's
+# graph_objects validation. Arrays stay NumPy until encode(), which turns them into typed array specs
+# (base64 buffers decoded directly by plotly.js); dates travel as ms since epoch on a date axis.
+
+_templates = {}
+
+def _base_layout():
+    '''
+    style.scatter_charts_layout resolved once into a dict (including the theme template).
+    '''
+    if 'base' not in _templates:
+        _templates['base'] = style.scatter_charts_layout().to_plotly_json()
+    return _templates['base']
+
+def _range_selector():
+    '''
+    style.add_range_slider settings resolved once.
+    '''
+    if 'range_selector' not in _templates:
+        figure = style.add_range_slider(style.go.Figure(layout=style.scatter_charts_layout()))
+        layout = figure.layout.to_plotly_json()
+        _templates['range_selector'] = {'xaxis': {key: value for key, value in layout['xaxis'].items() if key.startswith('range')},
+                                        'margin': layout['margin']}
+    return _templates['range_selector']
+
+def layout(title=None, xtickformat=None, ytickformat=None, xaxisTitle=None, yaxisTitle=None, range_slider=False, rangeSlideVisible=False, dates=True):
+    '''
+    Same layout as style.scatter_charts_layout (+ style.add_range_slider if range_slider), as a dict.
+    Set dates for charts whose x values are datetimes.
+    '''
+    base = _base_layout()
+    spec = dict(base) # The shared template is never modified, only the keys below are replaced
+    spec['title'] = dict(base['title'], text=f'<b>{title}</b>')
+    spec['xaxis'] = _axis(base['xaxis'], xtickformat, xaxisTitle)
+    spec['yaxis'] = _axis(base['yaxis'], ytickformat, yaxisTitle)
+    if dates:
+        spec['xaxis']['type'] = 'date'
+    if range_slider:
+        selector = _range_selector()
+        spec['xaxis'].update(selector['xaxis'])
+        spec['xaxis']['rangeslider'] = dict(selector['xaxis']['rangeslider'], visible=rangeSlideVisible)
+        spec['margin'] = dict(selector['margin'])
+    return spec
+
+def _axis(base, tickformat, title):
+    axis = dict(base)
+    if tickformat is not None:
+        axis['tickformat'] = tickformat
+    if title is not None:
+        axis['title'] = dict(text=title)
+    return axis
+
+def figure(data, layout):
+    return {'data': list(data), 'layout': layout}
+
+def template():
+    return _base_layout()['template']
+
+def _trace(trace_type, **kwargs):
+    return dict(type=trace_type, **{key: _values(value) for key, value in kwargs.items() if value is not None})
+
+def scatter(x, y, name=None, mode='lines', **kwargs):
+    return _trace('scatter', x=x, y=y, name=name, mode=mode, **kwargs)
+
+def bar(x, y, name=None, **kwargs):
+    return _trace('bar', x=x, y=y, name=name, **kwargs)
+
+def box(y, name=None, **kwargs):
+    return _trace('box', y=y, name=name, **kwargs)
+
+def heatmap(z, x, y, **kwargs):
+    return _trace('heatmap', z=np.asarray(z), x=np.asarray(x).tolist(), y=np.asarray(y).tolist(), **kwargs)
+
+def _values(values):
+    if isinstance(values, (pd.Series, pd.Index)):
+        return values.to_numpy()
+    return values
+
+def encode_array(values):
+    '''
+    Typed array spec of a numeric / datetime array, other arrays as lists.
+    '''
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        values = values.astype('datetime64[ms]').astype(np.int64)
+    if values.dtype.kind not in 'biuf':
+        return values.tolist()
+
+    dtype = '<f4' if values.dtype == np.float32 else '<f8'
+    spec = {'dtype': dtype[1:], 'bdata': base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        spec['shape'] = ','.join(str(n) for n in values.shape)
+    return spec
+
+def encode(spec):
+    '''
+    Returns a copy of a figure spec (or trace / Patch value) with its NumPy arrays encoded for the browser.
+    '''
+    if isinstance(spec, dict):
+        return {key: value if key == 'template' else encode(value) for key, value in spec.items()}
+    if isinstance(spec, list):
+        return [encode(value) for value in spec]
+    if isinstance(spec, np.ndarray):
+        return encode_array(spec)
+    return spec
+
+def graph(spec, **kwargs):
+    return dcc.Graph(figure=encode(spec), **kwargs)
@@ -0,0 +1,53 @@
+import base64
+import numpy as np
+import pandas as pd
+
+# Compact columnar encoding of a dated price panel for dcc.Store
+# {'encoding': 'columnar-v1', 'dtype': 'float64', 'rows': n, 'columns': [...],
+#  'dates': base64 int64 ns since epoch, 'values': base64 buffer of the values, column after column}
+# Column names are sent once and dates as integers, so nothing is repeated per row or re-parsed as text.
+encoding = 'columnar-v1'
+default_dtype = 'float64' # 'float32' halves the payload at ~7 significant digits
+
+def is_encoded(data):
+    return isinstance(data, dict) and data.get('encoding') == encoding
+
+def _b64encode(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+
+def _b64decode(text, dtype):
+    # Wraps the decoded bytes without copying -> read-only array
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+def encode_frame(df, dtype=default_dtype):
+    '''
+    Encodes a DataFrame with a datetime index and numeric columns. Returns None if it can't be encoded
+    (non-numeric columns or index), in which case the caller should keep its previous format.
+    '''
+    try:
+        index = pd.DatetimeIndex(df.index)
+        values = df.to_numpy(dtype=dtype).T # One row per column -> columnar layout
+    except (TypeError, ValueError):
+        return None
+
+    return {'encoding': encoding,
+            'dtype': np.dtype(dtype).name,
+            'rows': len(index),
+            'index_name': df.index.name,
+            'columns': [str(col) for col in df.columns],
+            'dates': _b64encode(index.as_unit('ns').asi8),
+            'values': _b64encode(values)}
+
+def decode_frame(data, writable=False):
+    '''
+    Decodes an encoded payload into a DataFrame. float64 values are wrapped without copying, so they are read-only
+    (derived frames are unaffected); set writable to copy them if the frame will be modified in place.
+    '''
+    rows, columns = data['rows'], data['columns']
+    dates = _b64decode(data['dates'], np.int64)
+    values = _b64decode(data['values'], data['dtype']).reshape(len(columns), rows).T # Fortran-ordered view
+    if values.dtype != np.float64 or writable:
+        values = values.astype(np.float64, order='F')
+
+    index = pd.DatetimeIndex(dates.view('datetime64[ns]'), name=data.get('index_name'))
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
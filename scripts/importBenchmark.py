@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run from the repo root:
+#   python -m scripts.importBenchmark                                   -> app startup, exits with 1 over budget
+#   python -m scripts.importBenchmark --statement "import fintix.metricsEngine" --budget 0.6
+#   python -m scripts.importBenchmark --output startup.json
+# Runs the statement in a fresh interpreter with -X importtime (best of --repeat runs) and reports the import time
+# of each package and first-party module (pages are loaded by Dash itself: their imports are listed, not the pages).
+# Fails when the statement takes longer than the budget, when a module's cumulative import time is above its budget,
+# or when a deferred module (see app.deferred_modules) is imported at startup.
+statement = 'from app import create_app; create_app()'
+budget = 2.5 # Seconds, whole statement
+module_budgets = {'scripts.tickerUniverse': 0.05, 'scripts.utils': 0.2} # Seconds, cumulative import time
+deferred_modules = ['quantstats', 'yfinance', 'pyfinviz', 'plotly.figure_factory']
+top_n = 25
+first_party = {'app', 'wsgi', 'scripts', 'pages', 'fintix'}
+
+marker = 'importBenchmark:'
+probe = '''
+import sys, time, json
+start = time.perf_counter()
+{statement}
+print({marker!r} + json.dumps({{'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}}))
+'''
+
+def parse_importtime(stderr):
+    '''
+    Parses -X importtime output into module name -> {'self', 'cumulative'} import times in seconds.
+    '''
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.setdefault(name.strip(), {'self': int(self_us) / 1e6, 'cumulative': int(cumulative_us) / 1e6})
+    return modules
+
+def measure(statement=statement):
+    '''
+    Runs the statement in a fresh interpreter. Returns its duration, the modules it imported and their import times.
+    '''
+    code = probe.format(statement=statement, marker=marker)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=root, capture_output=True, text=True)
+    lines = [line for line in process.stdout.splitlines() if line.startswith(marker)]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f'Statement failed:\n{process.stderr[-2000:]}')
+    result = json.loads(lines[-1][len(marker):])
+    result['imports'] = parse_importtime(process.stderr)
+    return result
+
+def run(statement=statement, repeat=3):
+    '''
+    Best (fastest) of repeat fresh interpreter runs.
+    '''
+    return min((measure(statement) for _ in range(repeat)), key=lambda result: result['seconds'])
+
+def report(result, top_n=top_n):
+    '''
+    Prints the import time per package (sum of its modules' own times) and per first-party module.
+    '''
+    imports = result['imports']
+    print(f'Statement: {result["seconds"] * 1000:.0f}ms, {len(result["modules"])} modules loaded')
+
+    packages = {}
+    for name, times in imports.items():
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + times['self']
+    print(f'\n{"package":<50} {"self":>10}')
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top_n]:
+        print(f'{package:<50} {seconds * 1000:>8.1f}ms')
+
+    print(f'\n{"first-party module":<50} {"cumulative":>10} {"self":>10}')
+    own = [item for item in imports.items() if item[0].split('.')[0] in first_party]
+    for name, times in sorted(own, key=lambda item: -item[1]['cumulative'])[:top_n]:
+        print(f'{name:<50} {times["cumulative"] * 1000:>8.1f}ms {times["self"] * 1000:>8.1f}ms')
+
+def check(result, budget=budget, module_budgets=module_budgets, deferred_modules=deferred_modules):
+    '''
+    Returns the budget violations of a run.
+    '''
+    violations = []
+    if result['seconds'] > budget:
+        violations.append(f'statement took {result["seconds"]:.2f}s > {budget:.2f}s')
+    for name, seconds in module_budgets.items():
+        times = result['imports'].get(name)
+        if times is not None and times['cumulative'] > seconds:
+            violations.append(f'{name} took {times["cumulative"]:.3f}s > {seconds:.3f}s')
+    for name in deferred_modules:
+        if name in result['modules']:
+            violations.append(f'{name} is imported at startup (deferred module)')
+    return violations
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reports the import time per module of the app startup and checks it against a budget.')
+    parser.add_argument('--statement', default=statement, help='Python statement to time (default: app creation)')
+    parser.add_argument('--budget', type=float, default=budget, help='Seconds allowed for the statement')
+    parser.add_argument('--module-budget', action='append', default=[], metavar='MODULE=SECONDS',
+                        help='Cumulative import time allowed for a module (repeatable, adds to the defaults)')
+    parser.add_argument('--allow', action='append', default=[], metavar='MODULE', help='Deferred module allowed at startup (repeatable)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=top_n)
+    parser.add_argument('--output', default=None, help='JSON file to write the results to')
+    args = parser.parse_args()
+
+    budgets = dict(module_budgets)
+    for item in args.module_budget:
+        name, _, seconds = item.partition('=')
+        budgets[name] = float(seconds)
+
+    result = run(args.statement, args.repeat)
+    report(result, args.top)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(result, statement=args.statement, python=sys.version.split()[0]), f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    violations = check(result, args.budget, budgets, [name for name in deferred_modules if name not in args.allow])
+    if violations:
+        print(f'\n{len(violations)} budget violation(s):')
+        for violation in violations:
+            print(f'  {violation}')
+        sys.exit(1)
+    print(f'\nWithin budget ({args.budget:.2f}s)')
@@ -0,0 +1,77 @@
+import quantstats as qs
+import pandas as pd
+import numpy as np
+import sys
+import fintix.metricsEngine as metricsEngine
+
+path = sys.path[0]
+
+# Run from the repo root -> python -m scripts.metricsParity
+# Checks that the vectorized metrics engine matches quantstats column by column.
+
+def quantstats_metrics(data, periods_per_year, rfr):
+    '''
+    Reference metrics computed one quantstats call at a time.
+    '''
+    returns = qs.utils._prepare_returns(data.copy())
+    prices = qs.utils._prepare_prices(returns)
+
+    return pd.DataFrame({
+        'Total Return': qs.stats.comp(returns),
+        'CAGR': qs.stats.cagr(returns, rf=0, compounded=True, periods=periods_per_year),
+        'Avg Return': qs.stats.avg_return(returns, prepare_returns=False),
+        'Avg (+) Return': qs.stats.avg_win(returns, prepare_returns=False),
+        'Avg (-) Return': qs.stats.avg_loss(returns, prepare_returns=False),
+        'Best Return': qs.stats.best(returns, prepare_returns=False),
+        'Worst Return': qs.stats.worst(returns, prepare_returns=False),
+        'Win Rate': qs.stats.win_rate(returns, compounded=False, prepare_returns=False),
+        'Payoff Ratio': qs.stats.payoff_ratio(returns, prepare_returns=False),
+        'Tail Ratio 95%': qs.stats.tail_ratio(returns, cutoff=0.95),
+        'Skew': qs.stats.skew(returns, prepare_returns=False),
+        'Kurtosis': qs.stats.kurtosis(returns, prepare_returns=False),
+        'Kelly Criterion': qs.stats.kelly_criterion(returns, prepare_returns=False),
+        'Volatility': qs.stats.volatility(returns, periods=periods_per_year, annualize=False, prepare_returns=False),
+        'Volatility P.A.': qs.stats.volatility(returns, periods=periods_per_year, annualize=True, prepare_returns=False),
+        'Max Drawdown': qs.stats.max_drawdown(prices),
+        'VaR 95%': pd.Series(qs.stats.value_at_risk(returns, sigma=1, confidence=0.95, prepare_returns=False), index=returns.columns),
+        'CVaR 95%': qs.stats.cvar(returns, sigma=1, confidence=0.95),
+        'Sharpe Ratio': qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=False),
+        'Sharpe Ratio P.A.': qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=True),
+        'Sortino Ratio': qs.stats.sortino(returns, rf=rfr, periods=periods_per_year, annualize=False),
+        'Sortino Ratio P.A.': qs.stats.sortino(returns, rf=rfr, periods=periods_per_year, annualize=True),
+        'Calmar Ratio': qs.stats.calmar(returns, periods=periods_per_year),
+    })
+
+def check_parity(data, periods_per_year=252, rfr=0.02, tolerance=1e-9):
+    '''
+    Returns the largest relative difference per metric between the engine and quantstats.
+    '''
+    expected = quantstats_metrics(data, periods_per_year, rfr)
+    actual = metricsEngine.compute_metrics(data, periods_per_year, rfr)[expected.columns]
+    actual.index = expected.index
+
+    diff = (actual - expected).abs() / expected.abs().clip(lower=1)
+    both_nan = actual.isna() & expected.isna()
+    diff = diff.mask(both_nan, 0).fillna(np.inf)
+    report = diff.max()
+    return report, report[report > tolerance]
+
+if __name__ == '__main__':
+    samples = {
+        'sample-data (dropna)': pd.read_csv(path + '/data/sample-data.csv', index_col=0, parse_dates=True).dropna(),
+        'prices (dropna)': pd.read_csv(path + '/data/prices.csv', index_col=0, parse_dates=True).dropna(),
+        'prices (with inception gaps)': pd.read_csv(path + '/data/prices.csv', index_col=0, parse_dates=True).ffill(),
+        'prices (monthly)': pd.read_csv(path + '/data/prices.csv', index_col=0, parse_dates=True).dropna().resample('ME').last(),
+    }
+
+    failed = False
+    for name, data in samples.items():
+        for periods_per_year, rfr in [(252, 0.02), (252, 0), (12, 0.05)]:
+            report, mismatches = check_parity(data, periods_per_year, rfr)
+            status = 'OK' if mismatches.empty else 'MISMATCH'
+            print(f'{name} | periods={periods_per_year} rfr={rfr} | max rel diff {report.max():.2e} | {status}')
+            if not mismatches.empty:
+                print(mismatches)
+                failed = True
+
+    sys.exit(1 if failed else 0)
@@ -1,84 +1,14 @@
-import pandas as pd
-import numpy as np
-import quantstats as qs
 from dash import dash_table
-from collections import OrderedDict
 from dash.dash_table import FormatTemplate
 from dash.dash_table.Format import Format, Scheme
 import scripts.style as style
-import scripts.utils as utils
+import fintix.metricsEngine as metricsEngine
 
 def create_metrics_table(data, periods_per_year, rfr, round_to=2):
-    prices = data.copy()
-    assets = prices.columns.to_list()
-    returns = qs.utils._prepare_returns(prices)
-    prices = qs.utils._prepare_prices(returns)
+    df = metricsEngine.compute_metrics_table(data, periods_per_year, rfr).reset_index()
+    for col in ['Start Date', 'End Date', 'Max Drawdown Date']:
+        df[col] = df[col].dt.strftime("%m/%d/%Y")
 
-    # Setup dates lookback
-    last_date = prices.index[-1]
-    week_date, _ = utils.retrieve_date_from_lookback(data, '1w')
-    mtd_date, _ = utils.retrieve_date_from_lookback(data, 'mtd')
-    m3_date, _ = utils.retrieve_date_from_lookback(data, '3m')
-    m6_date, _ = utils.retrieve_date_from_lookback(data, '6m')
-    ytd_date, _ = utils.retrieve_date_from_lookback(data, 'ytd')
-    y1_date, _ = utils.retrieve_date_from_lookback(data, '1y')
-    y3_date, _ = utils.retrieve_date_from_lookback(data, '3y')
-    y5_date, _ = utils.retrieve_date_from_lookback(data, '5y')
-
-    data = OrderedDict(
-        [
-            # Params loaded and info
-            ('Asset', prices.columns),
-            ('Start Date', [returns[a].first_valid_index().strftime("%m/%d/%Y") for a in assets]),
-            ('End Date', [returns[a].last_valid_index().strftime("%m/%d/%Y") for a in assets]),
-            ('Data Points', list(np.repeat(returns.shape[0], len(assets)))),
-            ('Periods Per Year', list(np.repeat(periods_per_year, len(assets)))),
-            ('Risk-free Rate', list(np.repeat(rfr, len(assets)))),
-            
-            # Returns 
-            ('1W Return', prices.loc[last_date] / prices.loc[week_date:].iloc[0] - 1),  # iloc[0] in case weekly date wasn't available so we retrieve the closest date.
-            ('MTD Return', prices.loc[last_date] / prices.loc[mtd_date:].iloc[0] - 1),
-            ('3M Return', (prices.loc[last_date] / prices.loc[m3_date:].iloc[0]) -1),
-            ('6M Return', (prices.loc[last_date] / prices.loc[m6_date:].iloc[0]) -1),
-            ('YTD Return', (prices.loc[last_date] / prices.loc[ytd_date:].iloc[0]) -1),
-            ('1Y Return', (prices.loc[last_date] / prices.loc[y1_date:].iloc[0]) -1),
-            ('3Y Return', (prices.loc[last_date] / prices.loc[y3_date:].iloc[0]) -1),
-            ('5Y Return', (prices.loc[last_date] / prices.loc[y5_date:].iloc[0]) -1),
-            ('Total Return', qs.stats.comp(returns)),
-            ('CAGR', qs.stats.cagr(returns, rf=0, compounded=True)),
-            ('Avg Return', qs.stats.avg_return(returns, aggregate=None, compounded=True, prepare_returns=False)),
-            ('Avg (+) Return', qs.stats.avg_win(returns, aggregate=None, compounded=True, prepare_returns=False)),
-            ('Avg (-) Return', qs.stats.avg_loss(returns, aggregate=None, compounded=True, prepare_returns=False)),
-            ('Best Return', qs.stats.best(returns, aggregate=None, compounded=True, prepare_returns=False)),
-            ('Worst Return', qs.stats.worst(returns, aggregate=None, compounded=True, prepare_returns=False)),
-            
-            # Stats
-            ('Win Rate', qs.stats.win_rate(returns, aggregate=None, compounded=False, prepare_returns=False)),
-            ('Loss Rate', 1 - qs.stats.win_rate(returns, aggregate=None, compounded=False, prepare_returns=False)),
-            ('Payoff Ratio', qs.stats.payoff_ratio(returns, prepare_returns=False)),
-            ('Tail Ratio 95%', qs.stats.tail_ratio(returns, cutoff=0.95, prepare_returns=True)),
-            ('Skew', qs.stats.skew(returns, prepare_returns=False)),
-            ('Kurtosis', qs.stats.kurtosis(returns, prepare_returns=False)),
-            ('Kelly Criterion', qs.stats.kelly_criterion(returns, prepare_returns=False)),
-
-            # Risk
-            ('Volatility', qs.stats.volatility(returns, periods=periods_per_year, annualize=False, prepare_returns=False)),
-            ('Volatility P.A.', qs.stats.volatility(returns, periods=periods_per_year, annualize=True, prepare_returns=False)),
-            ('Max Drawdown', qs.stats.max_drawdown(prices)),
-            ('Max Drawdown Date', [i.strftime("%m/%d/%Y") for i in (prices/prices.cummax()-1).idxmin()]),
-            ('VaR 95%', qs.stats.value_at_risk(returns, sigma=1, confidence=0.95, prepare_returns=False)),
-            ('CVaR 95%', qs.stats.cvar(returns, sigma=1, confidence=0.95, prepare_returns=True)),
-
-            # Risk-adjusted Ratios
-            ('Sharpe Ratio', qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=False)),
-            ('Sharpe Ratio P.A.', qs.stats.sharpe(returns, rf=rfr, periods=periods_per_year, annualize=True)),
-            ('Sortino Ratio', qs.stats.sortino(returns, rf=rfr, periods=periods_per_year, annualize=False)),
-            ('Sortino Ratio P.A.', qs.stats.sortino(returns, rf=rfr, periods=periods_per_year, annualize=True)),
-            ('Calmar Ratio', qs.stats.calmar(returns, prepare_returns=True)),
-            
-        ])
-
-    df = pd.DataFrame(data)
     data = df.to_dict('records')
     
     columns = [
@@ -0,0 +1,58 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Background computation of the displays the user is likely to open next.
+# Threads rather than processes: the results land in the in-process resultCache that serves the callbacks.
+max_workers = 2
+executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precompute')
+
+_jobs = {} # group -> (cancel Event, futures)
+_lock = threading.Lock()
+
+def _reset_after_fork():
+    # The parent's threads don't exist in a forked child (server worker, background job)
+    global executor, _lock
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precompute')
+    _lock = threading.Lock()
+    _jobs.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def schedule(group, tasks):
+    '''
+    Runs tasks [(function, args)] in the background, cancelling whatever was still scheduled for the same group
+    (e.g. the same browser tab with a previous dataset or parameters). Tasks that already started run to completion.
+    '''
+    cancel(group)
+    cancelled = threading.Event()
+    futures = [executor.submit(_run, cancelled, func, args) for func, args in tasks]
+    with _lock:
+        for finished in [g for g, (_, f) in _jobs.items() if all(future.done() for future in f)]:
+            del _jobs[finished]
+        _jobs[group] = (cancelled, futures)
+    return futures
+
+def cancel(group):
+    with _lock:
+        job = _jobs.pop(group, None)
+    if job is None:
+        return
+    cancelled, futures = job
+    cancelled.set()
+    for future in futures:
+        future.cancel()
+
+def _run(cancelled, func, args):
+    if cancelled.is_set():
+        return False
+    try:
+        func(*args)
+        return True
+    except Exception as e:
+        print(f'Precompute of {func.__name__} failed: {e}')
+        return False
+
+def info():
+    with _lock:
+        return {group: sum(not future.done() for future in futures) for group, (_, futures) in _jobs.items()}
@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+import contextlib
+import threading
+import time
+import json
+import uuid
+import os
+import re
+try:
+    import fcntl
+except ImportError: # Windows -> locks only apply within a process
+    fcntl = None
+
+# Columnar price store
+# <store>/manifest.json       -> committed row count, dtype, and per-ticker file + first row
+# <store>/dates-<gen>.i8      -> int64 (ns since epoch) date index shared by all tickers
+# <store>/<ticker>-<gen>.bin  -> one file per ticker holding its values from its first valid row onwards
+#
+# A full rewrite writes a new generation of files and swaps the manifest, which is replaced atomically once the
+# data is on disk. An append truncates and rewrites the tail of the current files in place: readers hold a shared
+# lock on the store (read_lock) while they read the manifest and data, so they never see a tail being rewritten.
+# Every write bumps the manifest's data_version, which readers use to tell whether cached results are stale.
+
+manifest_name = 'manifest.json'
+lock_name = '.lock'
+refresh_name = 'refresh.json'
+default_dtype = 'float64'
+_write_lock = threading.Lock()
+_lock_state = threading.local()
+
+def exists(store_path):
+    return os.path.exists(os.path.join(store_path, manifest_name))
+
+def read_manifest(store_path):
+    with open(os.path.join(store_path, manifest_name)) as f:
+        return json.load(f)
+
+def _write_json(store_path, name, content):
+    tmp = os.path.join(store_path, f'.{name}.{uuid.uuid4().hex}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(content, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(store_path, name))
+
+def _write_manifest(store_path, manifest):
+    _write_json(store_path, manifest_name, manifest)
+
+def data_version(store_path):
+    '''
+    Returns the version of the stored data, bumped on every write (0 if the store doesn't exist).
+    '''
+    if not exists(store_path):
+        return 0
+    return read_manifest(store_path).get('data_version', 0)
+
+@contextlib.contextmanager
+def store_lock(store_path, blocking=True):
+    '''
+    Exclusive lock on the store shared by all processes (and threads) of the host, re-entrant within a thread.
+    Yields whether the lock was acquired, which is always True when blocking.
+    '''
+    if getattr(_lock_state, 'depth', 0): # Already held by this thread
+        _lock_state.depth += 1
+        try:
+            yield True
+        finally:
+            _lock_state.depth -= 1
+        return
+
+    if not _write_lock.acquire(blocking):
+        yield False
+        return
+    try:
+        os.makedirs(store_path, exist_ok=True)
+        with open(os.path.join(store_path, lock_name), 'w') as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            _lock_state.depth = 1
+            try:
+                yield True
+            finally:
+                _lock_state.depth = 0
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        _write_lock.release()
+
+@contextlib.contextmanager
+def read_lock(store_path):
+    '''
+    Shared lock on the store held by readers: excludes writers (store_lock) but not other readers.
+    Not taken again by a thread that holds the exclusive lock.
+    '''
+    if getattr(_lock_state, 'depth', 0):
+        yield
+        return
+    if fcntl is None: # Within a process only
+        with _write_lock:
+            yield
+        return
+    with open(os.path.join(store_path, lock_name), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def last_refreshed(store_path):
+    '''
+    Returns the time (seconds since epoch) of the last completed refresh from the data provider, 0 if never.
+    '''
+    try:
+        with open(os.path.join(store_path, refresh_name)) as f:
+            return json.load(f)['refreshed_at']
+    except (OSError, ValueError, KeyError):
+        return 0
+
+def mark_refreshed(store_path, refreshed_at=None):
+    _write_json(store_path, refresh_name, {'refreshed_at': time.time() if refreshed_at is None else refreshed_at})
+
+def _file_name(ticker, generation, taken):
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', str(ticker))
+    while name in taken: # Different tickers that sanitize to the same name
+        name += '_'
+    taken.add(name)
+    return f'{name}-{generation}.bin'
+
+def _to_int_dates(index):
+    return pd.DatetimeIndex(index).as_unit('ns').asi8.astype(np.int64)
+
+def _read_dates(store_path, manifest):
+    return np.fromfile(os.path.join(store_path, manifest['dates_file']), dtype=np.int64, count=manifest['rows'])
+
+def _read_values(store_path, manifest, ticker, lo, hi):
+    '''
+    Reads rows [lo, hi) of a ticker, NaN before its first stored row.
+    '''
+    dtype = np.dtype(manifest['dtype'])
+    entry = manifest['tickers'][ticker]
+    values = np.full(hi - lo, np.nan, dtype=np.float64)
+    first = max(lo, entry['start'])
+    if first < hi:
+        values[first - lo:] = np.fromfile(os.path.join(store_path, entry['file']),
+                                            dtype=dtype,
+                                            count=hi - first,
+                                            offset=(first - entry['start']) * dtype.itemsize)
+    return values
+
+def last_date(store_path):
+    '''
+    Returns the last stored date without loading any prices.
+    '''
+    with read_lock(store_path):
+        manifest = read_manifest(store_path)
+        if manifest['rows'] == 0:
+            return None
+        dates = np.fromfile(os.path.join(store_path, manifest['dates_file']), dtype=np.int64,
+                            count=1, offset=(manifest['rows'] - 1) * 8)
+    return pd.Timestamp(dates[0])
+
+def load_prices(store_path, tickers=None, start=None, end=None):
+    '''
+    Loads prices for a subset of tickers and dates from the store.
+    Only the requested rows of the requested tickers are read from disk.
+    '''
+    with read_lock(store_path): # The manifest and the files it points to, as one snapshot
+        manifest = read_manifest(store_path)
+        dates = _read_dates(store_path, manifest)
+        tickers = list(manifest['tickers']) if tickers is None else [t for t in tickers if t in manifest['tickers']]
+
+        lo = 0 if start is None else int(np.searchsorted(dates, _to_int_dates([pd.Timestamp(start)])[0], side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _to_int_dates([pd.Timestamp(end)])[0], side='right'))
+        hi = max(lo, hi)
+
+        data = {t: _read_values(store_path, manifest, t, lo, hi) for t in tickers}
+    index = pd.DatetimeIndex(dates[lo:hi].view('datetime64[ns]'), name='Date')
+    return pd.DataFrame(data, index=index, columns=tickers)
+
+def save_prices(prices, store_path, dtype=default_dtype):
+    '''
+    Writes a full snapshot of a price panel (dates x tickers) as a new generation of files.
+    '''
+    prices = prices.sort_index()
+    prices = prices[~prices.index.duplicated(keep='last')]
+    generation = uuid.uuid4().hex[:8]
+
+    with store_lock(store_path):
+        previous = read_manifest(store_path) if exists(store_path) else None
+
+        manifest = {'version': 1, 'dtype': np.dtype(dtype).name, 'rows': len(prices),
+                    'data_version': (previous or {}).get('data_version', 0) + 1,
+                    'dates_file': f'dates-{generation}.i8', 'tickers': {}}
+        _to_int_dates(prices.index).tofile(os.path.join(store_path, manifest['dates_file']))
+
+        taken = set()
+        for ticker in prices.columns:
+            values = prices[ticker].to_numpy(dtype=np.float64)
+            valid = np.flatnonzero(~np.isnan(values))
+            start = int(valid[0]) if len(valid) else len(values)
+            entry = {'file': _file_name(ticker, generation, taken), 'start': start}
+            values[start:].astype(manifest['dtype']).tofile(os.path.join(store_path, entry['file']))
+            manifest['tickers'][str(ticker)] = entry
+
+        _write_manifest(store_path, manifest)
+
+        # Remove the previous generation
+        if previous is not None:
+            for name in [previous['dates_file']] + [e['file'] for e in previous['tickers'].values()]:
+                try:
+                    os.remove(os.path.join(store_path, name))
+                except OSError:
+                    pass
+
+def append_prices(prices, store_path):
+    '''
+    Writes new and revised rows to the store.
+    Rows from the first date of `prices` onwards are rewritten (new values win, existing values fill gaps);
+    everything before it is left untouched, so a daily refresh only writes a few rows per ticker.
+    '''
+    prices = prices.sort_index()
+    prices = prices[~prices.index.duplicated(keep='last')]
+    prices.columns = prices.columns.astype(str)
+    if prices.empty:
+        return
+
+    with store_lock(store_path):
+        manifest = read_manifest(store_path)
+        dtype = np.dtype(manifest['dtype'])
+        dates = _read_dates(store_path, manifest)
+        pos = int(np.searchsorted(dates, _to_int_dates(prices.index[:1])[0], side='left'))
+
+        # Merge the overlapping tail with the new rows
+        tickers = list(manifest['tickers']) + [t for t in prices.columns if t not in manifest['tickers']]
+        old_tail = pd.DataFrame({t: _read_values(store_path, manifest, t, pos, len(dates)) for t in manifest['tickers']},
+                                index=pd.DatetimeIndex(dates[pos:].view('datetime64[ns]')))
+        tail = prices.combine_first(old_tail).reindex(columns=tickers)
+        # Carry the last stored price into the new rows, as the full snapshot does
+        if pos > 0:
+            seed = pd.DataFrame({t: _read_values(store_path, manifest, t, pos - 1, pos) for t in manifest['tickers']},
+                                index=pd.DatetimeIndex(dates[pos - 1:pos].view('datetime64[ns]')))
+            tail = pd.concat([seed.reindex(columns=tickers), tail]).ffill().iloc[1:]
+        else:
+            tail = tail.ffill()
+
+        # Readers are excluded by the lock; if the process dies mid-write, the store stays valid up to the tail
+        truncated = dict(manifest, rows=pos)
+        _write_manifest(store_path, truncated)
+
+        generation = manifest['dates_file'].split('-', 1)[1].split('.')[0]
+        taken = {e['file'].rsplit('-', 1)[0] for e in manifest['tickers'].values()}
+        with open(os.path.join(store_path, manifest['dates_file']), 'r+b') as f:
+            f.truncate(pos * 8)
+            f.seek(0, os.SEEK_END)
+            _to_int_dates(tail.index).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        for ticker in tickers:
+            values = tail[ticker].to_numpy(dtype=np.float64)
+            entry = manifest['tickers'].get(ticker)
+            if entry is None:
+                entry = {'file': _file_name(ticker, generation, taken), 'start': pos + len(values)}
+                manifest['tickers'][ticker] = entry
+
+            if entry['start'] >= pos: # Ticker starts inside the tail: its file is rewritten
+                valid = np.flatnonzero(~np.isnan(values))
+                entry['start'] = pos + (int(valid[0]) if len(valid) else len(values))
+                keep = 0
+                values = values[entry['start'] - pos:]
+            else:
+                keep = pos - entry['start']
+
+            file_path = os.path.join(store_path, entry['file'])
+            with open(file_path, 'r+b' if os.path.exists(file_path) else 'w+b') as f:
+                f.truncate(keep * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.astype(dtype).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+        manifest['rows'] = pos + len(tail)
+        manifest['data_version'] = manifest.get('data_version', 0) + 1
+        _write_manifest(store_path, manifest)
+
+def import_csv(csv_path, store_path, dtype=default_dtype):
+    '''
+    Builds the store from a prices csv file (Date index followed by one column per ticker).
+    '''
+    prices = pd.read_csv(csv_path, index_col=0)
+    prices.index = pd.to_datetime(prices.index)
+    save_prices(prices.ffill(), store_path, dtype)
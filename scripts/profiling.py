@@ -0,0 +1,241 @@
+import collections
+import contextlib
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import fintix.dataCache as dataCache
+import scripts.frameCodec as frameCodec
+
+# On-demand profiling of single callback requests, e.g. with the request copied from the browser's network tab:
+#   curl ... -H 'X-Fintix-Profile: <token>' http://host/_dash-update-component
+# (or ?profile=<token>, or a fintix_profile=<token> cookie to profile every callback of a browser session).
+# The callback (or the background job it starts) runs under cProfile and a sampling profiler; each profile is
+# written to its own folder of profile_path: top.txt (top functions), stacks.collapsed (flamegraph.pl / speedscope
+# input) or profile.html (pyinstrument), cprofile.prof (pstats) and request.json (callback and scrubbed parameters).
+token = os.environ.get('FINTIX_PROFILE_TOKEN') # Profiling is disabled without a token
+profile_path = os.environ.get('FINTIX_PROFILE_DIR', os.path.join(dataCache.default_shared_cache_path, 'profiles'))
+sampler = os.environ.get('FINTIX_PROFILE_SAMPLER', 'stack') # 'stack' (built-in), 'pyinstrument' or 'none'
+sample_interval = 0.005 # Seconds
+top_n = 40
+header = 'X-Fintix-Profile'
+query_flag = 'profile'
+cookie = 'fintix_profile'
+
+# Inputs / states whose values are never written: uploaded data and anything that looks like a credential
+scrubbed_properties = {'contents', 'data', 'filename', 'last_modified'}
+sensitive_names = re.compile('token|password|secret|key|auth|cookie|session', re.IGNORECASE)
+
+_local = threading.local() # Profile requested by the current request; inherited by the background jobs it forks
+_busy = threading.Lock() # One profile at a time per process
+
+def _reset_after_fork():
+    # A background job forked while its request is profiled starts its own profile
+    global _busy
+    sys.setprofile(None)
+    _busy = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+#------------------- Samplers -------------------
+class StackSampler:
+    '''
+    Samples the Python stack of one thread at a fixed interval and counts identical stacks (collapsed stacks).
+    '''
+    def __init__(self, thread_id, interval=sample_interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def write(self, folder):
+        with open(os.path.join(folder, 'stacks.collapsed'), 'w') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+    def summary(self):
+        total = sum(self.counts.values())
+        leaves = collections.Counter()
+        for stack, count in self.counts.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        lines = [f'Sampled stacks ({total} samples every {self.interval * 1000:g}ms), top functions by own samples:']
+        lines += [f'{count:>8} {count / total:>7.1%}  {frame}' for frame, count in leaves.most_common(top_n)] if total else []
+        return '\n'.join(lines)
+
+class PyinstrumentSampler:
+    '''
+    pyinstrument's profiler (started from the profiled thread), rendered as HTML.
+    '''
+    def __init__(self, interval=sample_interval):
+        import pyinstrument
+        self.profiler = pyinstrument.Profiler(interval=interval)
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def write(self, folder):
+        with open(os.path.join(folder, 'profile.html'), 'w') as f:
+            f.write(self.profiler.output_html())
+
+    def summary(self):
+        return self.profiler.output_text(unicode=False, color=False)
+
+def create_sampler():
+    if sampler == 'pyinstrument':
+        try:
+            return PyinstrumentSampler()
+        except ImportError:
+            print('pyinstrument is not installed, using the built-in stack sampler.')
+    if sampler == 'none':
+        return None
+    return StackSampler(threading.get_ident())
+
+#------------------- Profiles -------------------
+@contextlib.contextmanager
+def profile(name, details=None):
+    '''
+    Profiles the enclosed code of the current thread and writes the results to a new folder of profile_path.
+    Skipped (without error) while another profile runs in the process.
+    '''
+    if not _busy.acquire(blocking=False):
+        yield
+        return
+    try:
+        profiler = cProfile.Profile()
+        samples = create_sampler()
+        if samples is not None:
+            samples.start()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            if samples is not None:
+                samples.stop()
+            write_profile(name, duration, profiler, samples, details or {})
+    finally:
+        _busy.release()
+
+def write_profile(name, duration, profiler, samples, details):
+    try:
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        folder = os.path.join(profile_path, f"{stamp}-{os.getpid()}-{re.sub('[^A-Za-z0-9-]+', '_', name).strip('_')[:80]}")
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+
+        profiler.dump_stats(os.path.join(folder, 'cprofile.prof'))
+        with open(os.path.join(folder, 'request.json'), 'w') as f:
+            json.dump(dict(details, callback=name, duration=duration, pid=os.getpid()), f, indent=2, default=str)
+
+        stream = io.StringIO()
+        stream.write(f'{name}: {duration * 1000:.1f}ms (pid {os.getpid()})\n\n')
+        stats = pstats.Stats(profiler, stream=stream).strip_dirs()
+        stats.sort_stats('cumulative').print_stats(top_n)
+        stats.sort_stats('tottime').print_stats(top_n)
+        if samples is not None:
+            samples.write(folder)
+            stream.write(samples.summary() + '\n')
+        with open(os.path.join(folder, 'top.txt'), 'w') as f:
+            f.write(stream.getvalue())
+        print(f'Profile of {name} written to {folder}')
+    except Exception as e:
+        print(f"Couldn't write the profile of {name}: {e}")
+
+#------------------- Requests -------------------
+def scrub(value, prop_id):
+    '''
+    Replaces the value of a sensitive input by a description of its size.
+    '''
+    component, _, prop = prop_id.rpartition('.')
+    if prop not in scrubbed_properties and not sensitive_names.search(prop_id):
+        return value
+    if frameCodec.is_encoded(value):
+        return f'<scrubbed: {value["rows"]} rows x {len(value["columns"])} columns>'
+    if isinstance(value, dict) and 'cache_key' in value:
+        df = dataCache.get_dataset(value['cache_key'])
+        return f'<scrubbed: {df.shape[0]} rows x {df.shape[1]} columns>' if df is not None else '<scrubbed: expired dataset>'
+    if isinstance(value, (list, str)):
+        return f'<scrubbed: {type(value).__name__} of length {len(value)}>'
+    return '<scrubbed>'
+
+def request_details(body):
+    '''
+    Callback output and parameters of a callback request body, with the sensitive values scrubbed.
+    '''
+    details = {'output': body.get('output'), 'triggered': body.get('changedPropIds')}
+    for group in ['inputs', 'state']:
+        items = []
+        for item in body.get(group) or []:
+            if isinstance(item, dict) and 'id' in item:
+                prop_id = f"{item['id']}.{item.get('property')}"
+                items.append({'id': prop_id, 'value': scrub(item.get('value'), prop_id)})
+            else: # Pattern matching inputs -> ids only
+                items.append({'id': str(item)[:200], 'value': '<not recorded>'})
+        details[group] = items
+    return details
+
+def requested_flag(request):
+    value = request.headers.get(header) or request.args.get(query_flag) or request.cookies.get(cookie)
+    return token is not None and value is not None and hmac.compare_digest(value, token)
+
+def requested_job():
+    '''
+    Details of the request that asked for a profile, inside the background job it started (None otherwise).
+    '''
+    return getattr(_local, 'request', None)
+
+def init_app(app):
+    '''
+    Profiles the callback requests that carry the profile flag (only if a token is configured).
+    '''
+    import flask
+    server = app.server
+
+    @server.before_request
+    def start_profile():
+        _local.request = None
+        request = flask.request
+        if token is None or not request.path.endswith('/_dash-update-component') or 'cacheKey' in request.args:
+            return
+        if not requested_flag(request):
+            return
+        details = request_details(request.get_json(silent=True) or {})
+        _local.request = details
+        stack = contextlib.ExitStack()
+        stack.enter_context(profile(str(details['output']), details))
+        flask.g.profile = stack
+
+    @server.teardown_request
+    def stop_profile(exception=None):
+        _local.request = None
+        stack = flask.g.pop('profile', None)
+        if stack is not None:
+            stack.close()
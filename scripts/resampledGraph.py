@@ -0,0 +1,103 @@
+import uuid
+import numpy as np
+import pandas as pd
+from dash import callback, Input, Output, State, MATCH, Patch
+from dash.exceptions import PreventUpdate
+import fintix.dataCache as dataCache
+import fintix.downsample as downsample
+import scripts.figures as figures
+
+# Full resolution traces of the resampled graphs, re-read when the user zooms
+trace_cache = dataCache.DatasetCache(max_entries=256, max_bytes=256 * 1024 ** 2)
+
+def _trace_size(traces):
+    return sum(x.nbytes + y.nbytes for _, x, y in traces)
+
+def _resample(figure_data, traces, start=None, end=None, n_out=downsample.max_points, method='minmax'):
+    '''
+    Writes the downsampled points of each cached trace within [start, end] into figure_data (figure data or a Patch).
+    '''
+    for position, x, y in traces:
+        lo, hi = downsample.window_indices(x, start, end)
+        keep = downsample.downsample_indices(x[lo:hi], y[lo:hi], n_out, method) + lo
+        figure_data[position]['x'] = figures.encode_array(x[keep])
+        figure_data[position]['y'] = figures.encode_array(y[keep])
+
+def create_graph(figure, n_out=downsample.max_points, method='minmax', **kwargs):
+    '''
+    Wraps a line chart (figures spec) in a dcc.Graph that only ships n_out points per trace to the browser.
+    The full traces stay on the server and the visible range is re-sampled at full detail on zoom
+    (drag, range selector buttons or range slider). Charts with short traces are returned as a plain graph.
+    '''
+    traces = []
+    for position, trace in enumerate(figure['data']):
+        x, y = trace.get('x'), trace.get('y')
+        if trace.get('type') not in ('scatter', 'scattergl') or x is None or y is None or len(x) <= n_out:
+            continue
+        x = np.asarray(x)
+        if x.dtype.kind not in 'MO': # Only time series are resampled
+            continue
+        try:
+            x = pd.DatetimeIndex(x).values
+        except (TypeError, ValueError):
+            continue
+        traces.append((position, x, np.asarray(y, dtype=np.float64)))
+
+    if not traces:
+        return figures.graph(figure, **kwargs)
+
+    key = uuid.uuid4().hex
+    entry = {'traces': traces, 'n_out': n_out, 'method': method}
+    trace_cache.put(key, entry, size=_trace_size(traces))
+    shared = dataCache.shared_cache('traces') # Zoom events may be served by another worker
+    if shared is not None:
+        shared.put(key, entry)
+    figure = {'data': [dict(trace) for trace in figure['data']],
+                'layout': dict(figure['layout'], uirevision=key)} # Keep the user's zoom when the traces are replaced
+    _resample(figure['data'], traces, n_out=n_out, method=method)
+    return figures.graph(figure, id={'type': 'resampled-graph', 'index': key}, **kwargs)
+
+def retrieve_traces(key):
+    '''
+    Returns the cached full resolution traces of a graph, from this process or the shared cache.
+    '''
+    entry = trace_cache.get(key)
+    shared = dataCache.shared_cache('traces')
+    if entry is None and shared is not None:
+        entry = shared.get(key)
+        if entry is not None:
+            trace_cache.put(key, entry, size=_trace_size(entry['traces']))
+    return entry
+
+def _relayout_range(relayout_data):
+    '''
+    Returns the (start, end) x range of a relayout event, (None, None) on autorange, or False if the x range didn't change.
+    '''
+    if relayout_data.get('xaxis.autorange'):
+        return None, None
+    if 'xaxis.range' in relayout_data:
+        start, end = relayout_data['xaxis.range']
+    elif 'xaxis.range[0]' in relayout_data:
+        start, end = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    else:
+        return False
+    return pd.Timestamp(start).to_datetime64(), pd.Timestamp(end).to_datetime64()
+
+@callback(Output({'type': 'resampled-graph', 'index': MATCH}, 'figure'),
+            Input({'type': 'resampled-graph', 'index': MATCH}, 'relayoutData'),
+            State({'type': 'resampled-graph', 'index': MATCH}, 'id'),
+            prevent_initial_call=True)
+def update_resampled_graph(relayout_data, graph_id):
+    if not relayout_data:
+        raise PreventUpdate
+    window = _relayout_range(relayout_data)
+    if window is False:
+        raise PreventUpdate
+
+    entry = retrieve_traces(graph_id['index'])
+    if entry is None: # Expired -> keep the downsampled view
+        raise PreventUpdate
+
+    patch = Patch()
+    _resample(patch['data'], entry['traces'], *window, n_out=entry['n_out'], method=entry['method'])
+    return patch
@@ -0,0 +1,170 @@
+import datetime
+import functools
+import inspect
+import os
+import threading
+import numpy as np
+import pandas as pd
+import fintix.dataCache as dataCache
+
+# Rendered results of the tab displays, keyed by the dataset's fingerprint and the normalized parameters
+# -> switching back to a tab with unchanged filters and parameters is a lookup
+enabled = True
+max_entries = 64
+max_bytes = 256 * 1024 ** 2 # 256MB
+result_cache = dataCache.DatasetCache(max_entries=max_entries, max_bytes=max_bytes)
+
+_stats = {} # function name -> {'hits', 'misses'}
+_stats_lock = threading.Lock()
+_in_flight = {} # key -> Event set once the result is cached, so that concurrent calls wait instead of recomputing
+
+def _reset_after_fork():
+    # Computations in flight in the parent never complete in a forked child (server worker, background job),
+    # counters restart so that each process only counts its own calls
+    global _stats_lock
+    _stats_lock = threading.Lock()
+    _in_flight.clear()
+    _stats.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def normalize(value):
+    '''
+    Hashable, canonical form of a callback parameter: DataFrames by fingerprint, numbers as floats
+    (2 == 2.0 == '2'), dates as ISO strings, lists as tuples.
+    '''
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('frame', dataCache.frame_fingerprint(value.to_frame() if isinstance(value, pd.Series) else value))
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return round(float(value), 12)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return round(float(value), 12)
+        except ValueError:
+            return value
+    if isinstance(value, (datetime.date, pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, (list, tuple, pd.Index, np.ndarray)):
+        return tuple(normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize(v)) for k, v in value.items()))
+    return repr(value)
+
+def cache_key(name, signature, args, kwargs):
+    '''
+    Key of a call, with its arguments bound by name and defaults applied (f(x, 2) == f(x, b=2.0)).
+    '''
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dataCache.content_hash(repr((name, normalize(bound.arguments))))
+
+def result_size(value):
+    '''
+    Approximate memory footprint of a result (Dash component tree, figure spec, DataFrame) in bytes.
+    '''
+    size, stack = 0, [value]
+    while stack:
+        value = stack.pop()
+        if hasattr(value, 'to_plotly_json'): # Dash components -> their props
+            value = value.to_plotly_json()
+            value = value.get('props', value) if isinstance(value, dict) else value
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        elif isinstance(value, np.ndarray):
+            size += value.nbytes
+        elif isinstance(value, (pd.DataFrame, pd.Series)):
+            size += dataCache.frame_size(value)
+        elif isinstance(value, dict):
+            size += 64 * len(value)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            size += 8 * len(value)
+            stack.extend(value)
+        else:
+            size += 16
+    return size
+
+def _count(name, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(name, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+def memoize(func):
+    '''
+    Caches the results of func in result_cache (LRU, with a TTL and memory budget).
+    Results are shared between calls, they must not be modified by the callers.
+    A call whose result is being computed by another thread (e.g. a background precompute) waits for it.
+    When a shared cache is configured (dataCache.use_shared_cache), results are also shared with the other workers,
+    and a call whose result is being computed by another process (worker, background job) waits for it too.
+    '''
+    name = f'{func.__module__}.{func.__qualname__}'
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+
+        key = cache_key(name, signature, args, kwargs)
+        result = result_cache.get(key)
+        if result is not None:
+            _count(name, 'hits')
+            return result
+
+        with _stats_lock:
+            event = _in_flight.get(key)
+            owner = event is None
+            if owner:
+                event = _in_flight[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            result = result_cache.get(key)
+            if result is not None:
+                _count(name, 'hits')
+                return result
+
+        claimed = False
+        try:
+            # Computed by another worker process or background job, or being computed (claimed) by one
+            shared = dataCache.shared_cache('results')
+            result = shared.get(key) if shared is not None else None
+            if result is None and shared is not None:
+                claimed = shared.claim(key)
+                if not claimed:
+                    result = shared.wait(key)
+            if result is not None:
+                _count(name, 'hits')
+                result_cache.put(key, result, size=result_size(result))
+                return result
+
+            _count(name, 'misses')
+            result = func(*args, **kwargs)
+            result_cache.put(key, result, size=result_size(result))
+            if shared is not None:
+                shared.put(key, result)
+        finally:
+            if claimed:
+                shared.release(key)
+            if owner:
+                with _stats_lock:
+                    _in_flight.pop(key, None)
+                event.set()
+        return result
+    return wrapper
+
+def info():
+    '''
+    Cache occupancy with the overall and per function hit / miss counters.
+    '''
+    with _stats_lock:
+        functions = {name: dict(counters) for name, counters in _stats.items()}
+    return dict(result_cache.info(), functions=functions)
+
+def clear():
+    result_cache.clear()
+    with _stats_lock:
+        _stats.clear()
@@ -1,38 +1,17 @@
 import pandas as pd
-import quantstats as qs
 from dash import dash_table
 from dash.dash_table import FormatTemplate
-import plotly.graph_objects as go
 import scripts.style as style
-import scripts.utils as utils
+import scripts.figures as figures
+import fintix.priceData as priceData
+import fintix.periodReturns as periodReturns
+import fintix.metricsEngine as metricsEngine
 
 def create_monthly_returns_table(prices, main_asset, round_to=2):
-    returns = qs.utils._prepare_returns(prices)
     percentage = FormatTemplate.percentage(round_to)
 
-    # Prepare returns
-    df = returns.copy()
-    df.reset_index(inplace=True)
-    df['Month'] = (df['Date']).dt.month_name().str[:3] # Create Month column by taking first three letters from Month name
-    df['Year'] = df['Date'].dt.year
-    df = df.drop('Date',axis=1)
-    monthly_grouped_rets = df.groupby([df['Year'], df['Month']]).apply(qs.stats.comp)
-    monthly_grouped_rets.reset_index(inplace=True)
-    monthly_grouped_rets = monthly_grouped_rets.pivot_table(values=main_asset,index='Year',columns='Month')
-
-    # Sort unique months in proper order
-    months_mapping = utils.months_mapping
-
-    unique_months = []
-    for month in months_mapping.values():
-        if month in monthly_grouped_rets.columns:
-            unique_months.append(month)
-    monthly_grouped_rets = monthly_grouped_rets[unique_months] # Re-order monthly returns columns to the proper order
-
-    # Create yearly / total returns and merge them with monthly returns table
-    yearly_grouped_rets = df[['Year',main_asset]].groupby(df['Year']).apply(qs.stats.comp).drop('Year',axis=1).rename(columns={main_asset:'Total'})
-    grouped_rets = pd.merge(monthly_grouped_rets, yearly_grouped_rets, left_on=monthly_grouped_rets.index, right_on=yearly_grouped_rets.index).rename(columns={'key_0':'Year'})
-    grouped_rets.sort_values('Year', ascending=False, inplace=True)
+    # Month x year grid of every asset is computed once per dataset, the main asset is a lookup
+    grouped_rets = periodReturns.monthly_returns_table(prices, main_asset, priceData.months_mapping)
 
     data = grouped_rets.to_dict('records')
     columns = [dict(id=i, name=i, type='numeric', format=percentage) if i!='Year' else dict(id=i, name=i) for i in grouped_rets.columns]
@@ -63,35 +42,27 @@ def create_monthly_returns_table(prices, main_asset, round_to=2):
     return dt
 
 def create_eoyReturns_bar(data):
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-    eoy_returns = qs.utils.aggregate_returns(returns, 'year')
+    eoy_returns = periodReturns.retrieve_period_returns(data)['yearly']
     assets = eoy_returns.columns
-    traces = [go.Bar(x=eoy_returns.index,
+    traces = [figures.bar(x=eoy_returns.index,
                     y=eoy_returns[i],
                     name=i,
-                    text=(eoy_returns[i]*100).apply(lambda x: '{0:.2f}%'.format(x)),
+                    text=[f'{x * 100:.2f}%' for x in eoy_returns[i]],
                     hoverinfo='text') for i in assets]
 
-    layout = go.Layout(style.scatter_charts_layout(title=f'EOY Returns', ytickformat=',.0%'))
-    fig = go.Figure(traces, layout)
-    fig.layout.xaxis.tickvals = eoy_returns.index # Make xaxis dates as categorical instead of continuous
-    return fig
+    layout = figures.layout(title=f'EOY Returns', ytickformat=',.0%', dates=False)
+    layout['xaxis']['tickvals'] = eoy_returns.index.tolist() # Make xaxis dates as categorical instead of continuous
+    return figures.figure(traces, layout)
 
 def create_daily_returns_plot(data, main_asset):
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-    traces = [go.Scatter(x=returns.index, y=returns[main_asset], mode='lines', name=a) for a in [main_asset]]
-    layout = style.scatter_charts_layout(title=f'Returns Series - {main_asset}',  ytickformat=',.1%')
-    fig = go.Figure(traces, layout)
-    fig = style.add_range_slider(fig)
-    return fig
+    returns = metricsEngine.returns_frame(data[[main_asset]])
+    traces = [figures.scatter(x=returns.index, y=returns[main_asset], mode='lines', name=a) for a in [main_asset]]
+    layout = figures.layout(title=f'Returns Series - {main_asset}',  ytickformat=',.1%', range_slider=True)
+    return figures.figure(traces, layout)
 
 def create_returns_box_plot(data):
-    prices = data.copy()
-    assets = prices.columns.to_list()
-    returns = qs.utils._prepare_returns(prices)
-    traces = [go.Box(y=returns[i], name=i) for i in assets]
-    layout = style.scatter_charts_layout(title=f'Returns Quantiles',  ytickformat=',.1%')
-    fig = go.Figure(traces, layout)
-    return fig
+    assets = data.columns.to_list()
+    returns = metricsEngine.returns_frame(data)
+    traces = [figures.box(y=returns[i], name=i) for i in assets]
+    layout = figures.layout(title=f'Returns Quantiles',  ytickformat=',.1%', dates=False)
+    return figures.figure(traces, layout)
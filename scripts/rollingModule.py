@@ -1,62 +1,57 @@
-import quantstats as qs
-import plotly.graph_objs as go
+import numpy as np
 import scripts.style as style
+import scripts.figures as figures
+import fintix.rollingEngine as rollingEngine
 
-def create_rolling_metrics(data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, metric="Sharpe", round_to=3):
+def create_rolling_metrics(data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, metric="Sharpe", round_to=3, rolling=None):
     '''
     Returns a rolling line chart figure for a given metric.
     Possible metrics include: 'Alpha','Beta','Sharpe', 'Sortino', 'Volatility', 'Correlation'
+    Pass `rolling` (output of rollingEngine.compute_rolling_metrics) to reuse metrics that were already computed.
     '''
-    if metric not in ['Alpha','Beta','Sharpe', 'Sortino', 'Volatility', 'Correlation']:
+    if metric not in rollingEngine.rolling_metrics:
         return
 
-    prices = data.copy()
-    returns = qs.utils._prepare_returns(prices)
-    greeks = qs.stats.rolling_greeks(returns[main_asset], returns[benchmark_asset], periods=rolling_periods, prepare_returns=False)
+    if rolling is None: # Single chart -> only the main asset and the benchmark
+        assets = list(dict.fromkeys([main_asset, benchmark_asset]))
+        rolling = rollingEngine.compute_rolling_metrics(data[assets], benchmark_asset, rolling_periods, rfr, periods_per_year)
 
     ytickformat = ''
-    yaxisTitle = ''
-
-    if metric == 'Sharpe':
-        series = qs.stats.rolling_sharpe(returns[main_asset], rf=rfr, rolling_period=rolling_periods, periods_per_year=periods_per_year, annualize=True, prepare_returns=True)
-        yaxisTitle = main_asset
-    elif metric == 'Sortino':
-        series = qs.stats.rolling_sortino(returns[main_asset], rf=rfr, rolling_period=rolling_periods, annualize=True, periods_per_year=periods_per_year)
-        yaxisTitle = main_asset
-    elif metric == 'Alpha':
-        series = greeks['alpha'] * rolling_periods
+    yaxisTitle = main_asset
+
+    if metric in ['Alpha', 'Beta', 'Correlation']:
         yaxisTitle = f"{main_asset} vs {benchmark_asset}"
+    if metric == 'Alpha':
         ytickformat = ',.2%'
-    elif metric == 'Beta':
-        series = greeks['beta']
-        yaxisTitle = f"{main_asset} vs {benchmark_asset}"
-    elif metric == 'Volatility':
-        series = qs.stats.rolling_volatility(returns[main_asset], rolling_period=rolling_periods, periods_per_year=periods_per_year, prepare_returns=False)
-        yaxisTitle = main_asset
-    elif metric == 'Correlation':
-        series = returns[main_asset].rolling(rolling_periods).corr(returns[benchmark_asset])
-        yaxisTitle = f"{main_asset} vs {benchmark_asset}"
 
+    series = rolling[metric][main_asset]
     series = round(series, round_to).dropna()
     avg = round(series.dropna().mean(),round_to)
 
-    traces = [go.Scatter(x=series.index, 
+    traces = [figures.scatter(x=series.index, 
                 y=series,
                 mode='lines+text',
                 name='Rol',
                 marker=dict(size=12,
                             line=dict(width=2)))]
                             
-    traces += [go.Scatter(x=series.index,
-                            y=[avg for i in series.index],
+    traces += [figures.scatter(x=series.index,
+                            y=np.full(len(series), avg),
                             mode='lines',
                             name='Avg',
                             line=dict(color=style.red, 
                                     width=1))]
         
-    layout = style.scatter_charts_layout(f"{rolling_periods}P Rolling {metric}", 
-                                    ytickformat=ytickformat, yaxisTitle=yaxisTitle)
+    layout = figures.layout(f"{rolling_periods}P Rolling {metric}", 
+                                    ytickformat=ytickformat, yaxisTitle=yaxisTitle,
+                                    range_slider=True, rangeSlideVisible=False)
 
-    figure = go.Figure(traces, layout)
-    figure = style.add_range_slider(figure, rangeSlideVisible=False)
-    return figure
+    return figures.figure(traces, layout)
+
+def create_all_rolling_metrics(data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, round_to=3):
+    '''
+    Returns the rolling figures of all metrics, computing the rolling metrics once for every asset.
+    '''
+    rolling = rollingEngine.compute_rolling_metrics(data, benchmark_asset, rolling_periods, rfr, periods_per_year)
+    return [create_rolling_metrics(data, main_asset, benchmark_asset, rolling_periods, rfr, periods_per_year, metric, round_to, rolling)
+                for metric in rollingEngine.rolling_metrics]
@@ -0,0 +1,420 @@
+import bisect
+import contextlib
+import functools
+import hmac
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import fintix.dataCache as dataCache
+import scripts.resultCache as resultCache
+
+try:
+    import fcntl
+    import resource
+except ImportError: # Windows -> no memory gauge, snapshots of other processes may be read while written
+    fcntl = resource = None
+
+# Latency / size instrumentation of the Dash callbacks and of the compute functions of scripts/* and pages/*.
+# Every process (server workers, background jobs) records into its own registry and writes it to a snapshot file
+# under the shared cache directory; the endpoints merge the snapshots of all processes:
+#   /metrics       -> Prometheus text format
+#   /metrics.json  -> summary per callback / function (count, mean, p50, p95, p99, max)
+# The endpoints answer only requests carrying the token (the client address can't tell a proxied request apart):
+#   curl -H 'Authorization: Bearer <token>' http://host/metrics   (or ?token=<token>)
+enabled = True
+trace_memory = False # Peak traced memory of the outermost instrumented calls (tracemalloc slows allocations down)
+token = os.environ.get('FINTIX_METRICS_TOKEN') # Endpoints are disabled without a token
+flush_interval = 5 # Seconds between snapshot writes of a process
+
+# Modules whose functions are not instrumented: the caching / instrumentation plumbing and tiny helpers called per element
+excluded_modules = {'scripts.telemetry', 'fintix.dataCache', 'scripts.resultCache', 'scripts.precompute',
+                    'scripts.backgroundJobs', 'scripts.style', 'scripts.figures', 'scripts.benchmarks', 'scripts.frameCodec'}
+
+latency_buckets = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+bytes_buckets = [1e3, 1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 5e7]
+cells_buckets = [1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8]
+
+histograms = {
+    'fintix_callback_seconds': ('Latency of the Dash callback requests and background jobs', latency_buckets),
+    'fintix_callback_response_bytes': ('Size of the callback responses sent to the browser', bytes_buckets),
+    'fintix_function_seconds': ('Latency of the compute functions', latency_buckets),
+    'fintix_function_input_cells': ('Rows x assets of the first DataFrame argument of the compute functions', cells_buckets),
+    'fintix_function_memory_peak_bytes': ('Peak traced memory of the outermost compute function calls', bytes_buckets),
+}
+
+_registry = {} # (metric, labels) -> {'buckets', 'sum', 'count', 'max'}
+_lock = threading.Lock()
+_local = threading.local()
+_last_flush = 0
+
+def _reset_after_fork():
+    # A forked child (server worker, background job) reports its own calls only
+    global _lock, _last_flush
+    _lock = threading.Lock()
+    _registry.clear()
+    _last_flush = 0
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+#------------------- Recording -------------------
+def observe(metric, labels, value):
+    '''
+    Records a value in the histogram of a metric for a set of labels (tuple of (name, value) pairs).
+    '''
+    if not enabled:
+        return
+    buckets = histograms[metric][1]
+    with _lock:
+        entry = _registry.get((metric, labels))
+        if entry is None:
+            entry = _registry[(metric, labels)] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0, 'max': 0.0}
+        entry['buckets'][bisect.bisect_left(buckets, value)] += 1
+        entry['sum'] += value
+        entry['count'] += 1
+        entry['max'] = max(entry['max'], value)
+
+def input_cells(args):
+    '''
+    Rows x columns of the first DataFrame / array argument, None without one.
+    '''
+    for value in args:
+        if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+            shape = value.shape
+            return shape[0] * (shape[1] if len(shape) > 1 else 1)
+    return None
+
+def instrument(func, name=None):
+    '''
+    Wraps a function to record its latency, input size and (if trace_memory) peak memory.
+    '''
+    if getattr(func, '_instrumented', False):
+        return func
+    labels = (('function', name or f'{func.__module__}.{func.__qualname__}'),)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        measure_memory = trace_memory and depth == 0 and tracemalloc.is_tracing()
+        if measure_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe('fintix_function_seconds', labels, time.perf_counter() - start)
+            _local.depth = depth
+            cells = input_cells(args)
+            if cells is not None:
+                observe('fintix_function_input_cells', labels, cells)
+            if measure_memory:
+                observe('fintix_function_memory_peak_bytes', labels, tracemalloc.get_traced_memory()[1] - start_memory)
+            if depth == 0:
+                flush()
+    wrapper._instrumented = True
+    return wrapper
+
+def instrument_modules(prefixes=('scripts.', 'pages.', 'fintix.')):
+    '''
+    Replaces the functions defined in the loaded scripts / pages / fintix modules by instrumented ones.
+    Calls through the module (including from its own functions) are recorded; Dash callbacks already
+    registered keep their original function and are timed by the request hooks instead.
+    '''
+    count = 0
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not module_name.startswith(prefixes) or module_name in excluded_modules:
+            continue
+        for name, value in list(vars(module).items()):
+            if inspect.isfunction(value) and value.__module__ == module_name and not name.startswith('__'):
+                setattr(module, name, instrument(value))
+                count += 1
+    return count
+
+@contextlib.contextmanager
+def timed_callback(callback, mode='job'):
+    '''
+    Times a callback run outside of a request (background job) and writes this process' snapshot at the end.
+    '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('fintix_callback_seconds', (('callback', callback), ('mode', mode)), time.perf_counter() - start)
+        flush(force=True)
+
+#------------------- Snapshots -------------------
+def metrics_path():
+    if dataCache.shared_cache_path is None:
+        return None
+    return os.path.join(dataCache.shared_cache_path, 'metrics')
+
+def snapshot():
+    '''
+    This process' histograms and counters (cache hits / misses, memory).
+    '''
+    with _lock:
+        entries = [[metric, list(labels), dict(entry, buckets=list(entry['buckets']))] for (metric, labels), entry in _registry.items()]
+
+    caches = {name: {'hits': cache.hits, 'misses': cache.misses} for name, cache in named_caches().items()}
+    for namespace, cache in list(dataCache._shared_caches.items()):
+        caches[f'shared-{namespace}'] = {'hits': cache.hits, 'misses': cache.misses}
+    functions = resultCache.info()['functions']
+
+    content = {'pid': os.getpid(),
+                'time': time.time(),
+                'histograms': entries,
+                'caches': caches,
+                'result_cache': functions}
+    if resource is not None: # ru_maxrss is in KB on Linux, bytes on macOS
+        content['max_resident_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return content
+
+def named_caches():
+    '''
+    The in-process caches of the app by name (modules imported lazily, they may not be loaded in every process).
+    '''
+    caches = {'datasets': dataCache.dataset_cache, 'results': resultCache.result_cache}
+    for name, module, attribute in [('traces', 'scripts.resampledGraph', 'trace_cache'),
+                                    ('period_returns', 'fintix.periodReturns', 'period_returns_cache')]:
+        if module in sys.modules:
+            caches[name] = getattr(sys.modules[module], attribute)
+    return caches
+
+def flush(force=False):
+    '''
+    Writes this process' snapshot to the metrics directory, at most once per flush_interval unless forced.
+    '''
+    global _last_flush
+    directory = metrics_path()
+    now = time.monotonic()
+    if directory is None or (not force and now - _last_flush < flush_interval):
+        return
+    _last_flush = now
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot(), f)
+        os.replace(temp_path, path)
+    except Exception as e:
+        print(f"Couldn't write the metrics snapshot: {e}")
+
+@contextlib.contextmanager
+def _directory_lock(directory):
+    with open(os.path.join(directory, '.lock'), 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def collect():
+    '''
+    Merges the snapshots of all processes. Snapshots of exited processes (background jobs, recycled workers)
+    are folded into an archive so that the directory doesn't grow with the number of jobs.
+    '''
+    directory = metrics_path()
+    if directory is None:
+        return merge([snapshot()])
+
+    flush(force=True)
+    with _directory_lock(directory):
+        archive_path = os.path.join(directory, 'archive.json')
+        archive = _read(archive_path)
+        snapshots, exited = [], []
+        for entry in os.scandir(directory):
+            if not entry.name.endswith('.json') or entry.name == 'archive.json':
+                continue
+            content = _read(entry.path)
+            if content is None:
+                continue
+            if _alive(content['pid']):
+                snapshots.append(content)
+            else:
+                exited.append((entry.path, content))
+
+        if exited:
+            archive = merge(([archive] if archive else []) + [content for _, content in exited], gauges=False)
+            with open(archive_path + '.tmp', 'w') as f:
+                json.dump(archive, f)
+            os.replace(archive_path + '.tmp', archive_path)
+            for path, _ in exited:
+                os.remove(path)
+
+    return merge(snapshots + ([archive] if archive else []))
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def merge(snapshots, gauges=True):
+    '''
+    Sums the histograms and counters of several snapshots; memory gauges are only kept for running processes.
+    '''
+    histograms_, caches, result_cache = {}, {}, {}
+    processes = []
+    for content in snapshots:
+        for metric, labels, entry in content['histograms']:
+            key = (metric, tuple(tuple(label) for label in labels))
+            total = histograms_.get(key)
+            if total is None:
+                histograms_[key] = dict(entry, buckets=list(entry['buckets']))
+                continue
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], entry['buckets'])]
+            total['sum'] += entry['sum']
+            total['count'] += entry['count']
+            total['max'] = max(total['max'], entry['max'])
+        for totals, counters in [(caches, content['caches']), (result_cache, content['result_cache'])]:
+            for name, values in counters.items():
+                total = totals.setdefault(name, {})
+                for counter, value in values.items():
+                    total[counter] = total.get(counter, 0) + value
+        if gauges and 'max_resident_bytes' in content:
+            processes.append({'pid': content['pid'], 'max_resident_bytes': content['max_resident_bytes']})
+
+    return {'pid': os.getpid(),
+            'time': time.time(),
+            'histograms': [[metric, [list(label) for label in labels], entry] for (metric, labels), entry in histograms_.items()],
+            'caches': caches,
+            'result_cache': result_cache,
+            'processes': processes}
+
+#------------------- Exposition -------------------
+def _labels_text(labels):
+    return ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in labels)
+
+def prometheus_text(merged):
+    lines = []
+    by_metric = {}
+    for metric, labels, entry in merged['histograms']:
+        by_metric.setdefault(metric, []).append((labels, entry))
+
+    for metric, (description, buckets) in histograms.items():
+        if metric not in by_metric:
+            continue
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+        for labels, entry in sorted(by_metric[metric], key=lambda item: item[0]):
+            cumulative = 0
+            for bound, count in zip(buckets + ['+Inf'], entry['buckets']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{_labels_text(labels + [("le", bound)])}}} {cumulative}')
+            lines.append(f'{metric}_sum{{{_labels_text(labels)}}} {entry["sum"]}')
+            lines.append(f'{metric}_count{{{_labels_text(labels)}}} {entry["count"]}')
+
+    for counter in ['hits', 'misses']:
+        lines += [f'# HELP fintix_cache_{counter}_total Cache {counter} by cache', f'# TYPE fintix_cache_{counter}_total counter']
+        lines += [f'fintix_cache_{counter}_total{{{_labels_text([("cache", name)])}}} {values.get(counter, 0)}'
+                    for name, values in sorted(merged['caches'].items())]
+        lines += [f'# HELP fintix_result_cache_{counter}_total Result cache {counter} by function', f'# TYPE fintix_result_cache_{counter}_total counter']
+        lines += [f'fintix_result_cache_{counter}_total{{{_labels_text([("function", name)])}}} {values.get(counter, 0)}'
+                    for name, values in sorted(merged['result_cache'].items())]
+
+    lines += ['# HELP fintix_process_max_resident_bytes Peak resident memory of the running processes', '# TYPE fintix_process_max_resident_bytes gauge']
+    lines += [f'fintix_process_max_resident_bytes{{pid="{process["pid"]}"}} {process["max_resident_bytes"]}' for process in merged['processes']]
+    return '\n'.join(lines) + '\n'
+
+def quantile(entry, buckets, q):
+    '''
+    Estimates a quantile from histogram buckets (linear within the bucket, as Prometheus' histogram_quantile).
+    '''
+    if not entry['count']:
+        return None
+    rank = q * entry['count']
+    cumulative, lower = 0, 0.0
+    for i, count in enumerate(entry['buckets']):
+        upper = min(buckets[i] if i < len(buckets) else entry['max'], entry['max'])
+        if count and cumulative + count >= rank:
+            return lower + (max(upper, lower) - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = buckets[i] if i < len(buckets) else lower
+    return entry['max']
+
+def summary(merged):
+    '''
+    JSON summary: per metric and labels, count / mean / p50 / p95 / p99 / max, sorted by p95.
+    '''
+    result = {metric: [] for metric in histograms}
+    for metric, labels, entry in merged['histograms']:
+        buckets = histograms[metric][1]
+        result[metric].append(dict({name: value for name, value in labels},
+                                    count=entry['count'],
+                                    mean=entry['sum'] / entry['count'] if entry['count'] else None,
+                                    p50=quantile(entry, buckets, 0.5),
+                                    p95=quantile(entry, buckets, 0.95),
+                                    p99=quantile(entry, buckets, 0.99),
+                                    max=entry['max']))
+    for rows in result.values():
+        rows.sort(key=lambda row: row['p95'] or 0, reverse=True)
+    result.update(caches=merged['caches'], result_cache=merged['result_cache'], processes=merged['processes'])
+    return result
+
+#------------------- Server -------------------
+def init_app(app):
+    '''
+    Instruments the loaded modules, times the callback requests and adds the /metrics and /metrics.json endpoints.
+    '''
+    import flask
+    server = app.server
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    instrument_modules()
+
+    @server.before_request
+    def start_timer():
+        flask.g.telemetry_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        start = getattr(flask.g, 'telemetry_start', None)
+        if start is None or not flask.request.path.endswith('/_dash-update-component'):
+            return response
+        body = flask.request.get_json(silent=True) or {}
+        mode = 'poll' if 'cacheKey' in flask.request.args else 'request'
+        labels = (('callback', str(body.get('output', 'unknown'))), ('mode', mode))
+        observe('fintix_callback_seconds', labels, time.perf_counter() - start)
+        if not response.direct_passthrough:
+            observe('fintix_callback_response_bytes', labels, len(response.get_data()))
+        flush()
+        return response
+
+    def authorized_request():
+        request = flask.request
+        auth = request.headers.get('Authorization', '')
+        value = auth[len('Bearer '):] if auth.startswith('Bearer ') else request.args.get('token')
+        return token is not None and value is not None and hmac.compare_digest(value, token)
+
+    @server.route('/metrics')
+    def metrics_text():
+        if not authorized_request():
+            flask.abort(404)
+        return flask.Response(prometheus_text(collect()), mimetype='text/plain; version=0.0.4')
+
+    @server.route('/metrics.json')
+    def metrics_json():
+        if not authorized_request():
+            flask.abort(404)
+        return flask.jsonify(summary(collect()))
@@ -1,12 +1,15 @@
-from pyfinviz import Screener
-import pandas as pd 
+import functools
+import os
 import time
-import sys 
+import pandas as pd
 
-path = sys.path[0].replace('scripts', 'data')
+path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+tickers_to_add = {'BTC-USD':'Bitcoin'}
+max_options = 50 # Search results sent to the ticker dropdown
 
 # Run seperately to scrape ticker universe from Finviz
 def get_ticker_universe(page=500):
+    from pyfinviz import Screener
     start_time = time.time()
     screener = Screener(pages=[x for x in range(1,page)])
 
@@ -20,23 +23,37 @@ def get_ticker_universe(page=500):
                     dict_tickers[screener.data_frames[i].Ticker[j]] = screener.data_frames[i].Company[j]
             except:
                 pass
-            
+
     df = pd.DataFrame(dict_tickers.items())
     df.columns = ["Ticker", "Name"]
     df.to_csv(path + '/tickers-universe.csv', index=False)
     print('---%s seconds ---' %(time.time() - start_time))
 
-# Get tickers universe from Local File
-tickers = pd.read_csv(path + '/data/tickers-universe.csv')
-tickers['Ticker + Name'] = tickers['Ticker'] + ' - ' + tickers['Name']
-tickers = tickers.drop_duplicates().dropna().reset_index(drop=True)
+@functools.lru_cache(maxsize=1)
+def load_tickers():
+    '''
+    Ticker -> 'Ticker - Name' of the tickers universe, read from the local file on first use.
+    '''
+    tickers = pd.read_csv(path + '/tickers-universe.csv')
+    tickers['Ticker + Name'] = tickers['Ticker'] + ' - ' + tickers['Name']
+    tickers = tickers.drop_duplicates().dropna()
 
-# Convert tickers DataFrame to Dictionary to be used as values and labels in the dropdown
-tickers_dict = {}
-n = tickers.shape[0]
-for i in range(n):
-    tickers_dict[tickers.loc[i]["Ticker"]] = tickers.loc[i]["Ticker + Name"]
+    tickers_dict = dict(zip(tickers['Ticker'], tickers['Ticker + Name']))
+    tickers_dict.update({i: i + ' - ' + tickers_to_add[i] for i in tickers_to_add})
+    return tickers_dict
 
-tickers_to_add = {'BTC-USD':'Bitcoin'}
-ticker_labels = [{'label':tickers_dict[i], 'value':i} for i in list(tickers_dict.keys())]
-ticker_labels += [{'label': i + ' - ' + tickers_to_add[i], 'value':i} for i in list(tickers_to_add.keys())]
+def search_ticker_labels(search_value, selected=None, limit=max_options):
+    '''
+    Dropdown options of the tickers matching a search (tickers starting with it first, then names containing it),
+    always including the selected tickers so that they stay displayed.
+    '''
+    tickers_dict = load_tickers()
+    selected = [selected] if isinstance(selected, str) else list(selected or [])
+    options = [{'label': tickers_dict.get(i, i), 'value': i} for i in selected]
+
+    search = (search_value or '').strip().upper()
+    if search:
+        starts = [i for i in tickers_dict if i.upper().startswith(search)]
+        contains = [i for i, label in tickers_dict.items() if search in label.upper() and not i.upper().startswith(search)]
+        options += [{'label': tickers_dict[i], 'value': i} for i in (starts + contains)[:limit] if i not in selected]
+    return options
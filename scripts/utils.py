@@ -4,9 +4,11 @@ import dash_bootstrap_components as dbc
 import base64
 import io
 import datetime
-from dateutil.relativedelta import relativedelta
+from dash.exceptions import PreventUpdate
 import scripts.style as style
-import scripts.tickerUniverse as tickUn
+import fintix.dataCache as dataCache
+import fintix.priceData as priceData
+import scripts.frameCodec as frameCodec
 
 # Params
 initial_amount = 1000
@@ -14,90 +16,51 @@ rfr = 0.02
 periods_per_year = 252
 rolling_periods = periods_per_year // 2
 
-# Date lookback periods
-lookback_periods = ['1w', 'mtd', '3m', '6m', 'ytd', '1y', '3y', '5y','max', 'covid crash', '2022 rate hikes']
-
-def retrieve_date_from_lookback(data, lookback):
-
-    start_date = pd.to_datetime(data.index[0])
-    end_date = pd.to_datetime(data.index[-1])
-
-    if lookback == '1w':
-        start_date = end_date - relativedelta(weeks=1)
-    elif lookback == 'mtd':
-        start_date = datetime.datetime(end_date.year, end_date.month, 1)
-    elif lookback == '3m':
-        start_date = end_date - relativedelta(months=3)
-    elif lookback == '6m':
-        start_date = end_date - relativedelta(months=6)
-    elif lookback == 'ytd':
-        start_date = datetime.datetime(end_date.year, 1,1)
-    elif lookback == '1y':
-        start_date = end_date - relativedelta(years=1)
-    elif lookback == '3y':
-        start_date = end_date - relativedelta(years=3)
-    elif lookback == '5y':
-        start_date = end_date - relativedelta(years=5)
-    elif lookback == 'covid crash':
-        start_date = datetime.datetime(2020, 2, 20)
-        end_date = datetime.datetime(2020, 3, 20)
-    elif lookback == '2022 rate hikes':
-        start_date = datetime.datetime(2022,2, 28)
-        end_date = datetime.datetime(2022,12,31)
-    return start_date, end_date
-
-# Months Mapping -> Used in returns table
-months_mapping = {1:'Jan',
-                2:'Feb',
-                3:'Mar',
-                4:'Apr',
-                5: 'May',
-                6: 'Jun',
-                7: 'Jul',
-                8: 'Aug',
-                9: 'Sep',
-                10: 'Oct',
-                11:'Nov',
-                12:'Dec'}
+# Keep uploaded data server-side and only send its cache key to the browser.
+# Set to False to ship the full data in dcc.Store('stored-data') instead, as a compact columnar payload (see frameCodec).
+server_side_cache = True
 
 # Handle stored data parsing
 def json_to_df(data):
         '''
         Transforms data from JSON to PDF.
+        If the stored data is a server-side cache key, the cached DataFrame is returned without any parsing.
         Modify this function to accomodate for different data sources that have a slightly different data frame shape --> (No date index, date column not named 'Date', etc.)
         '''
-        data = pd.DataFrame(data)
-        try:
-            data.set_index('Date', inplace=True)
-        except:
-            data.index.name = 'Date' # Assumes that df has date as index
-
-        try:
-            data.index = pd.to_datetime(data.index)
-        except:
-            print('Could not change index to datetime')
-            return
-        return data
-
-def filter_data(data, start_date, end_date, assets):
-    '''
-    Filters a dataFrame for a given start/end date as well as assets.
-    '''
-    try:
-        filtered_data = data.loc[start_date:end_date][assets]
-        print("Successfully filtered for start date, end date, and assets.")
-    except:
-        try:
-            filtered_data = data.loc[start_date:end_date]
-            print("Filtered only for start date and end date.")
-        except:
-            try:
-                filtered_data = data[assets]
-                print("Filtered only for assets.")
-            except:
-                print("Couldn't filter for neither dates nor assets.")
-                return data
-    return filtered_data
+        if isinstance(data, dict) and 'cache_key' in data:
+            df = dataCache.get_dataset(data['cache_key'])
+            if df is None:
+                print('Uploaded data is no longer cached, please upload it again.')
+                raise PreventUpdate
+            return df.copy(deep=False) # Callers may re-assign index / columns
+
+        if frameCodec.is_encoded(data):
+            return frameCodec.decode_frame(data)
+
+        return priceData.set_date_index(pd.DataFrame(data))
+
+def store_data(contents, df):
+        '''
+        Returns the payload of dcc.Store('stored-data') for an uploaded file.
+        With server-side caching, the parsed DataFrame is cached under the hash of the uploaded content and only the key is stored.
+        '''
+        if not server_side_cache:
+            return client_data(df)
+
+        key = dataCache.content_hash(contents)
+        if dataCache.get_dataset(key) is None:
+            parsed = priceData.set_date_index(df.copy())
+            if parsed is None or not dataCache.put_dataset(key, parsed):
+                return client_data(df) # Fall back to client-side storage
+        return {'cache_key': key}
+
+def client_data(df):
+        '''
+        Returns the uploaded data for client-side storage: columnar encoded if possible, records otherwise.
+        '''
+        parsed = priceData.set_date_index(df.copy())
+        encoded = frameCodec.encode_frame(parsed) if parsed is not None else None
+        return encoded if encoded is not None else df.to_dict('records')
 
 #------------------- Data Load-------------------
 def parse_content(contents, filename):
@@ -125,6 +88,9 @@ def display_uploaded_file(contents, filename, date):
     Display table of an uploaded csv file.
     '''
     df = parse_content(contents, filename)
+    stored = store_data(contents, df)
+    parsed = json_to_df(stored)
+    metadata = priceData.create_metadata(parsed) if parsed is not None else None # None -> dates couldn't be parsed
 
     display = html.Div([
 
@@ -160,7 +126,11 @@ def display_uploaded_file(contents, filename, date):
                             ], className='mb-3')
                         ]),
 
-                        dcc.Store(id='stored-data', data=df.to_dict('records')),
+                        html.P("Couldn't read the dates of the 'Date' column, please check the file against the data template."
+                                if metadata is None else None, className='text-danger'),
+
+                        dcc.Store(id='stored-data', data=stored),
+                        dcc.Store(id='stored-metadata', data=metadata),
                     ]),
                 ], style.dbc_row_style)
 
@@ -217,7 +187,7 @@ def upload_data():
                                         dbc.ModalHeader(dbc.ModalTitle("Download asset prices from Yahoo Finance"), className='text-center'),
                                         dbc.ModalBody(children=[
                                                                 html.P('Assets', className=style.params_p_style),
-                                                                dcc.Dropdown(id='yf-asset-dpdn', options=tickUn.ticker_labels, value='TSLA', multi=True, className='m-2'), 
+                                                                dcc.Dropdown(id='yf-asset-dpdn', options=[{'label':'TSLA', 'value':'TSLA'}], value='TSLA', multi=True, placeholder='Search tickers or names', className='m-2'), # Options searched on demand (see tickerUniverse)
                                                                 html.P('Date Period', className=style.params_p_style),
                                                                 dcc.Dropdown(id='yf-periods-dpdn', options=['5d','1mo','3mo','6mo','1y','2y','5y','10y','ytd','max'], value='2y', className='m-2'),
                                                                 ]),
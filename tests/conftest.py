@@ -0,0 +1,21 @@
+import warnings
+import pytest
+import scripts.benchmarks as benchmarks
+
+# Run from the repo root -> python -m pytest tests
+# Fixed synthetic panels (scripts.benchmarks.generate_prices): 8 assets, 3 of them starting later (NaN before inception).
+
+@pytest.fixture(autouse=True)
+def ignore_warnings():
+    # quantstats / numpy warn on the empty windows before an asset's inception
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+@pytest.fixture(scope='session')
+def prices():
+    return benchmarks.generate_prices(assets=8, years=4, nan_ramp=0.4, seed=1)
+
+@pytest.fixture(scope='session')
+def monthly_prices():
+    return benchmarks.generate_prices(assets=6, years=20, freq='ME', nan_ramp=0.4, seed=2)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+import quantstats as qs
+import fintix.benchmarkEngine as benchmarkEngine
+
+# fintix.benchmarkEngine against the quantstats calls the benchmark statistics table used to make
+
+def quantstats_statistics(prices, asset, benchmark_asset, periods_per_year, rfr):
+    returns = qs.utils._prepare_returns(prices.copy())
+    greeks = qs.stats.greeks(returns[asset], returns[benchmark_asset], periods=periods_per_year, prepare_returns=False)
+    try:
+        r_squared = qs.stats.r_squared(returns[asset], returns[benchmark_asset], prepare_returns=False)
+    except ValueError: # Constant returns
+        r_squared = np.nan
+    return pd.Series({'Correlation': returns[asset].corr(returns[benchmark_asset]),
+                        'Alpha': greeks['alpha'],
+                        'Beta': greeks['beta'],
+                        'R-squared': r_squared,
+                        'Treynor Ratio': (qs.stats.comp(returns[asset]) - rfr) / greeks['beta'] if greeks['beta'] else np.nan,
+                        'Information Ratio': qs.stats.information_ratio(returns[asset], returns[benchmark_asset], prepare_returns=False)})
+
+def assert_matches(actual, expected, label):
+    actual, expected = actual.astype(float), expected.astype(float)
+    assert (actual.isna() == expected.isna()).all(), f'{label}: NaN masks differ\n{actual}\n{expected}'
+    diff = ((actual - expected).abs() / expected.abs().clip(lower=1)).max()
+    assert not diff > 1e-9, f'{label}: max relative difference {diff:.2e}\n{actual}\n{expected}'
+
+@pytest.mark.parametrize('periods_per_year, rfr', [(252, 0.02), (12, 0)])
+def test_statistics_match_quantstats(prices, periods_per_year, rfr):
+    data = prices.dropna()
+    statistics = benchmarkEngine.compute_benchmark_statistics(data, data.columns[0], periods_per_year, rfr)
+    for asset in data.columns:
+        assert_matches(statistics.loc[asset], quantstats_statistics(data, asset, data.columns[0], periods_per_year, rfr), asset)
+
+def test_statistics_match_quantstats_with_late_inceptions(prices):
+    late = prices.columns[prices.iloc[0].isna()]
+    for benchmark_asset in [prices.columns[prices.iloc[0].notna()][0], late[0]]:
+        statistics = benchmarkEngine.compute_benchmark_statistics(prices, benchmark_asset, 252, 0.02)
+        for asset in prices.columns:
+            assert_matches(statistics.loc[asset], quantstats_statistics(prices, asset, benchmark_asset, 252, 0.02), f'{asset} vs {benchmark_asset}')
+
+def test_statistics_against_a_flat_benchmark(prices):
+    data = prices.dropna().copy()
+    data['FLAT'] = 100.0
+    statistics = benchmarkEngine.compute_benchmark_statistics(data, 'FLAT', 252, 0.02)
+    for asset in data.columns:
+        assert_matches(statistics.loc[asset], quantstats_statistics(data, asset, 'FLAT', 252, 0.02), asset)
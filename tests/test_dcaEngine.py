@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+import fintix.dcaEngine as dcaEngine
+
+# fintix.dcaEngine against the per-contribution loop it replaced (one compounded index per contribution, then summed)
+
+def reference_dca(prices, budget, starting_amount, contribution_dates):
+    returns = prices.pct_change()
+    noa = returns.shape[1]
+    n_payments = len(contribution_dates) - 1 if starting_amount != 0 else len(contribution_dates)
+    payment = ((budget - starting_amount) / n_payments) / noa
+
+    indices, cashflow = [], []
+    for n in contribution_dates:
+        inflow = payment
+        if n == contribution_dates[0] and starting_amount != 0:
+            inflow = starting_amount / noa
+        index = returns.loc[n:].copy() + 1
+        index.iloc[0] = inflow
+        index = index.cumprod()
+        indices.append(index)
+        cashflow.append(index.iloc[0])
+
+    concat_index = pd.concat(indices, axis=1)
+    index = pd.concat([concat_index[[a]].sum(axis=1) for a in prices.columns], axis=1).sum(axis=1)
+    return index, pd.concat(cashflow, axis=1).transpose()
+
+def reference_days_schedule(index, days):
+    # Every x days from the first date, as the loop scheduled them
+    schedule = [index[0]]
+    while schedule[-1] + relativedelta(days=days) <= index[-1]:
+        schedule.append(schedule[-1] + relativedelta(days=days))
+    return schedule
+
+def reference_months_schedule(index, months):
+    schedule = []
+    k = 0
+    while index[0] + relativedelta(months=k * months) <= index[-1]:
+        date = index[0] + relativedelta(months=k * months)
+        schedule.append(index[index >= date][0]) # Next available date
+        k += 1
+    return list(dict.fromkeys(schedule))
+
+@pytest.fixture(scope='module')
+def daily_prices(prices):
+    # As the DCA page prepares them: complete rows, every calendar day
+    return prices.dropna().resample('D').ffill()
+
+@pytest.mark.parametrize('days', [1, 7, 30, 91])
+@pytest.mark.parametrize('starting_amount', [20000, 0])
+def test_days_schedule_matches_loop(daily_prices, days, starting_amount):
+    dates = dcaEngine.retrieve_contribution_dates(daily_prices.index, days=days)
+    assert list(dates) == reference_days_schedule(daily_prices.index, days)
+
+    index, cashflow = dcaEngine.compute_dca(daily_prices, 200000, starting_amount, dates)
+    expected_index, expected_cashflow = reference_dca(daily_prices, 200000, starting_amount, dates)
+    np.testing.assert_allclose(index.to_numpy(), expected_index.to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(cashflow.to_numpy(), expected_cashflow.to_numpy(), rtol=1e-12)
+    assert np.isclose(cashflow.to_numpy().sum(), 200000)
+
+@pytest.mark.parametrize('months', [1, 3, 12])
+def test_months_schedule_matches_loop(daily_prices, months):
+    dates = dcaEngine.retrieve_contribution_dates(daily_prices.index, months=months)
+    assert list(dates) == reference_months_schedule(daily_prices.index, months)
+
+    index, cashflow = dcaEngine.compute_dca(daily_prices, 200000, 20000, dates)
+    expected_index, expected_cashflow = reference_dca(daily_prices, 200000, 20000, dates)
+    np.testing.assert_allclose(index.to_numpy(), expected_index.to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(cashflow.to_numpy(), expected_cashflow.to_numpy(), rtol=1e-12)
+
+def test_dates_schedule_matches_loop(prices):
+    # Business-day panel -> weekend dates snap to the next Monday, dates past the end are dropped
+    data = prices.dropna()
+    requested = ['2021-06-05', data.index[0].strftime('%Y-%m-%d'), '2022-01-01', '2022-01-03', '2030-01-01']
+    dates = dcaEngine.retrieve_contribution_dates(data.index, dates=requested)
+    assert list(dates) == sorted({data.index[data.index >= pd.Timestamp(d)][0] for d in requested[:4]})
+
+    index, cashflow = dcaEngine.compute_dca(data, 100000, 0, dates)
+    expected_index, expected_cashflow = reference_dca(data, 100000, 0, dates)
+    np.testing.assert_allclose(index.to_numpy(), expected_index.fillna(0).to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(cashflow.to_numpy(), expected_cashflow.to_numpy(), rtol=1e-12)
+
+def test_dca_index_of_dated_prices(prices):
+    # create_dca_index accepts a 'Date' column, resamples to calendar days and appends the totals to the cashflow log
+    data = prices.dropna().iloc[:300]
+    index, cashflow = dcaEngine.create_dca_index(data.reset_index(), 200000, 20000, days=30)
+    expected_index, _ = reference_dca(data.resample('D').ffill(), 200000, 20000,
+                                    reference_days_schedule(data.resample('D').ffill().index, 30))
+    np.testing.assert_allclose(index.to_numpy(), expected_index.to_numpy(), rtol=1e-9)
+    assert cashflow.index[-1] == 'Total'
+    assert np.isclose(cashflow.loc['Total', 'Total'], 200000)
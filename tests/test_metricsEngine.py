@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import quantstats as qs
+import fintix.metricsEngine as metricsEngine
+import scripts.metricsParity as metricsParity
+
+# fintix.metricsEngine against quantstats (metrics reference: scripts.metricsParity.quantstats_metrics)
+
+@pytest.mark.parametrize('periods_per_year, rfr', [(252, 0.02), (252, 0), (12, 0.05)])
+def test_metrics_match_quantstats(prices, periods_per_year, rfr):
+    report, mismatches = metricsParity.check_parity(prices.dropna(), periods_per_year, rfr)
+    assert mismatches.empty, mismatches
+
+@pytest.mark.parametrize('periods_per_year, rfr', [(252, 0.02), (252, 0)])
+def test_metrics_match_quantstats_with_late_inceptions(prices, periods_per_year, rfr):
+    assert prices.iloc[0].isna().any()
+    report, mismatches = metricsParity.check_parity(prices, periods_per_year, rfr)
+    assert mismatches.empty, mismatches
+
+def test_metrics_match_quantstats_with_missing_prices(prices):
+    gaps = prices.copy()
+    gaps.iloc[np.random.default_rng(0).choice(len(gaps), 40, replace=False), 1] = np.nan
+    report, mismatches = metricsParity.check_parity(gaps.ffill(), 252, 0.02)
+    assert mismatches.empty, mismatches
+
+def test_monthly_metrics_match_quantstats(monthly_prices):
+    report, mismatches = metricsParity.check_parity(monthly_prices, 12, 0.05)
+    assert mismatches.empty, mismatches
+
+def test_growth_index_and_drawdown_match_quantstats(prices):
+    returns = qs.utils._prepare_returns(prices.copy())
+    expected_index = qs.utils.to_prices(returns, 10000)
+    expected_drawdown = qs.stats.to_drawdown_series(returns)
+
+    np.testing.assert_allclose(metricsEngine.compute_growth_index(prices, 10000).to_numpy(), expected_index.to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(metricsEngine.compute_drawdown(prices).to_numpy(), expected_drawdown.to_numpy(), atol=1e-12)
+    np.testing.assert_array_equal(metricsEngine.returns_frame(prices).isna(), returns.isna())
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+import quantstats as qs
+import fintix.rollingEngine as rollingEngine
+
+# fintix.rollingEngine against the quantstats rolling functions, one asset at a time (as the rolling charts used to)
+
+def quantstats_rolling(prices, asset, benchmark_asset, window, rfr, periods_per_year):
+    returns = qs.utils._prepare_returns(prices.copy())
+    greeks = qs.stats.rolling_greeks(returns[asset], returns[benchmark_asset], periods=window, prepare_returns=False)
+    return {'Alpha': greeks['alpha'] * window,
+            'Beta': greeks['beta'],
+            'Sharpe': qs.stats.rolling_sharpe(returns[asset], rf=rfr, rolling_period=window, periods_per_year=periods_per_year,
+                                            annualize=True, prepare_returns=True),
+            'Sortino': qs.stats.rolling_sortino(returns[asset], rf=rfr, rolling_period=window, annualize=True,
+                                            periods_per_year=periods_per_year),
+            'Volatility': qs.stats.rolling_volatility(returns[asset], rolling_period=window, periods_per_year=periods_per_year,
+                                            prepare_returns=False),
+            'Correlation': returns[asset].rolling(window).corr(returns[benchmark_asset])}
+
+def assert_matches(actual, expected, label):
+    actual, expected = actual.astype(float), expected.astype(float)
+    assert (actual.isna() == expected.isna()).all(), f'{label}: NaN masks differ on {(actual.isna() != expected.isna()).sum()} dates'
+    diff = ((actual - expected).abs() / expected.abs().clip(lower=1)).max()
+    assert not diff > 1e-8, f'{label}: max relative difference {diff:.2e}'
+
+@pytest.mark.parametrize('window, rfr', [(20, 0.02), (126, 0)])
+def test_rolling_metrics_match_quantstats(prices, window, rfr):
+    data = prices.dropna()
+    benchmark_asset = data.columns[0]
+    rolling = rollingEngine.compute_rolling_metrics(data, benchmark_asset, window, rfr, 252)
+    for asset in data.columns:
+        for metric, expected in quantstats_rolling(data, asset, benchmark_asset, window, rfr, 252).items():
+            assert_matches(rolling[metric][asset], expected, f'{metric} {asset}')
+
+@pytest.mark.parametrize('window', [20, 126])
+def test_rolling_metrics_match_quantstats_with_late_inceptions(prices, window):
+    late = prices.columns[prices.iloc[0].isna()]
+    assert len(late)
+    for benchmark_asset in [prices.columns[prices.iloc[0].notna()][0], late[0]]: # Benchmark with / without a full history
+        rolling = rollingEngine.compute_rolling_metrics(prices, benchmark_asset, window, 0.02, 252)
+        for asset in prices.columns:
+            for metric, expected in quantstats_rolling(prices, asset, benchmark_asset, window, 0.02, 252).items():
+                assert_matches(rolling[metric][asset], expected, f'{metric} {asset} vs {benchmark_asset}')
+
+def test_rolling_metrics_match_quantstats_with_missing_prices(prices):
+    gaps = prices.copy()
+    gaps.iloc[np.random.default_rng(0).choice(len(gaps), 40, replace=False), 2] = np.nan
+    rolling = rollingEngine.compute_rolling_metrics(gaps, gaps.columns[0], 20, 0.02, 252)
+    for metric, expected in quantstats_rolling(gaps, gaps.columns[2], gaps.columns[0], 20, 0.02, 252).items():
+        assert_matches(rolling[metric][gaps.columns[2]], expected, metric)
+
+def test_rolling_metrics_match_quantstats_monthly(monthly_prices):
+    benchmark_asset = monthly_prices.columns[0]
+    rolling = rollingEngine.compute_rolling_metrics(monthly_prices, benchmark_asset, 12, 0.05, 12)
+    for asset in monthly_prices.columns:
+        for metric, expected in quantstats_rolling(monthly_prices, asset, benchmark_asset, 12, 0.05, 12).items():
+            assert_matches(rolling[metric][asset], expected, f'{metric} {asset}')
+
+def test_shorter_history_than_window(prices):
+    rolling = rollingEngine.compute_rolling_metrics(prices.dropna().iloc[:10], prices.columns[0], 20, 0.02, 252)
+    assert all(frame.isna().all().all() for frame in rolling.values())
+    assert pd.Index(rollingEngine.rolling_metrics).equals(pd.Index(list(rolling)))
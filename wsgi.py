@@ -0,0 +1,19 @@
+import gc
+import os
+import sys
+
+# WSGI entry point, for a pre-fork server (settings in gunicorn.conf.py):
+#   gunicorn wsgi:server
+# The app and its data are loaded once in the master process; the forked workers share them copy-on-write
+# and share their caches (uploaded datasets, results, graph traces) through a local directory.
+
+# Pages and scripts resolve the data folder from sys.path[0]
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+app = create_app(preload=True)
+server = app.server
+
+# Objects loaded so far are never collected -> the garbage collector doesn't touch (and copy) their pages in the workers
+gc.freeze()